@@ -0,0 +1,74 @@
+"""
+Measures the per frame preparation of the splats in rasterize_image (activations, features and covariances) with the
+activation cache of GaussianModel. A cold frame computes every activation, a cached frame of a static scene only looks
+up the scales, opacities and rotations, and a transformed frame follows an in-place update of the positions, rotations
+and covariances of the first half of the splats, as the viewer does when the transformation changes. The full
+covariances and the SH features are not cached and are built in every frame. The resident size of the cache is
+reported as well.
+
+Usage: python -m benchmarks.bench_activation_cache [--sizes 100000 1000000 3000000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import torch
+
+from benchmarks.bench_utils import create_synthetic_gaussian
+from src.utils.rasterization_util import get_render_device
+
+
+def prepare(point_cloud):
+    # The per splat work of rasterize_image before the splats are handed to the rasterizer
+    return (point_cloud.get_full_covariance(1), point_cloud.get_rotation, point_cloud.get_scaling,
+            point_cloud.get_opacity_with_activation.view(-1), point_cloud.get_features)
+
+
+def synchronize(device):
+    if device.startswith("cuda"):
+        torch.cuda.synchronize(device)
+
+
+def time_function(func, device):
+    synchronize(device)
+    start = time.perf_counter()
+    func()
+    synchronize(device)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--device", default=get_render_device())
+    args = parser.parse_args()
+
+    print(f"{'splats':>10} {'cold [ms]':>10} {'cached [ms]':>12} {'transformed [ms]':>17} {'cache [MB]':>11}")
+    for size in args.sizes:
+        point_cloud = create_synthetic_gaussian(size, args.device)
+        first_half = point_cloud.get_subset(torch.arange(size // 2, device=point_cloud.get_xyz.device))
+        transformation = torch.eye(4, device=point_cloud.get_xyz.device)
+        transformation[:3, 3] = 1.0
+
+        with torch.no_grad():
+            cold_time = float("inf")
+            for _ in range(args.repeat):
+                point_cloud.clear_activation_cache()
+                cold_time = min(cold_time, time_function(lambda: prepare(point_cloud), args.device))
+
+            prepare(point_cloud)
+            cached_time = min(time_function(lambda: prepare(point_cloud), args.device) for _ in range(args.repeat))
+
+            transformed_time = float("inf")
+            for _ in range(args.repeat):
+                point_cloud.update_transformed_slice(first_half, transformation)
+                transformed_time = min(transformed_time, time_function(lambda: prepare(point_cloud), args.device))
+
+        cache_size = point_cloud.get_activation_cache_size()
+        print(f"{size:>10} {cold_time * 1000:>10.2f} {cached_time * 1000:>12.3f} {transformed_time * 1000:>17.2f} "
+              f"{cache_size / 1024 ** 2:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
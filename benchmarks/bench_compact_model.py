@@ -0,0 +1,125 @@
+"""
+Measures the compact storage mode of GaussianModel: the memory of the float32 and the compact attributes, the sizes
+of the PLY and the compact file, their load times, and the PSNR of views rendered from the compact model against the
+same views rendered from the float32 model (with evaluation_utils.psnr).
+The memory is measured after the views were rendered, so it includes the covariances, which are built for the
+rendering, and the activations that the model keeps cached between frames. On a CUDA device, the peak memory allocated
+while rendering is reported as well. A trained model can be measured with --ply, otherwise a synthetic model is created
+for every size.
+
+Usage: python -m benchmarks.bench_compact_model [--sizes 100000 1000000] [--ply model.ply] [--views 8]
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import torch
+
+from benchmarks.bench_utils import BenchmarkCamera, create_synthetic_gaussian
+from src.utils.evaluation_utils import psnr
+from src.utils.file_loader import load_gaussian_model
+from src.utils.rasterization_util import get_render_device, rasterize_image
+
+
+def get_memory_size(point_cloud):
+    # The attributes and the activations that stay resident between frames
+    tensors = [tensor for tensor in point_cloud.get_raw_tensors() if tensor is not None]
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors) + point_cloud.get_activation_cache_size()
+
+
+def render_views(point_cloud, cameras, device):
+    """
+    Returns the rendered images and the peak memory allocated on a CUDA device while rendering them, or None.
+    """
+    is_cuda = device.startswith("cuda")
+    if is_cuda:
+        torch.cuda.synchronize(device)
+        torch.cuda.reset_peak_memory_stats(device)
+    with torch.no_grad():
+        images = [rasterize_image(point_cloud, camera, 1, [0.0, 0.0, 0.0], device).clamp(0, 1) for camera in cameras]
+    peak_memory = torch.cuda.max_memory_allocated(device) if is_cuda else None
+    return images, peak_memory
+
+
+def create_cameras(point_cloud, count, width, height):
+    # Cameras on a circle around the center of the model, looking at it with a field of view that covers its extent
+    xyz = point_cloud.get_xyz.float()
+    center = xyz.mean(dim=0).cpu()
+    radius = (xyz - xyz.mean(dim=0)).norm(dim=1).quantile(0.9).item()
+    cameras = []
+    for i in range(count):
+        camera = BenchmarkCamera(8.0 if i % 2 == 0 else 30.0, width, height, distance=2.5 * radius)
+        angle = 2 * math.pi * i / count
+        rotation = torch.tensor([[math.cos(angle), 0, math.sin(angle)],
+                                 [0, 1, 0],
+                                 [-math.sin(angle), 0, math.cos(angle)]], dtype=torch.float32)
+        camera.viewmat = camera.viewmat.clone()
+        camera.viewmat[0, :3, :3] = rotation
+        camera.viewmat[0, :3, 3] = camera.viewmat[0, :3, 3] - rotation @ center
+        cameras.append(camera)
+    return cameras
+
+
+def time_load(path):
+    start = time.perf_counter()
+    point_cloud = load_gaussian_model(path)
+    # The memory-mapped PLY is only read when it is touched
+    for tensor in point_cloud.get_raw_tensors():
+        if tensor is not None:
+            tensor.sum()
+    return time.perf_counter() - start
+
+
+def measure(name, point_cloud, args):
+    with tempfile.TemporaryDirectory() as directory:
+        ply_path = os.path.join(directory, "model.ply")
+        compact_path = os.path.join(directory, "model.cgs")
+        point_cloud.save_ply(ply_path)
+        point_cloud.save_compact(compact_path)
+        ply_size, compact_size = os.path.getsize(ply_path), os.path.getsize(compact_path)
+        ply_load_time, compact_load_time = time_load(ply_path), time_load(compact_path)
+        compact_point_cloud = load_gaussian_model(compact_path)
+
+    width, height = (int(value) for value in args.resolution.split("x"))
+    point_cloud.move_to_device(args.device)
+    compact_point_cloud.move_to_device(args.device)
+    cameras = create_cameras(point_cloud, args.views, width, height)
+    images, peak = render_views(point_cloud, cameras, args.device)
+    compact_images, compact_peak = render_views(compact_point_cloud, cameras, args.device)
+    psnrs = [psnr(image, compact_image).item() for image, compact_image in zip(images, compact_images)]
+
+    memory, compact_memory = get_memory_size(point_cloud), get_memory_size(compact_point_cloud)
+    finite_psnrs = [value for value in psnrs if math.isfinite(value)]
+    mean_psnr = sum(finite_psnrs) / len(finite_psnrs) if finite_psnrs else math.inf
+    print(f"{name:>12} {memory / 1024 ** 2:>11.1f} {compact_memory / 1024 ** 2:>12.1f} "
+          f"{1 - compact_memory / memory:>7.1%} {ply_size / 1024 ** 2:>9.1f} {compact_size / 1024 ** 2:>10.1f} "
+          f"{ply_load_time * 1000:>10.1f} {compact_load_time * 1000:>11.1f} {mean_psnr:>10.2f} {min(psnrs):>9.2f}")
+    if peak is not None:
+        print(f"{'':>12} peak while rendering: float {peak / 1024 ** 2:.1f} MB, "
+              f"compact {compact_peak / 1024 ** 2:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--ply", help="Gaussian PLY to measure instead of the synthetic models")
+    parser.add_argument("--views", type=int, default=8)
+    parser.add_argument("--resolution", default="640x360")
+    parser.add_argument("--device", default=get_render_device())
+    args = parser.parse_args()
+
+    print(f"{'model':>12} {'float [MB]':>11} {'compact [MB]':>12} {'saved':>7} {'PLY [MB]':>9} {'file [MB]':>10} "
+          f"{'PLY [ms]':>10} {'load [ms]':>11} {'mean PSNR':>10} {'min PSNR':>9}")
+    if args.ply:
+        measure(os.path.basename(args.ply), load_gaussian_model(args.ply), args)
+        return
+
+    for size in args.sizes:
+        measure(str(size), create_synthetic_gaussian(size), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures the throughput of the CPU rasterizer, which rasterize_image uses when there is no CUDA device, on synthetic
+scenes for several splat counts and thread counts. Reports the frame time, the number of splat and tile intersections
+and the splats rendered per second. If gsplat and a CUDA device are available, the images are compared against gsplat
+and the largest pixel difference is reported.
+
+Usage: python -m benchmarks.bench_cpu_rasterizer [--sizes 100000 1000000] [--threads 1 8] [--resolution 1280x720]
+"""
+
+import argparse
+import os
+import time
+
+import torch
+
+from benchmarks.bench_utils import BenchmarkCamera, create_synthetic_gaussian
+from src.utils.cpu_rasterization_util import rasterize_cpu, project_gaussians, bin_gaussians
+from src.utils.rasterization_util import rasterize_image
+
+
+def count_intersections(point_cloud, camera, tile_size=16):
+    means_2d, depths, _, radii = project_gaussians(point_cloud.get_xyz, point_cloud.get_full_covariance(),
+                                                   camera.viewmat[0], camera.intrinsics[0], camera.width,
+                                                   camera.height, radius_clip=3)
+    tile_columns = (camera.width + tile_size - 1) // tile_size
+    tile_rows = (camera.height + tile_size - 1) // tile_size
+    gaussian_ids, _ = bin_gaussians(means_2d, depths, radii, tile_size, tile_columns, tile_rows)
+    return int((radii > 0).sum().item()), gaussian_ids.shape[0]
+
+
+def render(point_cloud, camera, thread_count):
+    return rasterize_cpu(point_cloud.get_xyz, point_cloud.get_full_covariance(),
+                         point_cloud.get_opacity_with_activation.view(-1),
+                         (point_cloud._features_dc, point_cloud._features_rest),
+                         camera.viewmat[0], camera.intrinsics[0], camera.width, camera.height,
+                         background=torch.zeros(3), radius_clip=3, thread_count=thread_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--fov", type=float, default=60.0)
+    parser.add_argument("--frames", type=int, default=3)
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.resolution.split("x"))
+    camera = BenchmarkCamera(args.fov, width, height)
+    compare_gsplat = torch.cuda.is_available()
+
+    header = f"{'splats':>10} {'in view':>9} {'tile hits':>10} {'threads':>8} {'frame [ms]':>11} {'splats/s':>11}"
+    if compare_gsplat:
+        header += f" {'max diff':>9}"
+    print(header)
+
+    for size in args.sizes:
+        point_cloud = create_synthetic_gaussian(size)
+        in_view, intersections = count_intersections(point_cloud, camera)
+
+        for thread_count in args.threads:
+            image = render(point_cloud, camera, thread_count)
+            start = time.perf_counter()
+            for _ in range(args.frames):
+                render(point_cloud, camera, thread_count)
+            frame_time = (time.perf_counter() - start) / args.frames
+
+            line = (f"{size:>10} {in_view:>9} {intersections:>10} {thread_count:>8} {frame_time * 1000:>11.1f} "
+                    f"{size / frame_time:>11.3g}")
+            if compare_gsplat:
+                point_cloud.move_to_device("cuda:0")
+                reference = rasterize_image(point_cloud, camera, 1, [0.0, 0.0, 0.0], "cuda:0", False)[0]
+                point_cloud.move_to_device("cpu")
+                line += f" {(image - reference).abs().max().item():>9.5f}"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
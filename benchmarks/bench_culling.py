@@ -0,0 +1,130 @@
+"""
+Measures the effect of the frustum and opacity culling of SplatCuller on a large synthetic scene, viewed from the
+same position with decreasing fields of view. For every field of view, the share of the culled splats, the time of
+the culling and the time of preparing the splats for rasterization (activations and covariances) with and without
+culling are reported. If gsplat and a CUDA device are available, the full rasterize_image is timed as well, and the
+largest pixel difference of the culled images is reported.
+The culler is configured to always return the visible splats here; by default, rasterize_image renders the whole
+point cloud if less than a fifth of the splats would be culled.
+The culling has to be conservative, so the number of splats whose center projects into the image but which were
+culled is checked as well (missed, always 0).
+
+Usage: python -m benchmarks.bench_culling [--size 2000000] [--fovs 90 30 10 3] [--transparent 0.1]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from benchmarks.bench_utils import BenchmarkCamera, create_synthetic_gaussian
+from src.utils.culling_util import SplatCuller, SplatGrid, MIN_OPACITY
+
+
+def prepare(point_cloud):
+    # The per splat work of rasterize_image before the splats are handed to gsplat
+    return (point_cloud.get_full_covariance(1), point_cloud.get_rotation, point_cloud.get_scaling,
+            point_cloud.get_opacity_with_activation.view(-1), point_cloud.get_features)
+
+
+def synchronize(device):
+    if device.startswith("cuda"):
+        torch.cuda.synchronize(device)
+
+
+def time_function(func, device, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        synchronize(device)
+        start = time.perf_counter()
+        func()
+        synchronize(device)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def count_missed(point_cloud, camera, indices):
+    """
+    Counts the opaque splats whose centers project into the image, but which were culled.
+    """
+    viewmat = camera.viewmat[0].to(point_cloud.get_xyz.device)
+    centers = point_cloud.get_xyz @ viewmat[:3, :3].T + viewmat[:3, 3]
+    intrinsics = camera.intrinsics[0]
+    z = centers[:, 2]
+    u = intrinsics[0, 0] * centers[:, 0] / z + intrinsics[0, 2]
+    v = intrinsics[1, 1] * centers[:, 1] / z + intrinsics[1, 2]
+    in_view = ((z > 0.01) & (u >= 0) & (u <= camera.width) & (v >= 0) & (v <= camera.height)
+               & (point_cloud.get_opacity_with_activation.view(-1) >= MIN_OPACITY))
+
+    kept = torch.zeros_like(in_view)
+    kept[indices] = True
+    return int((in_view & ~kept).sum().item())
+
+
+def get_rasterizer(device):
+    if not device.startswith("cuda"):
+        return None
+    try:
+        from src.utils.rasterization_util import rasterize_image
+        import gsplat  # noqa: F401
+    except ImportError:
+        return None
+    return rasterize_image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=2_000_000)
+    parser.add_argument("--fovs", type=float, nargs="+", default=[90.0, 30.0, 10.0, 3.0])
+    parser.add_argument("--transparent", type=float, default=0.1, help="Share of transparent splats")
+    parser.add_argument("--device", default="cuda:0" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    point_cloud = create_synthetic_gaussian(args.size, args.device, args.transparent)
+    # The benchmark measures the culled rendering at every field of view
+    culler = SplatCuller(min_culled_share=0.0)
+    rasterize_image = get_rasterizer(args.device)
+
+    grid_time = time_function(lambda: SplatGrid(point_cloud), args.device, repeat=1)
+    print(f"{args.size} splats on {args.device}, grid built in {grid_time * 1000:.1f} ms")
+    if rasterize_image is None:
+        print("gsplat or CUDA is not available, only the preparation of the splats is timed")
+
+    header = (f"{'FOV':>6} {'visible':>9} {'culled':>8} {'missed':>7} {'cull [ms]':>10} {'prepare [ms]':>13} "
+              f"{'culled [ms]':>12} {'speedup':>8}")
+    if rasterize_image is not None:
+        header += f" {'render [ms]':>12} {'culled [ms]':>12} {'speedup':>8} {'max diff':>9}"
+    print(header)
+
+    for fov in args.fovs:
+        camera = BenchmarkCamera(fov)
+        indices = culler.get_visible_indices(point_cloud, camera)
+        stats = culler.get_stats()
+        missed = count_missed(point_cloud, camera, indices)
+
+        cull_time = time_function(lambda: culler.get_visible_indices(point_cloud, camera), args.device)
+        full_time = time_function(lambda: prepare(point_cloud), args.device)
+        culled_time = time_function(
+            lambda: prepare(point_cloud.get_subset(culler.get_visible_indices(point_cloud, camera))), args.device)
+
+        culled_share = 1 - stats["visible"] / stats["splat_count"]
+        line = (f"{fov:>6.1f} {stats['visible']:>9} {culled_share:>8.1%} {missed:>7} {cull_time * 1000:>10.2f} "
+                f"{full_time * 1000:>13.2f} {culled_time * 1000:>12.2f} {full_time / culled_time:>8.2f}")
+
+        if rasterize_image is not None:
+            color = np.zeros(3)
+            render_time = time_function(
+                lambda: rasterize_image(point_cloud, camera, 1, color, args.device), args.device)
+            culled_render_time = time_function(
+                lambda: rasterize_image(point_cloud, camera, 1, color, args.device, culler=culler), args.device)
+            difference = (rasterize_image(point_cloud, camera, 1, color, args.device)
+                          - rasterize_image(point_cloud, camera, 1, color, args.device, culler=culler)).abs().max()
+            line += (f" {render_time * 1000:>12.2f} {culled_render_time * 1000:>12.2f} "
+                     f"{render_time / culled_render_time:>8.2f} {difference.item():>9.5f}")
+
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares the cost of moving Gaussian attributes into and out of the mixture_bind extension through Python lists and
+through float32 NumPy arrays. The extension has to be compiled first (python setup.py build_ext --inplace).
+Before timing, the arrays are round-tripped through CreateMixtureLevelFromArrays and CreateArrays and compared with
+the inputs and with the level created from lists, so a small size also serves as a smoke test of a rebuilt extension.
+
+Usage: python -m benchmarks.bench_mixture_conversion [--sizes 100000 1000000]
+"""
+
+import argparse
+
+import mixture_bind
+import numpy as np
+
+from benchmarks.bench_utils import create_synthetic_attributes, get_gaussian_property_names, time_function
+from src.gui.workers.qt_gaussian_mixture import GaussianMixtureWorker
+from src.models.gaussian_model import GaussianModel
+
+
+def to_lists(gaussian):
+    return (gaussian.get_xyz.detach().cpu().tolist(),
+            gaussian.get_colors.detach().cpu().tolist(),
+            gaussian.get_raw_opacity.detach().view(-1).cpu().tolist(),
+            gaussian.get_covariance(1).detach().cpu().tolist(),
+            gaussian.get_spherical_harmonics.detach().cpu().tolist())
+
+
+def check_round_trip(gaussian):
+    """
+    Raises a RuntimeError if the arrays of a level created from arrays or from lists differ from the input arrays.
+    """
+    arrays = GaussianMixtureWorker.get_mixture_arrays(gaussian)
+    array_level = mixture_bind.MixtureLevel.CreateMixtureLevelFromArrays(*arrays)
+    list_level = mixture_bind.MixtureLevel.CreateMixtureLevel(*to_lists(gaussian))
+    for name, level in (("arrays", array_level), ("lists", list_level)):
+        for index, (expected, actual) in enumerate(zip(arrays, mixture_bind.MixtureLevel.CreateArrays(level))):
+            if not np.array_equal(expected.reshape(actual.shape), actual):
+                raise RuntimeError(f"Array {index} of the level created from {name} differs from the input.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'splats':>10} {'bridge':>8} {'to C++ [s]':>12} {'to Python [s]':>14}")
+    for size in args.sizes:
+        gaussian = GaussianModel(3)
+        gaussian.from_attribute_matrix(create_synthetic_attributes(size), get_gaussian_property_names())
+        check_round_trip(gaussian)
+        mixture_level = mixture_bind.MixtureLevel.CreateMixtureLevelFromArrays(
+            *GaussianMixtureWorker.get_mixture_arrays(gaussian))
+
+        list_in = time_function(lambda: mixture_bind.MixtureLevel.CreateMixtureLevel(*to_lists(gaussian)), repeat=1)
+        list_out = time_function(mixture_bind.MixtureLevel.CreatePythonLists, mixture_level, repeat=1)
+        array_in = time_function(lambda: mixture_bind.MixtureLevel.CreateMixtureLevelFromArrays(
+            *GaussianMixtureWorker.get_mixture_arrays(gaussian)))
+        array_out = time_function(mixture_bind.MixtureLevel.CreateArrays, mixture_level)
+
+        print(f"{size:>10} {'lists':>8} {list_in:>12.3f} {list_out:>14.3f}")
+        print(f"{size:>10} {'arrays':>8} {array_in:>12.3f} {array_out:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Measures the effect of GaussianModel.sort_by_morton_order on the passes that walk the neighbourhoods of the splats:
+the conversion to an Open3D point cloud with the KD-tree normal estimation, the KD-tree build, the voxel downsampling,
+a point-to-plane ICP registration and the HEM reduction of the mixture building. Every pass runs on the splats in
+their original order and in Morton order; the sort itself is reported as well.
+The synthetic splats are in a random order, as they come out of training. The second point cloud of the registration
+is a slightly transformed copy of the first one. The HEM reduction needs the compiled mixture_bind extension
+(python setup.py build_ext --inplace) and is skipped without it.
+
+Usage: python -m benchmarks.bench_morton_order [--sizes 100000 1000000] [--iterations 10]
+"""
+
+import argparse
+
+import numpy as np
+import open3d as o3d
+import torch
+
+from benchmarks.bench_utils import create_synthetic_gaussian, time_function
+from src.utils.local_registration_util import do_icp_registration, LocalRegistrationType, KernelLossFunctionType
+from src.utils.point_cloud_converter import convert_gs_to_open3d_pc, NormalEstimationType
+
+
+def get_transformation():
+    angle = np.deg2rad(2.0)
+    transformation = np.eye(4)
+    transformation[:3, :3] = [[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0], [0, 0, 1]]
+    transformation[:3, 3] = [0.5, -0.3, 0.2]
+    return transformation
+
+
+def time_hem(gaussian, cluster_level):
+    try:
+        import mixture_bind
+    except ImportError:
+        return None
+
+    from src.gui.workers.qt_gaussian_mixture import GaussianMixtureWorker
+
+    mixture_level = mixture_bind.MixtureLevel.CreateMixtureLevelFromArrays(
+        *GaussianMixtureWorker.get_mixture_arrays(gaussian))
+    # The default parameters of the mixture tab
+    return time_function(lambda: mixture_bind.MixtureCreator.CreateMixture(cluster_level, 3.0, 3.0, 2.5, 1.0,
+                                                                           mixture_level), repeat=1)
+
+
+def measure(gaussian, target, args):
+    timings = {"convert": time_function(lambda: convert_gs_to_open3d_pc(gaussian, NormalEstimationType.KD_TREE),
+                                        repeat=args.repeat)}
+    source = convert_gs_to_open3d_pc(gaussian)
+    timings["KD-tree"] = time_function(lambda: o3d.geometry.KDTreeFlann(source), repeat=args.repeat)
+    timings["voxel"] = time_function(lambda: source.voxel_down_sample(args.voxel_size), repeat=args.repeat)
+    timings["ICP"] = time_function(lambda: do_icp_registration(source, target, np.eye(4),
+                                                               LocalRegistrationType.ICP_Point_To_Plane,
+                                                               args.max_correspondence, 0.0, 0.0, args.iterations,
+                                                               KernelLossFunctionType.Loss_None, 0.0), repeat=1)
+    timings["HEM"] = time_hem(gaussian, args.cluster_level)
+    return timings
+
+
+def format_time(value):
+    return f"{'skipped':>10}" if value is None else f"{value * 1000:>10.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=10, help="ICP iterations")
+    parser.add_argument("--max-correspondence", type=float, default=2.0)
+    parser.add_argument("--voxel-size", type=float, default=1.0)
+    parser.add_argument("--cluster-level", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    print(f"{'splats':>10} {'order':>8} {'sort [ms]':>10} {'convert [ms]':>13} {'KD-tree [ms]':>13} "
+          f"{'voxel [ms]':>11} {'ICP [ms]':>10} {'HEM [ms]':>10}")
+    for size in args.sizes:
+        gaussian = create_synthetic_gaussian(size)
+        target_gaussian = gaussian.clone_gaussian()
+        target_gaussian.transform_gaussian_model(torch.from_numpy(get_transformation().astype(np.float32)))
+        target = convert_gs_to_open3d_pc(target_gaussian)
+
+        for order in ("original", "morton"):
+            sort_time = None
+            if order == "morton":
+                # The target is sorted as well, so that the correspondence searches of the ICP walk its KD-tree in order
+                sort_time = time_function(lambda: gaussian.clone_gaussian().sort_by_morton_order(),
+                                          repeat=args.repeat)
+                gaussian.sort_by_morton_order()
+                target_gaussian.sort_by_morton_order()
+                target = convert_gs_to_open3d_pc(target_gaussian)
+
+            timings = measure(gaussian, target, args)
+            sort_column = f"{'':>10}" if sort_time is None else format_time(sort_time)
+            print(f"{size:>10} {order:>8} {sort_column} {timings['convert'] * 1000:>13.1f} "
+                  f"{timings['KD-tree'] * 1000:>13.1f} {timings['voxel'] * 1000:>11.1f} "
+                  f"{format_time(timings['ICP'])} {format_time(timings['HEM'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares rendering many views with one rasterize_image call per camera against MultiViewRasterizer, which computes the
+activations and covariances of the splats once and renders the cameras of the same resolution in batches. Reports the
+total time, the time per view, the share of the setup and the largest pixel difference between the two.
+On a CUDA device with gsplat, the batches are rendered by a single rasterizer call; on the CPU the cameras of a batch
+are rendered one after the other, so only the setup is shared.
+
+Usage: python -m benchmarks.bench_multi_view [--size 1000000] [--views 300] [--resolution 640x360]
+"""
+
+import argparse
+import math
+import time
+
+import torch
+
+from benchmarks.bench_utils import BenchmarkCamera, create_synthetic_gaussian
+from src.utils.rasterization_util import MultiViewRasterizer, get_render_device, rasterize_image
+
+
+def synchronize(device):
+    if device.startswith("cuda"):
+        torch.cuda.synchronize(device)
+
+
+def create_cameras(count, width, height):
+    # The cameras orbit the scene, with narrow fields of view so that the small synthetic splats are rendered
+    cameras = []
+    for i in range(count):
+        camera = BenchmarkCamera(8.0 + 4.0 * (i % 3), width, height)
+        angle = 2 * math.pi * i / count
+        rotation = torch.tensor([[math.cos(angle), 0, math.sin(angle)],
+                                 [0, 1, 0],
+                                 [-math.sin(angle), 0, math.cos(angle)]], dtype=torch.float32)
+        camera.viewmat = camera.viewmat.clone()
+        camera.viewmat[0, :3, :3] = camera.viewmat[0, :3, :3] @ rotation
+        cameras.append(camera)
+    return cameras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--views", type=int, default=300)
+    parser.add_argument("--resolution", default="640x360")
+    parser.add_argument("--memory-budget", type=int, default=2 ** 31, help="Rasterizer memory budget in bytes")
+    parser.add_argument("--device", default=get_render_device())
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.resolution.split("x"))
+    point_cloud = create_synthetic_gaussian(args.size, args.device)
+    cameras = create_cameras(args.views, width, height)
+    color = [0.0, 0.0, 0.0]
+
+    with torch.no_grad():
+        synchronize(args.device)
+        start = time.perf_counter()
+        single_images = [rasterize_image(point_cloud, camera, 1, color, args.device, False) for camera in cameras]
+        synchronize(args.device)
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rasterizer = MultiViewRasterizer(point_cloud, 1, color, args.device, memory_budget=args.memory_budget)
+        synchronize(args.device)
+        setup_time = time.perf_counter() - start
+        batches = rasterizer.get_batches(cameras)
+        batched_images = [None] * len(cameras)
+        for indices in batches:
+            images = rasterizer.rasterize([cameras[i] for i in indices], False)
+            for index, image in zip(indices, images):
+                batched_images[index] = image
+        synchronize(args.device)
+        batched_time = time.perf_counter() - start
+
+    difference = max((single[0] - batched).abs().max().item()
+                     for single, batched in zip(single_images, batched_images))
+
+    print(f"{args.size} splats, {args.views} views at {width}x{height} on {args.device}, "
+          f"{len(batches)} batches of up to {max(len(indices) for indices in batches)} views")
+    print(f"{'method':>10} {'total [s]':>10} {'view [ms]':>10} {'setup [ms]':>11} {'max diff':>9}")
+    print(f"{'single':>10} {single_time:>10.2f} {single_time / args.views * 1000:>10.1f} {'':>11} {'':>9}")
+    print(f"{'batched':>10} {batched_time:>10.2f} {batched_time / args.views * 1000:>10.1f} "
+          f"{setup_time * 1000:>11.1f} {difference:>9.5f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares Open3D's KD-tree normal estimation with the normals derived from the splat covariances, in terms of runtime,
+angular error against the true surface normals and the accuracy of a point-to-plane ICP registration.
+The synthetic scene consists of flat splats scattered around a wavy surface.
+
+Usage: python -m benchmarks.bench_normal_estimation [--sizes 100000 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import open3d as o3d
+import torch
+
+from src.models.gaussian_model import GaussianModel
+from src.utils.general_utils import strip_symmetric
+from src.utils.local_registration_util import do_icp_registration, LocalRegistrationType, KernelLossFunctionType
+from src.utils.point_cloud_converter import convert_gs_to_open3d_pc, NormalEstimationType
+
+
+def create_surface_gaussians(count, seed=0):
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(-5, 5, (2, count))
+    z = 0.3 * np.sin(x) * np.cos(y)
+    normals = np.stack((-0.3 * np.cos(x) * np.cos(y), 0.3 * np.sin(x) * np.sin(y), np.ones(count)), axis=1)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+
+    # Build an orthonormal basis around every normal and squash the splats along it
+    tangent = np.cross(normals, [1.0, 0.0, 0.0])
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    bitangent = np.cross(normals, tangent)
+    basis = np.stack((tangent, bitangent, normals), axis=2)
+    scales = np.array([0.02, 0.02, 0.001]) ** 2
+    covariances = basis @ np.diag(scales) @ basis.transpose(0, 2, 1)
+
+    # Trained splats do not lie exactly on the surface, so the centers are displaced along the normals
+    xyz = np.stack((x, y, z), axis=1) + normals * rng.normal(0.0, 0.005, (count, 1))
+
+    gaussian = GaussianModel(3)
+    gaussian._xyz = torch.from_numpy(xyz).float()
+    gaussian._features_dc = torch.zeros((count, 1, 3))
+    gaussian._covariance = strip_symmetric(torch.from_numpy(covariances).float())
+    return gaussian, normals
+
+
+def get_ground_truth_transformation():
+    angle = np.deg2rad(3.0)
+    transformation = np.eye(4)
+    transformation[:3, :3] = [[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0], [0, 0, 1]]
+    transformation[:3, 3] = [0.05, -0.03, 0.02]
+    return transformation
+
+
+def get_transformation_error(estimated, ground_truth):
+    difference = np.linalg.inv(ground_truth) @ estimated
+    rotation_error = np.degrees(np.arccos(np.clip((np.trace(difference[:3, :3]) - 1) / 2, -1, 1)))
+    return rotation_error, np.linalg.norm(difference[:3, 3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    ground_truth = get_ground_truth_transformation()
+    print(f"{'splats':>10} {'normals':>11} {'time [s]':>9} {'angle err [deg]':>16} "
+          f"{'ICP rot err [deg]':>18} {'ICP trans err':>14}")
+    for size in args.sizes:
+        gaussian, true_normals = create_surface_gaussians(size)
+        # The source is sampled independently from the same surface, so the registration is not trivial
+        source_gaussian, _ = create_surface_gaussians(size, seed=1)
+        source = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(source_gaussian.get_xyz.double().numpy()))
+        source.transform(np.linalg.inv(ground_truth))
+
+        for normal_estimation in NormalEstimationType:
+            start = time.perf_counter()
+            target = convert_gs_to_open3d_pc(gaussian, normal_estimation)
+            elapsed = time.perf_counter() - start
+            print_results(size, normal_estimation.name, elapsed, source, target, true_normals, ground_truth)
+
+        # Recent Open3D versions derive the normals from the covariances if the point cloud has them,
+        # so the cost of the plain KD-tree search is measured on a copy without covariances as well.
+        target = o3d.geometry.PointCloud(target)
+        target.covariances = o3d.utility.Matrix3dVector()
+        start = time.perf_counter()
+        target.estimate_normals()
+        elapsed = time.perf_counter() - start
+        print_results(size, "KNN_ONLY", elapsed, source, target, true_normals, ground_truth)
+
+
+def print_results(size, name, elapsed, source, target, true_normals, ground_truth):
+    normals = np.asarray(target.normals)
+    angle_error = np.degrees(np.arccos(np.clip(np.abs(np.sum(normals * true_normals, axis=1)), 0, 1))).mean()
+
+    result = do_icp_registration(source, target, np.eye(4), LocalRegistrationType.ICP_Point_To_Plane, 0.2,
+                                 1e-6, 1e-6, 50, KernelLossFunctionType.Loss_None, 0.0)
+    rotation_error, translation_error = get_transformation_error(result.transformation, ground_truth)
+
+    print(f"{size:>10} {name:>11} {elapsed:>9.3f} {angle_error:>16.3f} "
+          f"{rotation_error:>18.4f} {translation_error:>14.5f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Compares the load time and peak memory of GaussianModel.from_ply against the previous per-attribute loader, and of
+the memory-mapped load_gaussian_model with and without the conversion to the Open3D point cloud that load_gaussian_pc
+does for the GUI and the CLI. The mapped load alone only reads the header; the conversion reads most of the file.
+
+Usage: python -m benchmarks.bench_ply_loading [--sizes 1000000 5000000 10000000] [--directory DIR]
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import plyfile
+import torch
+
+from benchmarks.bench_utils import write_synthetic_gaussian_ply, run_isolated
+from src.models.gaussian_model import GaussianModel
+from src.utils.file_loader import load_gaussian_model, load_gaussian_pc
+
+
+def legacy_from_ply(model, plydata):
+    xyz = np.stack((np.asarray(plydata.elements[0]["x"]),
+                    np.asarray(plydata.elements[0]["y"]),
+                    np.asarray(plydata.elements[0]["z"])), axis=1)
+    opacities = np.asarray(plydata.elements[0]["opacity"])[..., np.newaxis]
+
+    features_dc = np.zeros((xyz.shape[0], 3, 1))
+    features_dc[:, 0, 0] = np.asarray(plydata.elements[0]["f_dc_0"])
+    features_dc[:, 1, 0] = np.asarray(plydata.elements[0]["f_dc_1"])
+    features_dc[:, 2, 0] = np.asarray(plydata.elements[0]["f_dc_2"])
+
+    extra_f_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("f_rest_")]
+    extra_f_names = sorted(extra_f_names, key=lambda x: int(x.split('_')[-1]))
+    features_extra = np.zeros((xyz.shape[0], len(extra_f_names)))
+    for idx, attr_name in enumerate(extra_f_names):
+        features_extra[:, idx] = np.asarray(plydata.elements[0][attr_name])
+    features_extra = features_extra.reshape((features_extra.shape[0], 3, (model.sh_degree + 1) ** 2 - 1))
+
+    scale_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("scale_")]
+    scale_names = sorted(scale_names, key=lambda x: int(x.split('_')[-1]))
+    scales = np.zeros((xyz.shape[0], len(scale_names)))
+    for idx, attr_name in enumerate(scale_names):
+        scales[:, idx] = np.asarray(plydata.elements[0][attr_name])
+
+    rot_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("rot")]
+    rot_names = sorted(rot_names, key=lambda x: int(x.split('_')[-1]))
+    rots = np.zeros((xyz.shape[0], len(rot_names)))
+    for idx, attr_name in enumerate(rot_names):
+        rots[:, idx] = np.asarray(plydata.elements[0][attr_name])
+
+    model._xyz = torch.tensor(xyz, dtype=torch.float)
+    model._features_dc = torch.tensor(features_dc, dtype=torch.float).transpose(1, 2).contiguous()
+    model._features_rest = torch.tensor(features_extra, dtype=torch.float).transpose(1, 2).contiguous()
+    model._opacity = torch.tensor(opacities, dtype=torch.float)
+    model._scaling = torch.tensor(scales, dtype=torch.float)
+    model._rotation = torch.tensor(rots, dtype=torch.float)
+    model._covariance = model.covariance_activation(model.get_scaling, 1.0, model._rotation)
+
+
+def load_legacy(path):
+    model = GaussianModel(3)
+    legacy_from_ply(model, plyfile.PlyData.read(path))
+    return model._xyz.shape[0]
+
+
+def load_vectorized(path):
+    model = GaussianModel(3)
+    model.from_ply(plyfile.PlyData.read(path))
+    return model._xyz.shape[0]
+
+
+def load_mapped(path):
+    return load_gaussian_model(path)._xyz.shape[0]
+
+
+def load_mapped_open3d(path):
+    o3d_point_cloud, _ = load_gaussian_pc(path)
+    return len(o3d_point_cloud.points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000, 10_000_000])
+    parser.add_argument("--directory", default=None, help="Directory for the synthetic PLY files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        print(f"{'splats':>12} {'loader':>12} {'time [s]':>10} {'peak RSS [MB]':>14}")
+        for size in args.sizes:
+            path = os.path.join(directory, f"synthetic_{size}.ply")
+            write_synthetic_gaussian_ply(path, size)
+            for name, loader in (("legacy", load_legacy), ("vectorized", load_vectorized), ("mapped", load_mapped),
+                                 ("mapped+o3d", load_mapped_open3d)):
+                elapsed, peak_rss, _ = run_isolated(loader, path)
+                peak_rss = f"{peak_rss:.1f}" if peak_rss is not None else "n/a"
+                print(f"{size:>12} {name:>12} {elapsed:>10.3f} {peak_rss:>14}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measures the throughput of GaussianModel.save_ply in splats per second against the previous tuple based writer and
+checks that both produce byte-identical files.
+
+Usage: python -m benchmarks.bench_ply_saving [--sizes 1000000 5000000] [--directory DIR]
+"""
+
+import argparse
+import filecmp
+import os
+import tempfile
+
+import numpy as np
+from plyfile import PlyElement, PlyData
+
+from benchmarks.bench_utils import create_synthetic_attributes, get_gaussian_property_names, time_function
+from src.models.gaussian_model import GaussianModel
+
+
+def legacy_save_ply(model, path):
+    attributes = model.construct_attribute_matrix()
+    dtype_full = [(attribute, 'f4') for attribute in model.construct_list_of_attributes()]
+
+    elements = np.empty(attributes.shape[0], dtype=dtype_full)
+    elements[:] = list(map(tuple, attributes))
+    el = PlyElement.describe(elements, 'vertex')
+    PlyData([el]).write(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--directory", default=None, help="Directory for the written PLY files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        print(f"{'splats':>12} {'writer':>10} {'time [s]':>10} {'splats/s':>14} {'identical':>10}")
+        for size in args.sizes:
+            model = GaussianModel(3)
+            model.from_attribute_matrix(create_synthetic_attributes(size), get_gaussian_property_names())
+
+            legacy_path = os.path.join(directory, "legacy.ply")
+            bulk_path = os.path.join(directory, "bulk.ply")
+            legacy_time = time_function(legacy_save_ply, model, legacy_path, repeat=1)
+            bulk_time = time_function(model.save_ply, bulk_path, repeat=1)
+            identical = filecmp.cmp(legacy_path, bulk_path, shallow=False)
+
+            print(f"{size:>12} {'legacy':>10} {legacy_time:>10.3f} {size / legacy_time:>14,.0f} {'':>10}")
+            print(f"{size:>12} {'bulk':>10} {bulk_time:>10.3f} {size / bulk_time:>14,.0f} {str(identical):>10}")
+
+
+if __name__ == '__main__':
+    main()
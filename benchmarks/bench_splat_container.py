@@ -0,0 +1,91 @@
+"""
+Measures the chunked splat container against the PLY layout: the file sizes, the conversion times, and the time and
+the number of splats of loading the whole model, the splats of a box around a part of the scene and the splats in the
+view frustum of a camera. The partial loads only read and decompress the chunks whose bounding boxes intersect the
+region, so their time follows the share of the scene they cover instead of the size of the file.
+
+Usage: python -m benchmarks.bench_splat_container [--sizes 1000000 3000000] [--chunk-size 65536] [--box 0.2]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_utils import BenchmarkCamera, write_synthetic_gaussian_ply
+from src.utils.culling_util import SplatCuller
+from src.utils.file_loader import convert_container_to_ply, convert_ply_to_container, load_gaussian_model
+from src.utils.splat_container import SplatContainerReader
+
+
+def time_function(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def load_ply(path):
+    point_cloud = load_gaussian_model(path)
+    # The memory-mapped PLY is only read when it is touched
+    for tensor in point_cloud.get_raw_tensors():
+        if tensor is not None:
+            tensor.sum()
+    return point_cloud
+
+
+def measure(size, args):
+    with tempfile.TemporaryDirectory() as directory:
+        ply_path = os.path.join(directory, "model.ply")
+        container_path = os.path.join(directory, "model.gsc")
+        converted_path = os.path.join(directory, "converted.ply")
+        write_synthetic_gaussian_ply(ply_path, size)
+
+        _, to_container_time = time_function(lambda: convert_ply_to_container(ply_path, container_path,
+                                                                              args.chunk_size))
+        _, to_ply_time = time_function(lambda: convert_container_to_ply(container_path, converted_path))
+        ply_size, container_size = os.path.getsize(ply_path), os.path.getsize(container_path)
+        print(f"{size} splats: PLY {ply_size / 1024 ** 2:.1f} MB, container {container_size / 1024 ** 2:.1f} MB "
+              f"({container_size / ply_size:.1%}), PLY to container {to_container_time:.2f} s, "
+              f"container to PLY {to_ply_time:.2f} s")
+
+        with SplatContainerReader(container_path) as reader:
+            # A box of the given relative size in one octant of the scene, clear of the center where all of them meet
+            bounds_min, bounds_max = reader.chunk_min.min(axis=0), reader.chunk_max.max(axis=0)
+            box_min = bounds_min + (bounds_max - bounds_min) * 0.55
+            box = (box_min, box_min + (bounds_max - bounds_min) * args.box)
+            camera = BenchmarkCamera(args.fov, 640, 360)
+            planes = SplatCuller().get_frustum_planes(camera, "cpu")
+
+            rows = [("PLY", reader.chunk_count, lambda: load_ply(ply_path)),
+                    ("full", reader.chunk_count, reader.load_gaussian_model),
+                    ("box", len(reader.find_chunks(aabb=box)), lambda: reader.load_gaussian_model(aabb=box)),
+                    ("frustum", len(reader.find_chunks(planes=planes)),
+                     lambda: reader.load_gaussian_model(planes=planes))]
+
+            print(f"{'load':>10} {'chunks':>8} {'splats':>10} {'time [ms]':>10}")
+            for name, chunk_count, load in rows:
+                load_time = np.inf
+                for _ in range(args.repeat):
+                    point_cloud, elapsed = time_function(load)
+                    load_time = min(load_time, elapsed)
+                print(f"{name:>10} {chunk_count:>8} {point_cloud.get_xyz.shape[0]:>10} {load_time * 1000:>10.1f}")
+                del point_cloud
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--chunk-size", type=int, default=1 << 16)
+    parser.add_argument("--box", type=float, default=0.2, help="Size of the box relative to the scene bounds")
+    parser.add_argument("--fov", type=float, default=10.0, help="Field of view of the camera in degrees")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        measure(size, args)
+
+
+if __name__ == '__main__':
+    main()
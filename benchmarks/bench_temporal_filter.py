@@ -0,0 +1,103 @@
+"""
+Measures the frame time of TemporalFilter.apply_temporal_filter at several resolutions against the previous per pixel
+implementation, and checks that both produce identical frames. The legacy filter is only run up to --legacy-max-pixels,
+since it takes seconds per frame at higher resolutions.
+The filter is primed with an accumulated frame, so that every measured frame is blended.
+
+Usage: python -m benchmarks.bench_temporal_filter [--resolutions 1280x720 1920x1080] [--frames 10]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from PySide6.QtGui import QColor, QGuiApplication, QImage, QPixmap
+
+from src.gui.windows.visualization.fx.temporal_filter import TemporalFilter, get_image_array
+
+
+class LegacyTemporalFilter:
+    def __init__(self, decay=0.95):
+        self.decay = decay
+        self.accumulated_color = None
+
+    def apply_temporal_filter(self, new_frame: QPixmap):
+        img = new_frame.toImage()
+        output_image = img.copy()
+
+        for x in range(img.width()):
+            for y in range(img.height()):
+                current_color = QColor(img.pixel(x, y))
+                accumulated_color = QColor(self.accumulated_color.pixel(x, y))
+
+                new_r = int(current_color.red() * (1 - self.decay) + accumulated_color.red() * self.decay)
+                new_g = int(current_color.green() * (1 - self.decay) + accumulated_color.green() * self.decay)
+                new_b = int(current_color.blue() * (1 - self.decay) + accumulated_color.blue() * self.decay)
+
+                output_image.setPixel(x, y, QColor(new_r, new_g, new_b).rgba())
+
+        self.accumulated_color = output_image
+        return QPixmap.fromImage(output_image)
+
+
+def create_random_frames(width, height, count, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, size=(height, width, 4), dtype=np.uint8)
+        pixels[..., 3] = 255
+        image = QImage(pixels.data, width, height, width * 4, QImage.Format.Format_RGB32)
+        frames.append(QPixmap.fromImage(image))
+    return frames
+
+
+def get_pixels(pixmap):
+    # The array is a view of the image, which has to be kept alive until it is copied
+    image = pixmap.toImage().convertToFormat(QImage.Format.Format_RGB32)
+    return get_image_array(image).copy()
+
+
+def measure(temporal_filter, frames):
+    results = []
+    start = time.perf_counter()
+    for frame in frames:
+        results.append(temporal_filter.apply_temporal_filter(frame))
+    return (time.perf_counter() - start) / len(frames), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["640x360", "1280x720", "1920x1080", "3840x2160"])
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--legacy-max-pixels", type=int, default=640 * 360)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    print(f"{'resolution':>12} {'filter':>8} {'frame [ms]':>12} {'FPS':>10} {'identical':>10}")
+    for resolution in args.resolutions:
+        width, height = (int(value) for value in resolution.split("x"))
+        first_frame, *frames = create_random_frames(width, height, args.frames + 1)
+
+        temporal_filter = TemporalFilter()
+        temporal_filter.apply_temporal_filter(first_frame)
+        temporal_filter.frame_count = 1
+        frame_time, results = measure(temporal_filter, frames)
+        print(f"{resolution:>12} {'numpy':>8} {frame_time * 1000:>12.2f} {1 / frame_time:>10.1f} {'':>10}")
+
+        if width * height > args.legacy_max_pixels:
+            continue
+
+        legacy_filter = LegacyTemporalFilter()
+        legacy_filter.accumulated_color = first_frame.toImage()
+        legacy_frame_time, legacy_results = measure(legacy_filter, frames)
+        identical = all(np.array_equal(get_pixels(result), get_pixels(legacy_result))
+                        for result, legacy_result in zip(results, legacy_results))
+        print(f"{resolution:>12} {'legacy':>8} {legacy_frame_time * 1000:>12.2f} {1 / legacy_frame_time:>10.1f} "
+              f"{str(identical):>10}")
+
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Shared helpers for the benchmark scripts: synthetic Gaussian PLY generation, cameras, timing and peak memory
+measurement.
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+from src.models.gaussian_model import GaussianModel
+
+
+def get_gaussian_property_names(sh_degree=3):
+    property_names = ['x', 'y', 'z', 'nx', 'ny', 'nz']
+    property_names.extend('f_dc_{}'.format(i) for i in range(3))
+    property_names.extend('f_rest_{}'.format(i) for i in range(3 * (sh_degree + 1) ** 2 - 3))
+    property_names.append('opacity')
+    property_names.extend('scale_{}'.format(i) for i in range(3))
+    property_names.extend('rot_{}'.format(i) for i in range(4))
+    return property_names
+
+
+def create_synthetic_attributes(count, sh_degree=3, seed=0):
+    """
+    Creates an (N, P) float32 matrix with plausible values for every Gaussian PLY property.
+    """
+    rng = np.random.default_rng(seed)
+    property_names = get_gaussian_property_names(sh_degree)
+    attributes = rng.standard_normal((count, len(property_names)), dtype=np.float32) * 0.1
+
+    attributes[:, 0:3] *= 100.0
+    attributes[:, 3:6] = 0.0
+    scale_start = property_names.index('scale_0')
+    attributes[:, scale_start:scale_start + 3] -= 4.0
+    attributes[:, scale_start + 3] += 1.0
+    return attributes
+
+
+def create_synthetic_gaussian(count, device="cpu", transparent_fraction=0.0):
+    """
+    Creates a GaussianModel from create_synthetic_attributes. The opacity of the first transparent_fraction of the
+    splats is set so low that they are invisible.
+    """
+    attributes = create_synthetic_attributes(count)
+    property_names = get_gaussian_property_names()
+    attributes[:int(count * transparent_fraction), property_names.index('opacity')] = -10.0
+
+    gaussian = GaussianModel(3)
+    gaussian.from_attribute_matrix(attributes, property_names)
+    gaussian.move_to_device(device)
+    return gaussian
+
+
+def write_synthetic_gaussian_ply(path, count, sh_degree=3, seed=0, chunk_size=1_000_000):
+    """
+    Writes a binary little endian Gaussian PLY with random contents. The body is streamed in chunks, so files larger
+    than the available memory can be created as well.
+    """
+    property_names = get_gaussian_property_names(sh_degree)
+    header = ["ply", "format binary_little_endian 1.0", "element vertex {}".format(count)]
+    header.extend("property float {}".format(name) for name in property_names)
+    header.append("end_header")
+
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        for start in range(0, count, chunk_size):
+            chunk = create_synthetic_attributes(min(chunk_size, count - start), sh_degree, seed + start)
+            f.write(chunk.astype('<f4', copy=False).tobytes())
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process in megabytes, or None if it cannot be queried.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS reports bytes
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().peak_wset / 1024 ** 2
+    except (ImportError, AttributeError):
+        return None
+
+
+def _run_and_measure(func, args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    return elapsed, peak_rss_mb(), result
+
+
+def run_isolated(func, *args):
+    """
+    Runs func in a fresh process, so that the peak memory is not polluted by earlier cases.
+    Returns the elapsed time in seconds, the peak RSS in megabytes and the (picklable) result of the function.
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_run_and_measure, (func, args))
+
+
+def time_function(func, *args, repeat=3):
+    """
+    Returns the best wall time of repeat calls in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class BenchmarkCamera:
+    """
+    Pinhole camera at (0, 0, -distance) looking at the origin along +z, with the attributes used by the culling and
+    the rasterization.
+    """
+
+    def __init__(self, fov, width=1280, height=720, distance=40.0):
+        focal = width / 2 / math.tan(math.radians(fov) / 2)
+        self.width = width
+        self.height = height
+        self.intrinsics = torch.tensor([[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]],
+                                       dtype=torch.float32)[None]
+        self.viewmat = torch.eye(4)[None]
+        self.viewmat[0, 2, 3] = distance
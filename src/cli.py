@@ -0,0 +1,288 @@
+"""
+Headless batch registration of point cloud pairs.
+
+Usage: python -m src.cli manifest.json [--workers N] [--output-dir DIR]
+
+The manifest is a JSON file with a list of jobs and optional default settings, which are shared by every job:
+{
+    "defaults": {"method": "multiscale", "registration_type": "ICP_Point_To_Plane",
+                 "voxel_values": [0.5, 0.1, 0.05], "iter_values": [50, 30, 10]},
+    "jobs": [
+        {"name": "scene_a", "source": "inputs/a_first.ply", "target": "inputs/a_second.ply"},
+        {"name": "scene_b", "source": "inputs/b_first.ply", "target": "inputs/b_second.ply",
+         "method": "icp", "max_correspondence": 0.1, "initial_transformation": [[1, 0, 0, 0], ...]}
+    ]
+}
+
+The supported methods are "icp", "multiscale" (voxel based), "ransac" and "fgr". Every other key overrides the
+default of the corresponding argument of the registration function, unknown keys are rejected. Enum arguments are
+given by their member name.
+The sources and targets can be Gaussian, sparse or any Open3D supported point clouds.
+For every job a JSON file with the registration data is written to the output directory, named after the job. The
+names may only contain letters, digits, dots, dashes and underscores, and must be unique regardless of the case.
+
+The module does not depend on PySide6, so that it can be used on headless nodes.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.models.registration_data import LocalRegistrationData, MultiScaleRegistrationData, GlobalRegistrationData
+from src.utils.file_loader import COMPACT_GAUSSIAN_EXTENSION, SPLAT_CONTAINER_EXTENSION, load_gaussian_pc, \
+    load_sparse_pc, load_o3d_pc
+from src.utils.global_registration_util import do_ransac_registration, do_fgr_registration, RANSACEstimationMethod
+from src.utils.local_registration_util import do_icp_registration, do_multiscale_voxel_registration, \
+    LocalRegistrationType, KernelLossFunctionType
+
+ICP_DEFAULTS = {
+    "registration_type": "ICP_Point_To_Point",
+    "max_correspondence": 5.0,
+    "relative_fitness": 1e-6,
+    "relative_rmse": 1e-6,
+    "max_iteration": 30,
+    "rejection_type": "Loss_None",
+    "k_value": 0.0,
+}
+
+MULTISCALE_DEFAULTS = {
+    "registration_type": "ICP_Point_To_Point",
+    "relative_fitness": 1e-6,
+    "relative_rmse": 1e-6,
+    "voxel_values": [0.5, 0.1, 0.05],
+    "iter_values": [50, 30, 10],
+    "rejection_type": "Loss_None",
+    "k_value": 0.0,
+}
+
+RANSAC_DEFAULTS = {
+    "voxel_size": 0.05,
+    "mutual_filter": True,
+    "max_correspondence": 0.075,
+    "estimation_method": "TransformationEstimationPointToPoint",
+    "ransac_n": 3,
+    "max_iteration": 100000,
+    "confidence": 0.999,
+}
+
+FGR_DEFAULTS = {
+    "voxel_size": 0.05,
+    "division_factor": 1.4,
+    "use_absolute_scale": False,
+    "decrease_mu": False,
+    "maximum_correspondence": 0.025,
+    "max_iterations": 64,
+    "tuple_scale": 0.95,
+    "max_tuple_count": 1000,
+    "tuple_test": True,
+}
+
+
+def load_point_cloud(pc_path):
+    """
+    Loads any of the supported point cloud types as an Open3D point cloud.
+    """
+    if not os.path.isfile(pc_path):
+        raise FileNotFoundError(f"The point cloud \"{pc_path}\" does not exist.")
+
+    point_cloud = None
+    extension = os.path.splitext(pc_path)[1].lower()
+    if extension in (".ply", COMPACT_GAUSSIAN_EXTENSION, SPLAT_CONTAINER_EXTENSION):
+        point_cloud, _ = load_gaussian_pc(pc_path)
+        if point_cloud is None and extension == ".ply":
+            point_cloud = load_sparse_pc(pc_path)
+    if point_cloud is None:
+        point_cloud = load_o3d_pc(pc_path)
+    if point_cloud is None or not point_cloud.has_points():
+        raise ValueError(f"The point cloud \"{pc_path}\" could not be loaded.")
+
+    return point_cloud
+
+
+def get_settings(job, defaults):
+    return {key: job.get(key, value) for key, value in defaults.items()}
+
+
+def register_icp(pc_first, pc_second, init_trans, job):
+    settings = get_settings(job, ICP_DEFAULTS)
+    registration_type = LocalRegistrationType[settings["registration_type"]]
+    results = do_icp_registration(pc_first, pc_second, init_trans, registration_type,
+                                  settings["max_correspondence"], settings["relative_fitness"],
+                                  settings["relative_rmse"], settings["max_iteration"],
+                                  KernelLossFunctionType[settings["rejection_type"]], settings["k_value"])
+
+    return LocalRegistrationData(registration_type=registration_type.instance_name,
+                                 initial_transformation=init_trans,
+                                 relative_fitness=settings["relative_fitness"],
+                                 relative_rmse=settings["relative_rmse"],
+                                 result_fitness=results.fitness, result_inlier_rmse=results.inlier_rmse,
+                                 result_transformation=results.transformation,
+                                 max_correspondence=settings["max_correspondence"],
+                                 max_iteration=settings["max_iteration"])
+
+
+def register_multiscale(pc_first, pc_second, init_trans, job):
+    settings = get_settings(job, MULTISCALE_DEFAULTS)
+    if len(settings["voxel_values"]) != len(settings["iter_values"]):
+        raise ValueError("The number of iteration and voxel values provided do not match.")
+
+    registration_type = LocalRegistrationType[settings["registration_type"]]
+    results = do_multiscale_voxel_registration(pc_first, pc_second, init_trans, registration_type,
+                                               settings["relative_fitness"], settings["relative_rmse"],
+                                               settings["voxel_values"], settings["iter_values"],
+                                               KernelLossFunctionType[settings["rejection_type"]],
+                                               settings["k_value"])
+
+    return MultiScaleRegistrationData(registration_type=registration_type.instance_name,
+                                      initial_transformation=init_trans,
+                                      relative_fitness=settings["relative_fitness"],
+                                      relative_rmse=settings["relative_rmse"],
+                                      result_fitness=results.fitness, result_inlier_rmse=results.inlier_rmse,
+                                      result_transformation=results.transformation,
+                                      voxel_values=settings["voxel_values"],
+                                      iteration_values=settings["iter_values"],
+                                      used_sparse_clouds=False, used_gaussian_mixtures=False)
+
+
+def register_ransac(pc_first, pc_second, init_trans, job):
+    settings = get_settings(job, RANSAC_DEFAULTS)
+    pc_first.transform(init_trans)
+    results = do_ransac_registration(pc_first, pc_second, settings["voxel_size"], settings["mutual_filter"],
+                                     settings["max_correspondence"],
+                                     RANSACEstimationMethod[settings["estimation_method"]],
+                                     settings["ransac_n"], [], settings["max_iteration"], settings["confidence"])
+
+    return GlobalRegistrationData(registration_type="RANSAC", initial_transformation=init_trans,
+                                  voxel_size=settings["voxel_size"], result_fitness=results.fitness,
+                                  result_inlier_rmse=results.inlier_rmse,
+                                  result_transformation=np.dot(results.transformation, init_trans))
+
+
+def register_fgr(pc_first, pc_second, init_trans, job):
+    settings = get_settings(job, FGR_DEFAULTS)
+    pc_first.transform(init_trans)
+    results = do_fgr_registration(pc_first, pc_second, settings["voxel_size"], settings["division_factor"],
+                                  settings["use_absolute_scale"], settings["decrease_mu"],
+                                  settings["maximum_correspondence"], settings["max_iterations"],
+                                  settings["tuple_scale"], settings["max_tuple_count"], settings["tuple_test"])
+
+    return GlobalRegistrationData(registration_type="FGR", initial_transformation=init_trans,
+                                  voxel_size=settings["voxel_size"], result_fitness=results.fitness,
+                                  result_inlier_rmse=results.inlier_rmse,
+                                  result_transformation=np.dot(results.transformation, init_trans))
+
+
+# The job names are used as file names, so they must be valid on every platform and stay in the output directory
+JOB_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+WINDOWS_RESERVED_NAMES = {"CON", "PRN", "AUX", "NUL", *(f"COM{i}" for i in range(1, 10)),
+                          *(f"LPT{i}" for i in range(1, 10))}
+
+JOB_KEYS = {"name", "source", "target", "method", "initial_transformation"}.union(
+    ICP_DEFAULTS, MULTISCALE_DEFAULTS, RANSAC_DEFAULTS, FGR_DEFAULTS)
+
+REGISTRATION_METHODS = {
+    "icp": register_icp,
+    "multiscale": register_multiscale,
+    "ransac": register_ransac,
+    "fgr": register_fgr,
+}
+
+
+def run_job(job, output_path):
+    """
+    Registers a single pair of point clouds and writes the results to output_path.
+    Runs in a worker process, so every error is written to the output instead of being raised.
+    """
+    start = time.perf_counter()
+    output = {"name": job["name"], "source": job["source"], "target": job["target"], "method": job["method"]}
+    try:
+        if job["method"] not in REGISTRATION_METHODS:
+            raise ValueError(f"Unknown registration method \"{job['method']}\".")
+
+        init_trans = np.asarray(job.get("initial_transformation", np.eye(4)), dtype=np.float64)
+        pc_first = load_point_cloud(job["source"])
+        pc_second = load_point_cloud(job["target"])
+
+        registration_data = REGISTRATION_METHODS[job["method"]](pc_first, pc_second, init_trans, job)
+        output["registration_data"] = registration_data.__dict__
+        output["error"] = None
+    except Exception as e:
+        output["registration_data"] = None
+        output["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+
+    output["elapsed_seconds"] = time.perf_counter() - start
+    with open(output_path, "w") as f:
+        json.dump(output, f, default=lambda x: x.tolist(), indent=2)
+
+    return output
+
+
+def check_job_name(name):
+    """
+    Raises ValueError if the job name cannot be used as the name of its output file.
+    """
+    if (not isinstance(name, str) or not JOB_NAME_PATTERN.fullmatch(name) or name.endswith(".")
+            or name.split(".")[0].upper() in WINDOWS_RESERVED_NAMES):
+        raise ValueError(f"The job name {json.dumps(name)} is not a valid file name. Use letters, digits, dots, "
+                         f"dashes and underscores.")
+
+
+def load_manifest(manifest_path):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    defaults = manifest.get("defaults", {})
+    jobs = []
+    for index, job in enumerate(manifest["jobs"]):
+        job = {**defaults, **job}
+        job.setdefault("name", f"job_{index:04d}")
+        job.setdefault("method", "icp")
+        unknown_keys = set(job) - JOB_KEYS
+        if unknown_keys:
+            raise ValueError(f"The job \"{job['name']}\" has unknown settings: {', '.join(sorted(unknown_keys))}")
+        if "source" not in job or "target" not in job:
+            raise ValueError(f"The job \"{job['name']}\" has no source or target point cloud.")
+        check_job_name(job["name"])
+        jobs.append(job)
+
+    # Windows and macOS file systems do not distinguish the case of the file names
+    names = [job["name"].lower() for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("The names of the jobs must be unique.")
+
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="JSON file that lists the jobs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--output-dir", default="output", help="Directory of the per job JSON files")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failed_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(run_job, job, os.path.join(args.output_dir, f"{job['name']}.json"))
+                   for job in jobs]
+        for finished_count, future in enumerate(as_completed(futures), start=1):
+            output = future.result()
+            status = "failed: " + output["error"] if output["error"] else "done"
+            failed_count += output["error"] is not None
+            print(f"[{finished_count}/{len(jobs)}] {output['name']} {status} ({output['elapsed_seconds']:.1f} s)")
+
+    return 1 if failed_count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
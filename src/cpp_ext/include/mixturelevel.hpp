@@ -3,12 +3,16 @@
 #include <vector>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 #include "aliases.hpp"
 
 namespace hem
 {
 class FeatureVector;
 
+// Contiguous float32 arrays. Other dtypes or layouts are converted by pybind11 when the function is called.
+typedef pybind11::array_t<float, pybind11::array::c_style | pybind11::array::forcecast> FloatArray;
+
 class MixtureLevel
 {
 public:
@@ -23,6 +27,15 @@ public:
 
     static pybind11::tuple MixtureLevel::CreatePythonLists(MixtureLevel &mixtureLevel);
 
+    static MixtureLevel CreateMixtureLevelFromArrays(
+    const FloatArray& xyz,
+    const FloatArray& colors,
+    const FloatArray& opacities,
+    const FloatArray& covariance,
+    const FloatArray& features);
+
+    static pybind11::tuple CreateArrays(MixtureLevel &mixtureLevel);
+
 public:
 	PointSet pointSet;
 	ColorSet colorSet;
@@ -50,10 +50,14 @@ PYBIND11_MODULE(mixture_bind, m) {
         .def_readwrite("covarianceSet", &hem::MixtureLevel::covarianceSet)
         .def_readwrite("features", &hem::MixtureLevel::features)
         .def_static("CreateMixtureLevel", &hem::MixtureLevel::CreateMixtureLevel, "Create a MixtureLevel from Python lists.")
-        .def_static("CreatePythonLists", &hem::MixtureLevel::CreatePythonLists, "Create python lists from MixtureLevel.");
+        .def_static("CreatePythonLists", &hem::MixtureLevel::CreatePythonLists, "Create python lists from MixtureLevel.")
+        .def_static("CreateMixtureLevelFromArrays", &hem::MixtureLevel::CreateMixtureLevelFromArrays,
+                    "Create a MixtureLevel from contiguous float32 arrays.")
+        .def_static("CreateArrays", &hem::MixtureLevel::CreateArrays, "Create float32 NumPy arrays from MixtureLevel.");
 
     py::class_<hem::MixtureCreator>(m, "MixtureCreator")
-        .def_static("CreateMixture", &hem::MixtureCreator::CreateMixture, "The function creates gaussian mixtures from the point cloud");
+        .def_static("CreateMixture", &hem::MixtureCreator::CreateMixture, "The function creates gaussian mixtures from the point cloud",
+                    py::call_guard<py::gil_scoped_release>());
 
     py::implicitly_convertible<py::list, hem::vec3>();
     py::implicitly_convertible<py::list, hem::smat3>();
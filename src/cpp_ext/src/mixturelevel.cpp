@@ -2,6 +2,11 @@
 #include "featurevector.hpp"
 #include "vec.hpp"
 
+#include <algorithm>
+#include <cstring>
+#include <stdexcept>
+#include <string>
+
 namespace py = pybind11;
 
 namespace hem
@@ -53,4 +58,77 @@ namespace hem
 
         return py::make_tuple(xyz, colors, opacities, covariance, features);
     }
+
+    static void CheckArrayShape(const FloatArray& array, py::ssize_t rowCount, py::ssize_t columnCount, const char* name)
+    {
+        bool isValid = array.ndim() == 2 ? array.shape(0) == rowCount && array.shape(1) == columnCount
+                                         : array.ndim() == 1 && columnCount == 1 && array.shape(0) == rowCount;
+        if (!isValid) {
+            throw std::invalid_argument(std::string("Array \"") + name + "\" has an invalid shape.");
+        }
+    }
+
+    MixtureLevel MixtureLevel::CreateMixtureLevelFromArrays(
+    const FloatArray& xyz,
+    const FloatArray& colors,
+    const FloatArray& opacities,
+    const FloatArray& covariance,
+    const FloatArray& features)
+    {
+        static_assert(sizeof(vec3) == 3 * sizeof(float), "vec3 must be tightly packed");
+        static_assert(sizeof(smat3) == 6 * sizeof(float), "smat3 must be tightly packed");
+
+        py::ssize_t pointCount = xyz.ndim() == 2 ? xyz.shape(0) : 0;
+        py::ssize_t featureSize = features.ndim() == 2 ? features.shape(1) : 0;
+        CheckArrayShape(xyz, pointCount, 3, "xyz");
+        CheckArrayShape(colors, pointCount, 3, "colors");
+        CheckArrayShape(opacities, pointCount, 1, "opacities");
+        CheckArrayShape(covariance, pointCount, 6, "covariance");
+        CheckArrayShape(features, pointCount, featureSize, "features");
+
+        hem::MixtureLevel mixtureLevel;
+        mixtureLevel.pointSet.resize(pointCount);
+        mixtureLevel.colorSet.resize(pointCount);
+        mixtureLevel.covarianceSet.resize(pointCount);
+        mixtureLevel.opacities.assign(opacities.data(), opacities.data() + pointCount);
+        mixtureLevel.features.reserve(pointCount);
+
+        // The vector types have the same memory layout as the rows of the arrays, so they are copied in bulk
+        std::memcpy(mixtureLevel.pointSet.data(), xyz.data(), pointCount * sizeof(vec3));
+        std::memcpy(mixtureLevel.colorSet.data(), colors.data(), pointCount * sizeof(vec3));
+        std::memcpy(mixtureLevel.covarianceSet.data(), covariance.data(), pointCount * sizeof(smat3));
+
+        const float* featureData = features.data();
+        for (py::ssize_t i = 0; i < pointCount; ++i) {
+            const float* row = featureData + i * featureSize;
+            mixtureLevel.features.emplace_back(std::vector<float>(row, row + featureSize));
+        }
+
+        return mixtureLevel;
+    }
+
+    pybind11::tuple MixtureLevel::CreateArrays(MixtureLevel &mixtureLevel)
+    {
+        py::ssize_t pointCount = mixtureLevel.pointSet.size();
+        py::ssize_t featureSize = mixtureLevel.features.empty() ? 0 : mixtureLevel.features[0].GetSize();
+
+        py::array_t<float> xyz({pointCount, (py::ssize_t)3});
+        py::array_t<float> colors({pointCount, (py::ssize_t)3});
+        py::array_t<float> opacities(pointCount);
+        py::array_t<float> covariance({pointCount, (py::ssize_t)6});
+        py::array_t<float> features({pointCount, featureSize});
+
+        std::memcpy(xyz.mutable_data(), mixtureLevel.pointSet.data(), pointCount * sizeof(vec3));
+        std::memcpy(colors.mutable_data(), mixtureLevel.colorSet.data(), pointCount * sizeof(vec3));
+        std::memcpy(opacities.mutable_data(), mixtureLevel.opacities.data(), pointCount * sizeof(float));
+        std::memcpy(covariance.mutable_data(), mixtureLevel.covarianceSet.data(), pointCount * sizeof(smat3));
+
+        float* featureData = features.mutable_data();
+        for (py::ssize_t i = 0; i < pointCount; ++i) {
+            const std::vector<float>& feature = mixtureLevel.features[i].GetVector();
+            std::copy(feature.begin(), feature.end(), featureData + i * featureSize);
+        }
+
+        return py::make_tuple(xyz, colors, opacities, covariance, features);
+    }
 }
\ No newline at end of file
@@ -16,12 +16,14 @@ from src.utils.general_utils import convert_to_camera_transform
 
 class EvaluationTab(QWidget):
     signal_camera_change = Signal(np.ndarray)
-    signal_evaluate_registration = Signal(list, str, str, np.ndarray, bool)
+    signal_evaluate_registration = Signal(list, str, str, str, np.ndarray, bool, int, int, int, bool)
 
     def __init__(self):
         super().__init__()
         self.error_message = None
         self.cameras_list = []
+        # Path of the JSON file the cameras were loaded from
+        self.cameras_path = ""
         layout = QVBoxLayout(self)
 
         label_title = QLabel("Evaluation")
@@ -74,12 +76,32 @@ class EvaluationTab(QWidget):
                                    file_type=QFileDialog.FileMode.AnyFile)
         self.render_color = ColorPicker(np.zeros(3))
         self.checkbox_gpu = QCheckBox()
+        self.spinbox_batch_size = QSpinBox()
+        self.spinbox_batch_size.setFixedWidth(70)
+        self.spinbox_batch_size.setRange(1, 64)
+        self.spinbox_batch_size.setValue(8)
+        self.spinbox_prefetch_depth = QSpinBox()
+        self.spinbox_prefetch_depth.setFixedWidth(70)
+        self.spinbox_prefetch_depth.setRange(1, 64)
+        self.spinbox_prefetch_depth.setValue(4)
+        self.spinbox_prefetch_workers = QSpinBox()
+        self.spinbox_prefetch_workers.setFixedWidth(70)
+        self.spinbox_prefetch_workers.setRange(1, 16)
+        self.spinbox_prefetch_workers.setValue(2)
+        self.checkbox_resume = QCheckBox()
+        self.checkbox_resume.setToolTip("Skip the cameras that were already evaluated with the same point clouds, "
+                                        "images, cameras and transformation.\n"
+                                        "The metrics of every camera are stored next to the log file.")
         self.button_evaluate = CustomPushButton("Evaluate", 100)
 
         evaluation_layout.addRow("Images folder:", self.fs_images)
         evaluation_layout.addRow("Log file:", self.fs_log)
         evaluation_layout.addRow("Background color:", self.render_color)
         evaluation_layout.addRow("Use GPU for evaluation:", self.checkbox_gpu)
+        evaluation_layout.addRow("Batch size:", self.spinbox_batch_size)
+        evaluation_layout.addRow("Prefetched images:", self.spinbox_prefetch_depth)
+        evaluation_layout.addRow("Image loader threads:", self.spinbox_prefetch_workers)
+        evaluation_layout.addRow("Resume evaluation:", self.checkbox_resume)
         evaluation_layout.addRow(self.button_evaluate)
 
         layout.addWidget(label_title)
@@ -92,6 +114,7 @@ class EvaluationTab(QWidget):
 
     def load_cameras_clicked(self):
         self.cameras_list.clear()
+        self.cameras_path = ""
         self.spinbox.setEnabled(False)
 
         cameras_path = self.fs_cameras.file_path
@@ -117,6 +140,7 @@ class EvaluationTab(QWidget):
             camera = Camera(R, T, fx, fy, image_name, width, height)
             self.cameras_list.append(camera)
 
+        self.cameras_path = cameras_path
         self.spinbox.setEnabled(True)
         self.spinbox.setRange(1, len(self.cameras_list))
         self.spinbox.setValue(0)
@@ -145,7 +169,12 @@ class EvaluationTab(QWidget):
 
         color = np.asarray(self.render_color.color)
         use_gpu = self.checkbox_gpu.isChecked()
-        self.signal_evaluate_registration.emit(self.cameras_list, image_path, log_file, color, use_gpu)
+        batch_size = self.spinbox_batch_size.value()
+        prefetch_depth = self.spinbox_prefetch_depth.value()
+        prefetch_workers = self.spinbox_prefetch_workers.value()
+        resume = self.checkbox_resume.isChecked()
+        self.signal_evaluate_registration.emit(self.cameras_list, self.cameras_path, image_path, log_file, color,
+                                               use_gpu, batch_size, prefetch_depth, prefetch_workers, resume)
 
     def creat_error_box(self, message):
         self.error_message = QErrorMessage()
@@ -8,7 +8,7 @@ from src.gui.widgets.file_selector_widget import FileSelector
 
 class InputTab(QWidget):
     signal_load_sparse = Signal(str, str)
-    signal_load_gaussian = Signal(str, str, bool)
+    signal_load_gaussian = Signal(str, str, bool, bool, bool)
     signal_load_cached = Signal(str, str)
 
     def __init__(self):
@@ -49,10 +49,18 @@ class InputTab(QWidget):
         self.fs_pc2 = FileSelector()
         bt_gaussian = CustomPushButton("Import gaussian point clouds", 90)
         checkbox_cache = QCheckBox()
+        checkbox_compact = QCheckBox()
+        checkbox_compact.setToolTip("Holds the point clouds with half precision spherical harmonics and quantized "
+                                    "opacities, colors and rotations, which takes about half of the memory.")
+        checkbox_morton_order = QCheckBox()
+        checkbox_morton_order.setToolTip("Sorts the splats so that splats that are close in space are also close in "
+                                         "memory, which speeds up the registration and the mixture building.")
 
         layout_input_form.addRow("First point cloud:", self.fs_pc1)
         layout_input_form.addRow("Second point cloud:", self.fs_pc2)
         layout_input_form.addRow("Save converted point clouds:", checkbox_cache)
+        layout_input_form.addRow("Compact storage:", checkbox_compact)
+        layout_input_form.addRow("Spatial sort:", checkbox_morton_order)
         layout_input_form.addRow(bt_gaussian)
 
         layout_main.addWidget(label_io)
@@ -67,4 +75,6 @@ class InputTab(QWidget):
                                                                           self.fs_cache2.file_path))
         bt_gaussian.connect_to_clicked(lambda: self.signal_load_gaussian.emit(self.fs_pc1.file_path,
                                                                               self.fs_pc2.file_path,
-                                                                              checkbox_cache.isChecked()))
+                                                                              checkbox_cache.isChecked(),
+                                                                              checkbox_compact.isChecked(),
+                                                                              checkbox_morton_order.isChecked()))
@@ -2,7 +2,7 @@ import numpy as np
 from PySide6 import QtCore
 from PySide6.QtGui import QDoubleValidator
 from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QFormLayout, QGroupBox, QPushButton, QSizePolicy, \
-    QStyle, QHBoxLayout, QStackedWidget, QErrorMessage
+    QStyle, QHBoxLayout, QStackedWidget, QErrorMessage, QSpinBox, QCheckBox
 
 from gui.widgets.animated_toggle_widget import AnimatedToggle
 from src.gui.widgets.color_picker_widget import ColorPicker
@@ -22,7 +22,7 @@ class VisualizerTab(QWidget):
     signal_change_vis_settings_o3d = QtCore.Signal(CameraView,
                                                    object, object)
 
-    signal_change_vis_settings_3dgs = QtCore.Signal(CameraView, float, float, float, object)
+    signal_change_vis_settings_3dgs = QtCore.Signal(CameraView, float, float, float, object, int, bool, int)
 
     signal_change_type = QtCore.Signal(int)
     signal_get_current_view = QtCore.Signal()
@@ -103,7 +103,22 @@ class VisualizerTab(QWidget):
         layout_3dgs_controls.addRow("Translation speed:", self.translation_speed_widget)
         layout_3dgs_controls.addRow("Rotation speed:", self.rotation_speed_widget)
         layout_3dgs_controls.addRow("Roll speed:", self.roll_speed_widget)
+        self.refinement_frames_widget = QSpinBox()
+        self.refinement_frames_widget.setFixedWidth(60)
+        self.refinement_frames_widget.setRange(0, 30)
+        self.refinement_frames_widget.setToolTip("Number of anti-aliased frames rendered after the view stopped "
+                                                 "changing")
+        self.checkbox_frame_stats = QCheckBox()
+        self.lod_frame_budget_widget = QSpinBox()
+        self.lod_frame_budget_widget.setFixedWidth(60)
+        self.lod_frame_budget_widget.setRange(0, 1000)
+        self.lod_frame_budget_widget.setToolTip("Frame time budget in milliseconds while the camera moves. Coarser "
+                                                "Gaussian mixture levels are rendered when the point clouds exceed "
+                                                "it (0 disables)")
         layout_3dgs_controls.addRow("Background color:", self.background_color)
+        layout_3dgs_controls.addRow("Refinement frames:", self.refinement_frames_widget)
+        layout_3dgs_controls.addRow("Show frame time:", self.checkbox_frame_stats)
+        layout_3dgs_controls.addRow("LOD frame budget (ms):", self.lod_frame_budget_widget)
 
         self.stack_widget.addWidget(groupbox_3dgs_controls)
 
@@ -151,8 +166,12 @@ class VisualizerTab(QWidget):
         rotation_speed = float(self.rotation_speed_widget.text())
         translate_speed = float(self.translation_speed_widget.text())
         background_color = np.asarray(self.background_color.color)
+        refinement_frames = self.refinement_frames_widget.value()
+        show_frame_stats = self.checkbox_frame_stats.isChecked()
+        lod_frame_budget = self.lod_frame_budget_widget.value()
         self.signal_change_vis_settings_3dgs.emit(self.get_current_transformations(),
-                                                  translate_speed, rotation_speed, roll_speed, background_color)
+                                                  translate_speed, rotation_speed, roll_speed, background_color,
+                                                  refinement_frames, show_frame_stats, lod_frame_budget)
 
     def get_current_view(self):
         self.signal_get_current_view.emit()
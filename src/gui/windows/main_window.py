@@ -30,6 +30,7 @@ from src.gui.workers.qt_pc_loaders import PointCloudSaver, PointCloudLoaderGauss
 from src.gui.workers.qt_ransac_registrator import RANSACRegistrator
 from src.gui.workers.qt_rasterizer import RasterizerWorker
 from src.models.camera import Camera
+from src.utils.evaluation_utils import get_evaluation_inputs
 from src.utils.graphics_utils import get_focal_from_intrinsics
 
 
@@ -51,6 +52,8 @@ class RegistrationMainWindow(QMainWindow):
         self.pc_open3d_list_second = []
 
         self.current_index = 0
+        # Paths of the Gaussian point clouds that are loaded, which identify the inputs of an evaluation
+        self.gaussian_paths = (None, None)
 
         # Dataclass that stores the results and parameters of the last local registration
         self.local_registration_data = None
@@ -181,10 +184,13 @@ class RegistrationMainWindow(QMainWindow):
         thread.start()
         progress_dialog.exec()
 
-    def handle_gaussian_load(self, gaussian_path_first, gaussian_path_second, save_o3d_pc):
+    def handle_gaussian_load(self, gaussian_path_first, gaussian_path_second, save_o3d_pc, compact, morton_order):
         progress_dialog = ProgressDialogFactory.get_progress_dialog("Loading", "Loading point clouds...")
-        worker = PointCloudLoaderGaussian(gaussian_path_first, gaussian_path_second)
-        thread = move_worker_to_thread(self, worker, lambda result: self.handle_result_gaussian(result, save_o3d_pc),
+        worker = PointCloudLoaderGaussian(gaussian_path_first, gaussian_path_second, compact, morton_order)
+        thread = move_worker_to_thread(self, worker,
+                                       lambda result: self.handle_result_gaussian(result, save_o3d_pc,
+                                                                                  (gaussian_path_first,
+                                                                                   gaussian_path_second)),
                                        progress_handler=progress_dialog.setValue)
         thread.start()
         progress_dialog.exec()
@@ -201,11 +207,12 @@ class RegistrationMainWindow(QMainWindow):
         self.transformation_picker.reset_transformation()
         self.handle_point_cloud_loading(sparse_result.point_cloud_first, sparse_result.point_cloud_second)
 
-    def handle_result_gaussian(self, gaussian_result, save_o3d_point_clouds):
+    def handle_result_gaussian(self, gaussian_result, save_o3d_point_clouds, gaussian_paths):
         self.transformation_picker.reset_transformation()
         self.handle_point_cloud_loading(gaussian_result.o3d_point_cloud_first, gaussian_result.o3d_point_cloud_second,
                                         gaussian_result.gaussian_point_cloud_first,
                                         gaussian_result.gaussian_point_cloud_second)
+        self.gaussian_paths = gaussian_paths
 
         if save_o3d_point_clouds:
             progress_dialog = ProgressDialogFactory.get_progress_dialog("Loading", "Saving open3D point clouds...")
@@ -225,6 +232,7 @@ class RegistrationMainWindow(QMainWindow):
             return
 
         self.current_index = 0
+        self.gaussian_paths = (None, None)
 
         self.hem_widget.set_slider_range(0)
         self.hem_widget.set_slider_enabled(False)
@@ -247,12 +255,16 @@ class RegistrationMainWindow(QMainWindow):
         self.visualizer_window.update_visualizer_settings_o3d(camera_view.zoom, camera_view.front, camera_view.lookat,
                                                               camera_view.up)
 
-    def change_visualizer_settings_3dgs(self, camera_view, translate_speed, rotation_speed, roll_speed, background_color):
+    def change_visualizer_settings_3dgs(self, camera_view, translate_speed, rotation_speed, roll_speed, background_color,
+                                        refinement_frames, show_frame_stats, lod_frame_budget):
         self.visualizer_window.update_transform(self.transformation_picker.transformation_matrix, None, None)
         self.visualizer_window.vis_3dgs.translate_speed = translate_speed
         self.visualizer_window.vis_3dgs.rotation_speed = rotation_speed
         self.visualizer_window.vis_3dgs.roll_speed = roll_speed
         self.visualizer_window.vis_3dgs.background_color = background_color
+        self.visualizer_window.vis_3dgs.set_idle_refinement_frames(refinement_frames)
+        self.visualizer_window.vis_3dgs.set_show_frame_stats(show_frame_stats)
+        self.visualizer_window.vis_3dgs.set_lod_frame_budget(lod_frame_budget)
         self.visualizer_window.update_visualizer_settings_3dgs(camera_view.zoom, camera_view.front, camera_view.lookat,
                                                                camera_view.up)
 
@@ -423,7 +435,8 @@ class RegistrationMainWindow(QMainWindow):
         self.raster_window.setWindowModality(Qt.WindowModality.WindowModal)
         self.raster_window.show()
 
-    def evaluate_registration(self, camera_list, image_path, log_path, color, use_gpu):
+    def evaluate_registration(self, camera_list, cameras_path, image_path, log_path, color, use_gpu, batch_size,
+                              prefetch_depth, prefetch_workers, resume):
         pc1 = self.pc_gaussian_list_first[self.current_index]
         pc2 = self.pc_gaussian_list_second[self.current_index]
 
@@ -436,9 +449,11 @@ class RegistrationMainWindow(QMainWindow):
             return
 
         progress_dialog = ProgressDialogFactory.get_progress_dialog("Loading", "Evaluating registration...")
+        inputs = get_evaluation_inputs(self.gaussian_paths, self.current_index,
+                                       (pc1.get_xyz.shape[0], pc2.get_xyz.shape[0]), image_path, cameras_path)
         worker = RegistrationEvaluator(pc1, pc2, self.transformation_picker.transformation_matrix,
                                        camera_list, image_path, log_path, color, self.local_registration_data,
-                                       use_gpu)
+                                       use_gpu, batch_size, prefetch_depth, prefetch_workers, resume, inputs)
         progress_dialog.canceled.connect(worker.cancel_evaluation)
         thread = move_worker_to_thread(self, worker, self.handle_evaluation_result,
                                        progress_handler=progress_dialog.setValue)
@@ -495,6 +510,7 @@ class RegistrationMainWindow(QMainWindow):
         self.hem_widget.set_slider_range(len(self.pc_gaussian_list_first) - 1)
         self.hem_widget.set_slider_enabled(True)
         self.hem_widget.set_slider_to(0)
+        self.update_lod_levels()
 
     def active_pc_changed(self, index):
         if self.current_index == index:
@@ -510,6 +526,12 @@ class RegistrationMainWindow(QMainWindow):
                                                  self.pc_gaussian_list_first[index],
                                                  self.pc_gaussian_list_second[index],
                                                  True, self.transformation_picker.transformation_matrix, dc1, dc2)
+        self.update_lod_levels()
+
+    def update_lod_levels(self):
+        # The mixture levels coarser than the displayed one are rendered by the 3DGS viewer while the camera moves
+        self.visualizer_window.vis_3dgs.set_lod_levels(self.pc_gaussian_list_first[self.current_index + 1:],
+                                                       self.pc_gaussian_list_second[self.current_index + 1:])
 
     def check_if_none_and_throw_error(self, pc_first, pc_second, message):
         if not pc_first or not pc_second:
@@ -0,0 +1,33 @@
+import time
+
+
+class FrameTimer:
+    """
+    Measures the latency of the frames of a viewer, from the start of the rendering until the image is displayed.
+    """
+
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing  # Weight of the latest frame in the moving average
+        self.frame_count = 0
+        self.last_frame_time = 0.0  # Latency of the last frame in milliseconds
+        self.average_frame_time = 0.0  # Exponential moving average of the latency in milliseconds
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        if self.start_time is None:
+            return
+
+        self.last_frame_time = (time.perf_counter() - self.start_time) * 1000
+        if self.frame_count == 0:
+            self.average_frame_time = self.last_frame_time
+        else:
+            self.average_frame_time += self.smoothing * (self.last_frame_time - self.average_frame_time)
+        self.frame_count += 1
+        self.start_time = None
+
+    @property
+    def fps(self):
+        return 1000 / self.average_frame_time if self.average_frame_time > 0 else 0.0
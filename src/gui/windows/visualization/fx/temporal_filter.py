@@ -1,36 +1,76 @@
-from PySide6.QtGui import QPixmap, QColor
+from functools import lru_cache
+
+import numpy as np
+from PySide6.QtGui import QPixmap, QImage
+
+
+def get_image_array(img: QImage):
+    """
+    Returns a (H, W, 4) uint8 view of the bits of a 32-bit QImage without copying. The channel order is B, G, R, A.
+    """
+    buffer = np.frombuffer(img.bits(), dtype=np.uint8)
+    # Lines may be padded, only the first width * 4 bytes of each line belong to the image
+    return buffer.reshape(img.height(), img.bytesPerLine())[:, :img.width() * 4].reshape(img.height(), img.width(), 4)
+
+
+@lru_cache(maxsize=8)
+def get_blend_table(decay):
+    """
+    Returns the blended value of every pair of 8-bit values, indexed by current * 256 + accumulated.
+    The values are computed with the same float64 operations and int() truncation as a per pixel blend.
+    """
+    current = np.arange(256, dtype=np.float64).reshape(-1, 1)
+    accumulated = np.arange(256, dtype=np.float64).reshape(1, -1)
+    return (current * (1 - decay) + accumulated * decay).astype(np.uint8).reshape(-1)
+
+
+def blend_frames(current, accumulated, decay, out=None, buffer=None):
+    """
+    Blends the color channels of two contiguous (H, W, 4) uint8 BGRA frames as
+    int(current * (1 - decay) + accumulated * decay). The alpha of the result is opaque.
+    The optional out and buffer arrays ((H, W, 4) uint8 and uint16) avoid allocations per frame.
+    """
+    if out is None:
+        out = np.empty_like(current)
+    if buffer is None:
+        buffer = np.empty(current.shape, dtype=np.uint16)
+
+    # The alpha channel is blended as well and overwritten afterward, since the lookup is much faster on
+    # contiguous arrays
+    np.left_shift(current, 8, out=buffer, dtype=np.uint16)
+    buffer |= accumulated
+    np.take(get_blend_table(decay), buffer.reshape(-1), out=out.reshape(-1))
+    out[..., 3] = 255
+    return out
 
 
 class TemporalFilter:
     def __init__(self, decay=0.95, max_frames=5):
         self.decay = decay  # Decay factor for old pixels
         self.max_frames = max_frames  # Max frames to store in the buffer
-        self.accumulated_color = None  # Accumulated color values
+        self.accumulated_color = None  # Accumulated color values as a BGRA array
         self.frame_count = 0  # Number of frames processed
+        self.blend_buffer = None  # Reused buffer of the blending
 
     def apply_temporal_filter(self, new_frame: QPixmap):
         if self.frame_count % 30 == 0:
             self.accumulated_color = None
 
-        img = new_frame.toImage()
-        if self.accumulated_color is None:
-            self.accumulated_color = img.copy()
+        img = new_frame.toImage().convertToFormat(QImage.Format.Format_RGB32)
+        current_color = get_image_array(img)
+        if self.accumulated_color is None or self.accumulated_color.shape != current_color.shape:
+            self.accumulated_color = current_color.copy()
             return new_frame
 
-        output_image = img.copy()
-
-        for x in range(img.width()):
-            for y in range(img.height()):
-                current_color = QColor(img.pixel(x, y))
-                accumulated_color = QColor(self.accumulated_color.pixel(x, y))
-
-                new_r = int(current_color.red() * (1 - self.decay) + accumulated_color.red() * self.decay)
-                new_g = int(current_color.green() * (1 - self.decay) + accumulated_color.green() * self.decay)
-                new_b = int(current_color.blue() * (1 - self.decay) + accumulated_color.blue() * self.decay)
+        if self.blend_buffer is None or self.blend_buffer.shape != current_color.shape:
+            self.blend_buffer = np.empty(current_color.shape, dtype=np.uint16)
 
-                output_image.setPixel(x, y, QColor(new_r, new_g, new_b).rgba())
+        output_color = blend_frames(current_color, self.accumulated_color, self.decay, buffer=self.blend_buffer)
+        # The image only wraps the array, the pixmap is created before the array could be released
+        output_image = QImage(output_color.data, img.width(), img.height(), img.width() * 4,
+                              QImage.Format.Format_RGB32)
 
-        self.accumulated_color = output_image
+        self.accumulated_color = output_color
         self.frame_count += 1
 
         return QPixmap.fromImage(output_image)
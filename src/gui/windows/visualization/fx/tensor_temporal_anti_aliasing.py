@@ -0,0 +1,57 @@
+import torch
+
+
+class TensorTemporalAntiAliasing:
+    """
+    Temporal anti-aliasing of the rendered float tensors, on the device they were rendered on.
+    The history is drawn with the opacity decay, and the new frame over it with an opacity alternating between
+    high_alpha and base_alpha. The history is only kept as long as the view does not change, so moving the camera does
+    not leave trails.
+    """
+
+    def __init__(self, base_alpha=0.1, high_alpha=0.5, decay=0.95, max_frames=30):
+        self.base_alpha = base_alpha
+        self.high_alpha = high_alpha
+        self.decay = decay
+        self.max_frames = max_frames  # Number of frames after which the history is discarded
+
+        # Accumulated color premultiplied by the accumulated alpha, which is the same for every pixel
+        self.accumulated_frame = None
+        self.accumulated_alpha = 0.0
+        self.frame_count = 0
+        self.viewmat = None
+
+    def reset(self):
+        self.accumulated_frame = None
+        self.accumulated_alpha = 0.0
+        self.frame_count = 0
+
+    @torch.no_grad()
+    def apply_taa(self, new_frame: torch.Tensor, viewmat: torch.Tensor = None):
+        """
+        Blends the (H, W, C) float frame into the history and returns the anti-aliased frame.
+        """
+        if viewmat is not None and (self.viewmat is None or not torch.equal(viewmat, self.viewmat)):
+            self.viewmat = viewmat.clone()
+            self.reset()
+
+        if self.frame_count >= self.max_frames or (self.accumulated_frame is not None
+                                                   and self.accumulated_frame.shape != new_frame.shape):
+            self.reset()
+
+        if self.accumulated_frame is None:
+            self.accumulated_frame = new_frame.clone()
+            self.accumulated_alpha = 1.0
+            self.frame_count = 1
+            return new_frame
+
+        # Use a higher alpha for new frames (to reduce ghosting)
+        alpha = self.high_alpha if self.frame_count % 2 == 0 else self.base_alpha
+
+        # Source-over composition of the new frame onto the faded history
+        history_weight = (1 - alpha) * self.decay
+        self.accumulated_frame.mul_(history_weight).add_(new_frame, alpha=alpha)
+        self.accumulated_alpha = alpha + history_weight * self.accumulated_alpha
+        self.frame_count += 1
+
+        return self.accumulated_frame / self.accumulated_alpha
@@ -0,0 +1,146 @@
+import numpy as np
+import torch
+
+from src.models.gaussian_model import GaussianModel
+
+
+class MergedPointCloud:
+    """
+    Merged Gaussian point cloud of the viewer. The untransformed positions, rotations and covariances of the first
+    point cloud are kept on the same device, so that a new transformation only rewrites its slice of the merged buffers.
+    """
+
+    def __init__(self, pc1, pc2, transformation):
+        self.point_cloud = GaussianModel.get_merged_gaussian_point_clouds(pc1, pc2, transformation)
+        self.transformation = None if transformation is None else transformation.copy()
+
+        self.pc1_geometry = GaussianModel(pc1.sh_degree, pc1.device_name)
+        self.pc1_geometry._xyz = pc1._xyz
+        self.pc1_geometry._rotation = pc1._rotation
+        self.pc1_geometry._covariance = pc1._covariance
+        self.pc1_geometry.compact = pc1.compact
+
+    @property
+    def splat_count(self):
+        return self.point_cloud.get_xyz.shape[0]
+
+    def update_transform(self, transformation):
+        if transformation is None and self.transformation is None:
+            return
+        if (transformation is not None and self.transformation is not None
+                and np.array_equal(transformation, self.transformation)):
+            return
+
+        transformation_tensor = None
+        if transformation is not None:
+            transformation_tensor = torch.from_numpy(transformation.astype(np.float32)).to(
+                self.pc1_geometry.device_name)
+        with torch.no_grad():
+            self.point_cloud.update_transformed_slice(self.pc1_geometry, transformation_tensor)
+        self.transformation = None if transformation is None else transformation.copy()
+
+    def move_to_device(self, device_name):
+        self.point_cloud.move_to_device(device_name)
+        self.pc1_geometry.move_to_device(device_name)
+
+
+class LevelOfDetail:
+    """
+    Chooses which level of the Gaussian mixture hierarchy the viewer renders. Level 0 is the loaded point cloud, the
+    other levels are coarser mixture levels. While the camera moves, the finest level that is expected to be rendered
+    within the frame time budget is used; a still camera is always rendered with level 0.
+    The merged point clouds of the levels are only created when they are rendered first.
+    """
+
+    def __init__(self, frame_budget=0.0, smoothing=0.2):
+        self.frame_budget = frame_budget  # Frame time budget in milliseconds, 0 disables the coarser levels
+        self.smoothing = smoothing  # Weight of the latest frame in the moving average of the frame times
+
+        self.levels = []  # (pc1, pc2) pairs ordered from the finest to the coarsest level
+        self.point_clouds = []  # Merged point cloud of each level, None until it is rendered
+        self.frame_times = []  # Moving average of the frame time of each level, None until it is rendered
+
+    def set_levels(self, levels):
+        """
+        Sets the (pc1, pc2) pairs of the levels. The first pair is the full resolution level, the rest are ordered by
+        their size, and levels that are not smaller than the first one are left out.
+        The merged point clouds of levels that were already set are kept.
+        """
+        new_levels = []
+        if levels:
+            full_level, *coarse_levels = levels
+            full_count = self.get_level_splat_count(full_level)
+            coarse_levels = [level for level in coarse_levels if self.get_level_splat_count(level) < full_count]
+            coarse_levels.sort(key=self.get_level_splat_count, reverse=True)
+            new_levels = [full_level, *coarse_levels]
+
+        kept = {}
+        for level, point_cloud, frame_time in zip(self.levels, self.point_clouds, self.frame_times):
+            if any(level[0] is new_level[0] and level[1] is new_level[1] for new_level in new_levels):
+                kept[(id(level[0]), id(level[1]))] = (point_cloud, frame_time)
+            elif point_cloud is not None:
+                point_cloud.move_to_device("cpu")
+
+        self.levels = new_levels
+        self.point_clouds = [kept.get((id(pc1), id(pc2)), (None, None))[0] for pc1, pc2 in new_levels]
+        self.frame_times = [kept.get((id(pc1), id(pc2)), (None, None))[1] for pc1, pc2 in new_levels]
+
+    @staticmethod
+    def get_level_splat_count(level):
+        pc1, pc2 = level
+        return pc1.get_xyz.shape[0] + pc2.get_xyz.shape[0]
+
+    @property
+    def level_count(self):
+        return len(self.levels)
+
+    def get_point_cloud(self, index, transformation, device_name):
+        """
+        Returns the merged point cloud of the level on the device, transformed by the current transformation.
+        """
+        point_cloud = self.point_clouds[index]
+        if point_cloud is None:
+            point_cloud = MergedPointCloud(*self.levels[index], transformation)
+            self.point_clouds[index] = point_cloud
+
+        point_cloud.move_to_device(device_name)
+        point_cloud.update_transform(transformation)
+        return point_cloud.point_cloud
+
+    def add_frame_time(self, index, frame_time):
+        if self.frame_times[index] is None:
+            self.frame_times[index] = frame_time
+        else:
+            self.frame_times[index] += self.smoothing * (frame_time - self.frame_times[index])
+
+    def estimate_frame_time(self, index):
+        """
+        Estimates the frame time of a level. Levels that were not rendered yet are estimated from the nearest rendered
+        level, assuming that the frame time is proportional to the number of splats.
+        """
+        if self.frame_times[index] is not None:
+            return self.frame_times[index]
+
+        measured = [i for i, frame_time in enumerate(self.frame_times) if frame_time is not None]
+        if not measured:
+            return None
+
+        nearest = min(measured, key=lambda i: abs(i - index))
+        return (self.frame_times[nearest] * self.get_level_splat_count(self.levels[index])
+                / self.get_level_splat_count(self.levels[nearest]))
+
+    def select_level(self, is_moving):
+        if not is_moving or self.frame_budget <= 0 or self.level_count <= 1:
+            return 0
+
+        for index in range(self.level_count):
+            frame_time = self.estimate_frame_time(index)
+            if frame_time is None or frame_time <= self.frame_budget:
+                return index
+
+        return self.level_count - 1
+
+    def move_to_device(self, device_name):
+        for point_cloud in self.point_clouds:
+            if point_cloud is not None:
+                point_cloud.move_to_device(device_name)
@@ -1,14 +1,19 @@
+import time
+
 import numpy as np
 import torch
 from PySide6 import QtCore
-from PySide6.QtGui import Qt
+from PySide6.QtGui import Qt, QBrush, QColor
 from PySide6.QtWidgets import QVBoxLayout, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, \
-    QGraphicsSceneMouseEvent, QMainWindow, QWidget, QSizePolicy
+    QGraphicsSceneMouseEvent, QMainWindow, QWidget, QSizePolicy, QGraphicsSimpleTextItem
 
-from gui.windows.visualization.fx.temporal_anit_aliasing import TemporalAntiAliasing
+from gui.windows.visualization.frame_timer import FrameTimer
+from gui.windows.visualization.fx.tensor_temporal_anti_aliasing import TensorTemporalAntiAliasing
+from gui.windows.visualization.level_of_detail import LevelOfDetail
 from gui.windows.visualization.viewer_interface import ViewerInterface
-from src.models.gaussian_model import GaussianModel
-from src.utils.rasterization_util import rasterize_image, get_pixmap_from_tensor
+from src.utils.culling_util import SplatCuller
+from src.utils.math_util import halton
+from src.utils.rasterization_util import rasterize_image, get_pixmap_from_tensor, get_render_device
 
 
 class State:
@@ -56,6 +61,7 @@ class PopupWindow(QMainWindow):
         self.camera.width = new_width
         self.camera.height = new_height
         self.graphics_view.setGeometry(0, 0, self.width(), self.height())
+        self.parent().request_update()
 
 
 # noinspection PyTypeChecker
@@ -66,16 +72,40 @@ class GaussianSplatWindow(ViewerInterface):
 
         self.pc1 = None
         self.pc2 = None
-        self.point_cloud_merged = None
+        self.transformation = None
         self.camera = None
+        # Without a CUDA device, the point clouds are rendered by the CPU rasterizer
+        self.device = get_render_device()
 
         self.layout: QVBoxLayout = None
         self.graphics_view: QGraphicsView = None
         self.scene: QGraphicsScene = None
         self.pixmap_item: QGraphicsPixmapItem = None
+        self.frame_stats_item: QGraphicsSimpleTextItem = None
 
+        # Frames are only rendered when the camera, the point clouds or the settings change. The requests are
+        # coalesced, so a burst of mouse events results in a single frame, rendered at most every min_frame_interval ms
         self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.update_view)
+        self.is_active = False
+        self.is_dirty = False
+        self.min_frame_interval = 8
+        self.last_frame_end = 0.0
+
+        # Number of frames with sub-pixel jitter accumulated by the TAA after the view stopped changing (0 disables)
+        self.idle_refinement_frames = 0
+        self.refinement_index = 0
+
+        # While the camera moves, a coarser mixture level is rendered if the full point cloud does not fit into the
+        # frame time budget. The camera counts as moving until it was not changed for lod_settle_time ms
+        self.lod = LevelOfDetail()
+        self.lod_level = 0
+        self.lod_settle_time = 150
+        self.last_camera_change = 0.0
+        self.lod_timer = QtCore.QTimer(self)
+        self.lod_timer.setSingleShot(True)
+        self.lod_timer.timeout.connect(self.request_update)
 
         # Mouse state variables
         self.mouse_down_x = 0
@@ -93,7 +123,12 @@ class GaussianSplatWindow(ViewerInterface):
         # Approximate background color of the qdarkstyle theme
         self.background_color = np.array((0.09803921568627451, 0.13725490196078433, 0.17647058823529413))
 
-        self.taa = TemporalAntiAliasing(0.3, 0.5)
+        self.taa = TensorTemporalAntiAliasing(0.3, 0.5)
+        # Latency of the frames from the start of the rendering until the pixmap is set
+        self.frame_timer = FrameTimer()
+        self.show_frame_stats = False
+        # Splats outside the view frustum or without opacity are not rasterized
+        self.culler = SplatCuller()
 
         self.init_ui()
 
@@ -113,6 +148,13 @@ class GaussianSplatWindow(ViewerInterface):
         self.pixmap_item = QGraphicsPixmapItem()
         self.scene.addItem(self.pixmap_item)
 
+        self.frame_stats_item = QGraphicsSimpleTextItem()
+        self.frame_stats_item.setBrush(QBrush(QColor(255, 255, 255)))
+        self.frame_stats_item.setPos(5, 5)
+        self.frame_stats_item.setZValue(1)
+        self.frame_stats_item.setVisible(False)
+        self.scene.addItem(self.frame_stats_item)
+
         self.scene.mousePressEvent = self.mousePressEventScene
         self.scene.mouseMoveEvent = self.mouseMoveEventScene
         self.scene.mouseReleaseEvent = self.mouseReleaseEventScene
@@ -127,6 +169,29 @@ class GaussianSplatWindow(ViewerInterface):
 
         self.background_color = rgb_array
         self.graphics_view.setStyleSheet(f'background-color: rgb({r_255}, {g_255}, {b_255})')
+        self.request_update()
+
+    def set_show_frame_stats(self, show):
+        self.show_frame_stats = show
+        self.frame_stats_item.setVisible(show)
+        self.request_update()
+
+    def set_idle_refinement_frames(self, frame_count):
+        self.idle_refinement_frames = frame_count
+        self.request_update()
+
+    def set_lod_frame_budget(self, frame_budget):
+        self.lod.frame_budget = frame_budget
+        self.request_update()
+
+    def set_lod_levels(self, levels_first, levels_second):
+        """
+        Sets the coarser mixture levels of the loaded point clouds, which are rendered while the camera moves.
+        """
+        if self.pc1 is None or self.pc2 is None:
+            return
+
+        self.lod.set_levels([(self.pc1, self.pc2), *zip(levels_first, levels_second)])
 
     def mousePressEventScene(self, event: QGraphicsSceneMouseEvent):
         self.mouse_down_x = event.screenPos().x()
@@ -163,6 +228,8 @@ class GaussianSplatWindow(ViewerInterface):
         elif self.state == State.ROLL:
             self.camera.roll(dx * self.roll_speed)
 
+        self.camera_changed()
+
     def mouseReleaseEventScene(self, event: QGraphicsSceneMouseEvent):
         self.state = State.NONE
         torch.cuda.empty_cache()
@@ -170,34 +237,115 @@ class GaussianSplatWindow(ViewerInterface):
     def wheelEventScene(self, event):
         delta = event.delta()
         self.camera.zoom(delta * self.zoom_factor, self.get_aabb)
+        self.camera_changed()
 
     @property
     def get_aabb(self):
         return self.aabb
 
+    def request_update(self):
+        """
+        Marks the view as changed and schedules a new frame.
+        """
+        self.is_dirty = True
+        self.refinement_index = 0
+        self.schedule_frame()
+
+    def camera_changed(self):
+        self.last_camera_change = time.perf_counter()
+        self.request_update()
+
+    def is_camera_moving(self):
+        return (time.perf_counter() - self.last_camera_change) * 1000 < self.lod_settle_time
+
+    def schedule_frame(self):
+        # A pending frame already includes every change requested until it is rendered
+        if not self.is_active or self.timer.isActive():
+            return
+
+        elapsed = (time.perf_counter() - self.last_frame_end) * 1000
+        self.timer.start(max(0, int(self.min_frame_interval - elapsed)))
+
     def update_view(self):
-        if self.point_cloud_merged is None:
+        if self.lod.level_count == 0:
             return
 
         if self.camera is None:
             return
 
-        image_tensor = rasterize_image(self.point_cloud_merged, self.camera, 1, self.background_color, "cuda:0", False)
-        pix = get_pixmap_from_tensor(image_tensor)
-        pix = self.taa.apply_taa(pix)
+        if not self.is_dirty and self.refinement_index >= self.idle_refinement_frames:
+            return
+
+        pixel_offset = None
+        if self.is_dirty:
+            # Start the accumulation over, so that the changes are shown immediately
+            self.taa.reset()
+        else:
+            pixel_offset = (halton(self.refinement_index, 2) - 0.5, halton(self.refinement_index, 3) - 0.5)
+            self.refinement_index += 1
+        self.is_dirty = False
+
+        # Jittered refinement frames are only rendered when the camera stands still, so always at full resolution
+        self.lod_level = self.lod.select_level(pixel_offset is None and self.is_camera_moving())
+
+        self.frame_timer.start()
+        point_cloud = self.lod.get_point_cloud(self.lod_level, self.transformation, self.device)
+        image_tensor = rasterize_image(point_cloud, self.camera, 1, self.background_color, self.device, True,
+                                       pixel_offset, self.culler)
+        image_tensor = self.taa.apply_taa(image_tensor[0], self.camera.viewmat)
+        pix = get_pixmap_from_tensor(image_tensor.unsqueeze(0))
         self.pixmap_item.setPixmap(pix)
         self.scene.setSceneRect(self.pixmap_item.pixmap().rect())
+        self.frame_timer.stop()
+        self.last_frame_end = time.perf_counter()
+        self.lod.add_frame_time(self.lod_level, self.frame_timer.last_frame_time)
+
+        if self.show_frame_stats:
+            last_frame_time, average_frame_time = self.frame_latency
+            self.frame_stats_item.setText(f"Frame: {last_frame_time:.1f} ms\n"
+                                          f"Average: {average_frame_time:.1f} ms ({self.frame_timer.fps:.0f} FPS)\n"
+                                          f"Level: {self.lod_level} ({point_cloud.get_xyz.shape[0]} splats)\n"
+                                          f"{self.get_culling_stats_text()}")
+
+        if self.lod_level != 0:
+            # Render the full resolution once the camera stops moving
+            self.lod_timer.start(self.lod_settle_time)
+        elif self.refinement_index < self.idle_refinement_frames:
+            # Keep refining while the view does not change
+            self.schedule_frame()
+
+    def get_culling_stats_text(self):
+        stats = self.culler.get_stats()
+        if not stats:
+            return ""
+
+        return (f"Rendered: {stats['visible']} splats, culled: {stats['frustum_culled']} outside the view, "
+                f"{stats['opacity_culled']} transparent ({stats['time'] * 1000:.1f} ms)")
+
+    @property
+    def frame_latency(self):
+        """
+        Latency of the last frame and its moving average in milliseconds.
+        """
+        return self.frame_timer.last_frame_time, self.frame_timer.average_frame_time
 
     def set_active(self, active):
         if active:
-            self.point_cloud_merged.move_to_device("cuda:0")
-            self.timer.start(1)
+            self.is_active = True
+            self.request_update()
             return
 
+        # The point clouds stay on the device, deactivating the viewer only stops the rendering
+        self.is_active = False
         self.timer.stop()
-        if self.point_cloud_merged is not None:
-            self.point_cloud_merged.move_to_device("cpu")
-            torch.cuda.empty_cache()
+        self.lod_timer.stop()
+
+    def release_device_memory(self):
+        """
+        Moves the point clouds back to the CPU, e.g. when the Open3D viewer is shown instead.
+        """
+        self.lod.move_to_device("cpu")
+        torch.cuda.empty_cache()
 
     def on_embed_button_pressed(self):
         if not self.is_embedded:
@@ -210,6 +358,7 @@ class GaussianSplatWindow(ViewerInterface):
                 self.is_embedded = True
                 self.camera.height = self.height() - 20
                 self.camera.width = self.width() - 20
+                self.request_update()
         else:
             # Create and show the pop-up visualizer window
             if not self.popup_window:
@@ -224,18 +373,13 @@ class GaussianSplatWindow(ViewerInterface):
         if self.pc1 is None or self.pc2 is None:
             return
 
-        if self.point_cloud_merged is not None:
-            self.point_cloud_merged.move_to_device("cpu")
-            del self.point_cloud_merged
-            torch.cuda.empty_cache()
-
-        self.point_cloud_merged = GaussianModel.get_merged_gaussian_point_clouds(self.pc1, self.pc2, transformation)
+        # The merged point clouds only rewrite the slice of the first point cloud when they are rendered next
+        self.transformation = None if transformation is None else transformation.copy()
+        self.request_update()
 
     def load_point_clouds(self, pc1, pc2, transformation):
-        if self.point_cloud_merged is not None:
-            self.point_cloud_merged.move_to_device("cpu")
-            del self.point_cloud_merged
-            torch.cuda.empty_cache()
+        self.lod.set_levels([])
+        torch.cuda.empty_cache()
 
         if self.pc1 is not None:
             del self.pc1
@@ -245,8 +389,9 @@ class GaussianSplatWindow(ViewerInterface):
 
         self.pc1 = pc1
         self.pc2 = pc2
+        self.transformation = None if transformation is None else transformation.copy()
 
-        self.point_cloud_merged = GaussianModel.get_merged_gaussian_point_clouds(self.pc1, self.pc2, transformation)
+        self.lod.set_levels([(self.pc1, self.pc2)])
 
     def get_current_view(self):
         if self.camera is None:
@@ -264,3 +409,4 @@ class GaussianSplatWindow(ViewerInterface):
             return
 
         self.camera.set_viewmat(transformation)
+        self.request_update()
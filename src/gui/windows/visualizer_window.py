@@ -66,6 +66,7 @@ class VisualizerWindow(QWidget):
     def vis_type_changed(self, index):
         if index == 0:
             self.vis_3dgs.set_active(False)
+            self.vis_3dgs.release_device_memory()
 
             # If the o3d camera is orthogonal, there is no need for a camera update, because 3DGS view is not allowed.
             # Due to this, the camera pose could not change.
@@ -1,21 +1,23 @@
 import json
+import math
 import os.path
+import time
 
 import torch
-import torchvision.transforms.functional as tf
-from PIL import Image
 from PySide6 import QtWidgets
 
 from src.gui.workers.qt_base_worker import BaseWorker
 from src.models.gaussian_model import GaussianModel
-import lpips
-from src.utils.evaluation_utils import ssim, psnr, mse
-from src.utils.rasterization_util import rasterize_image
+from src.utils.culling_util import SplatCuller
+from src.utils.evaluation_utils import ImageEvaluator, METRIC_NAMES, get_camera_log_path, get_evaluation_hash, \
+    load_camera_metrics, open_camera_log, write_camera_metrics
+from src.utils.image_loader_util import ImagePrefetcher
+from src.utils.rasterization_util import MultiViewRasterizer
 
 
 class RegistrationEvaluator(BaseWorker):
     def __init__(self, pc1, pc2, transformation, cameras_list, images_path, log_path, color, registration_result,
-                 use_gpu):
+                 use_gpu, batch_size=8, prefetch_depth=4, prefetch_workers=2, resume=False, inputs=None):
 
         super().__init__()
         # Signal to cancel task
@@ -31,8 +33,21 @@ class RegistrationEvaluator(BaseWorker):
         self.log_path = log_path
 
         self.color = color
-        self.use_gpu = use_gpu  # Whether the actual evaluation happens on the gpu or not
-        self.device = "cuda:0"
+        self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        # Whether the actual evaluation happens on the gpu or not
+        self.use_gpu = use_gpu and torch.cuda.is_available()
+        self.metric_device = self.device if self.use_gpu else "cpu"
+        # Number of images the metrics are computed for at once
+        self.batch_size = max(1, batch_size)
+        # Number of ground truth images loaded ahead of the rendering, and the number of threads loading them
+        self.prefetch_depth = prefetch_depth
+        self.prefetch_workers = prefetch_workers
+        # Skip the cameras that are already in the per camera log for the same inputs and transformation
+        self.resume = resume
+        self.camera_log_path = get_camera_log_path(log_path)
+        # Identity of the evaluated point clouds, images and cameras, see get_evaluation_inputs
+        self.inputs = inputs or {}
+        self.evaluation_hash = get_evaluation_hash(transformation, color, self.inputs)
 
         self.registration_result = registration_result
         self.mean_rmses = None
@@ -41,6 +56,21 @@ class RegistrationEvaluator(BaseWorker):
         self.mean_lpipss = None
         self.mean_mses = None
 
+        # Time spent loading the ground truth images, waiting for them to be loaded, rendering (including the culling
+        # of the splats) and computing the metrics in seconds
+        self.timings = {"decode": 0.0, "decode_stall": 0.0, "render": 0.0, "culling": 0.0, "metric": 0.0}
+        # The splats outside of the views of a batch of cameras are not rasterized, the grid of the point cloud is
+        # built once
+        self.culler = SplatCuller()
+
+        # Images and metrics of the batch that is currently collected
+        self.evaluator = None
+        self.camera_log = None
+        self.metrics = {name: [] for name in METRIC_NAMES}
+        self.batch_images = []
+        self.batch_gt_images = []
+        self.batch_image_names = []
+
         self.current_progress = 0
         self.max_progress = len(cameras_list)
 
@@ -48,59 +78,66 @@ class RegistrationEvaluator(BaseWorker):
         point_cloud = GaussianModel.get_merged_gaussian_point_clouds(self.pc1, self.pc2, self.transformation)
         point_cloud.move_to_device(self.device)
 
+        cameras_list = self.cameras_list
+        if self.resume:
+            finished_rows = load_camera_metrics(self.camera_log_path, self.evaluation_hash)
+            cameras_list = [camera for camera in cameras_list if camera.image_name not in finished_rows]
+            if finished_rows:
+                for name in METRIC_NAMES:
+                    self.metrics[name].append(torch.tensor([row[name] for row in finished_rows.values()]))
+            self.current_progress = len(self.cameras_list) - len(cameras_list)
+
+        self.evaluator = ImageEvaluator(self.metric_device)
         error_list = []
-        mses = []
-        rmses = []
-        ssims = []
-        psnrs = []
-        lpipss = []
-
-        for idx, camera in enumerate(self.cameras_list):
-            # Process events, look for cancel signal
-            QtWidgets.QApplication.processEvents()
-            if self.signal_cancel:
-                # Force gpu memory garbage collection
-                torch.cuda.empty_cache()
-                import gc
-                gc.collect()
-                return
-
-            self.update_progress()
-
-            img_name = camera.image_name
-            image_path = os.path.join(self.images_path, img_name + ".png")
-            try:
-                pil_image = Image.open(image_path).convert('RGB')
-                gt_image = tf.to_tensor(pil_image).unsqueeze(0)
-                if self.use_gpu:
-                    gt_image = gt_image.cuda()
-            except (OSError, IOError) as e:
-                error_list.append(str(e))
-                continue
-
-            try:
-                image_tensor = rasterize_image(point_cloud, camera, 1, self.color, self.device, self.use_gpu)
-            except (OSError, IOError) as e:
-                error_list.append(str(e))
-                continue
-
-            image_tensor = image_tensor.unsqueeze(0)
-
-            current_mse = mse(image_tensor, gt_image)
-            mses.append(current_mse)
-            rmses.append(torch.sqrt(current_mse))
-            ssims.append(ssim(image_tensor, gt_image))
-            psnrs.append(psnr(image_tensor, gt_image))
-            lpipss.append(lpips(image_tensor, gt_image))
-
-            del image_tensor, gt_image
-            torch.cuda.empty_cache()
-
-        self.mean_mses = torch.tensor(mses).mean().item()
-        self.mean_rmses = torch.tensor(rmses).mean().item()
-        self.mean_ssims = torch.tensor(ssims).mean().item()
-        self.mean_psnrs = torch.tensor(psnrs).mean().item()
-        self.mean_lpipss = torch.tensor(lpipss).mean().item()
+
+        # The activations of the splats are computed once, and cameras of the same resolution are rendered together
+        rasterizer = MultiViewRasterizer(point_cloud, 1, self.color, self.device, self.culler)
+        camera_batches = [[cameras_list[i] for i in batch] for batch in rasterizer.get_batches(cameras_list)]
+
+        # The ground truth images are decoded on a thread pool in the order in which the cameras are rendered, while the
+        # previous ones are rendered and evaluated
+        image_paths = [os.path.join(self.images_path, camera.image_name + ".png")
+                       for camera_batch in camera_batches for camera in camera_batch]
+        prefetcher = ImagePrefetcher(image_paths, self.prefetch_depth, self.prefetch_workers, self.metric_device)
+        with prefetcher, open_camera_log(self.camera_log_path) as self.camera_log:
+            prefetched_images = iter(prefetcher)
+            for camera_batch in camera_batches:
+                images = self.render_batch(rasterizer, camera_batch, error_list)
+                for index, camera in enumerate(camera_batch):
+                    image_path, gt_image, error = next(prefetched_images)
+
+                    # Process events, look for cancel signal
+                    QtWidgets.QApplication.processEvents()
+                    if self.signal_cancel:
+                        prefetcher.close()
+                        # Keep the metrics of the already rendered images, so that the evaluation can be resumed
+                        self.evaluate_batch()
+                        # Force gpu memory garbage collection
+                        del point_cloud, rasterizer, images
+                        torch.cuda.empty_cache()
+                        import gc
+                        gc.collect()
+                        return
+
+                    self.update_progress()
+
+                    if error is not None:
+                        error_list.append(str(error))
+                        continue
+
+                    if images is not None:
+                        self.evaluate_camera(camera, images[index], image_path, gt_image, error_list)
+
+            self.evaluate_batch()
+
+        self.timings["decode"] = prefetcher.decode_time
+        self.timings["decode_stall"] = prefetcher.stall_time
+
+        self.mean_mses = self.get_mean(self.metrics["mse"])
+        self.mean_rmses = self.get_mean(self.metrics["rmse"])
+        self.mean_ssims = self.get_mean(self.metrics["ssim"])
+        self.mean_psnrs = self.get_mean(self.metrics["psnr"])
+        self.mean_lpipss = self.get_mean(self.metrics["lpips"])
 
         log = self.create_and_save_log_file(error_list)
 
@@ -113,6 +150,67 @@ class RegistrationEvaluator(BaseWorker):
         self.signal_progress.emit(100)
         self.signal_finished.emit()
 
+    def render_batch(self, rasterizer, cameras, error_list):
+        """
+        Renders the cameras of a batch into (C, 3, H, W) images on the metric device, or returns None if the
+        rendering failed.
+        """
+        start = time.perf_counter()
+        culling_time = self.culler.total_time
+        try:
+            images = rasterizer.rasterize(cameras, self.use_gpu)
+        except (OSError, IOError, RuntimeError) as e:
+            error_list.append(str(e))
+            return None
+        self.timings["culling"] += self.culler.total_time - culling_time
+
+        images = images.permute(0, 3, 1, 2).clamp(0, 1).to(self.metric_device)
+        self.synchronize()
+        self.timings["render"] += time.perf_counter() - start
+        return images
+
+    def evaluate_camera(self, camera, image_tensor, image_path, gt_image, error_list):
+        if image_tensor.shape != gt_image.shape:
+            error_list.append(f"The size of the image \"{image_path}\" does not match the size of the camera.")
+            return
+
+        # Only images of the same size can be stacked into a batch
+        if self.batch_images and self.batch_images[0].shape != image_tensor.shape:
+            self.evaluate_batch()
+        self.batch_images.append(image_tensor)
+        self.batch_gt_images.append(gt_image)
+        self.batch_image_names.append(camera.image_name)
+        if len(self.batch_images) == self.batch_size:
+            self.evaluate_batch()
+
+    def evaluate_batch(self):
+        if not self.batch_images:
+            return
+
+        start = time.perf_counter()
+        batch_metrics = self.evaluator.evaluate(torch.stack(self.batch_images), torch.stack(self.batch_gt_images))
+        batch_metrics = {name: values.cpu() for name, values in batch_metrics.items()}
+        for name, values in batch_metrics.items():
+            self.metrics[name].append(values)
+        write_camera_metrics(self.camera_log, self.evaluation_hash, self.batch_image_names, batch_metrics)
+        self.timings["metric"] += time.perf_counter() - start
+
+        self.batch_images.clear()
+        self.batch_gt_images.clear()
+        self.batch_image_names.clear()
+
+    def synchronize(self):
+        # CUDA calls are asynchronous, wait for them so that the time is attributed to the correct stage
+        if self.device.startswith("cuda"):
+            torch.cuda.synchronize(self.device)
+
+    @staticmethod
+    def get_mean(values):
+        if not values:
+            return math.nan
+
+        return torch.cat(values).mean().item()
+
     def cancel_evaluation(self):
         self.signal_cancel = True
 
@@ -123,7 +221,9 @@ class RegistrationEvaluator(BaseWorker):
 
     def create_and_save_log_file(self, error_list):
         evaluation = self.EvaluationObject(self.registration_result, self.mean_mses, self.mean_rmses,
-                                           self.mean_ssims, self.mean_psnrs, self.mean_lpipss, error_list)
+                                           self.mean_ssims, self.mean_psnrs, self.mean_lpipss, error_list,
+                                           self.timings, self.inputs, self.evaluation_hash,
+                                           self.camera_log_path)
         with open(self.log_path, 'w') as f:
             json.dump(evaluation.__dict__, f, default=lambda x: x.tolist(), indent=2)
 
@@ -140,8 +240,13 @@ class RegistrationEvaluator(BaseWorker):
         lpips: float
 
         error_list: list
+        timings: dict
+        inputs: dict
+        evaluation_hash: str
+        camera_log_path: str
 
-        def __init__(self, registration_data, mse, rmse, ssim, psnr, lpips, error_list):
+        def __init__(self, registration_data, mse, rmse, ssim, psnr, lpips, error_list, timings, inputs,
+                     evaluation_hash, camera_log_path):
             super().__init__()
 
             self.registration_data = dict()
@@ -153,4 +258,8 @@ class RegistrationEvaluator(BaseWorker):
             self.psnr = psnr
             self.lpips = lpips
             self.error_list = error_list
+            self.timings = timings
+            self.inputs = inputs
+            self.evaluation_hash = evaluation_hash
+            self.camera_log_path = camera_log_path
 
@@ -1,10 +1,14 @@
-import mixture_bind
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from PySide6 import QtWidgets
 
 from src.gui.workers.qt_base_worker import BaseWorker
 from src.models.gaussian_mixture_level import GaussianMixtureModel
 from src.models.gaussian_model import GaussianModel
+from src.utils.mixture_cache_util import get_mixture_cache_key, load_mixture_levels, save_mixture_levels
 from src.utils.point_cloud_converter import convert_gs_to_open3d_pc
+from src.utils.rasterization_util import get_render_device
 
 
 class GaussianMixtureWorker(BaseWorker):
@@ -30,6 +34,7 @@ class GaussianMixtureWorker(BaseWorker):
 
         self.current_progress = 0
         self.max_progress = 6
+        self.progress_lock = threading.Lock()
         self.signal_cancel = False
 
     def run(self):
@@ -38,91 +43,102 @@ class GaussianMixtureWorker(BaseWorker):
             self.signal_finished.emit()
             return
 
-        print("Creating Gaussian Mixture Model for the first point cloud.")
-        mixture_level_first = mixture_bind.MixtureLevel.CreateMixtureLevel(
-            self.gaussian_pc_first.get_xyz.detach().cpu().tolist(),
-            self.gaussian_pc_first.get_colors.detach().cpu().tolist(),
-            self.gaussian_pc_first.get_raw_opacity.detach().view(-1).cpu().tolist(),
-            self.gaussian_pc_first.get_covariance(1).detach().cpu().tolist(),
-            self.gaussian_pc_first.get_spherical_harmonics.detach().cpu().tolist())
-
-        self.update_progress()
-        QtWidgets.QApplication.processEvents()
-        if self.signal_cancel:
-            self.signal_finished.emit()
-            return
-
-        mixture_models_first = mixture_bind.MixtureCreator.CreateMixture(self.cluster_level, self.hem_reduction,
-                                                                         self.distance_delta, self.color_delta,
-                                                                         self.decay_rate,
-                                                                         mixture_level_first)
-        self.update_progress()
-        QtWidgets.QApplication.processEvents()
-        if self.signal_cancel:
-            self.signal_finished.emit()
-            return
+        # The point clouds are independent and the native HEM reduction releases the GIL,
+        # so the hierarchies of both point clouds are built concurrently.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future_first = executor.submit(self.create_mixture_levels, self.gaussian_pc_first, "first")
+            future_second = executor.submit(self.create_mixture_levels, self.gaussian_pc_second, "second")
 
-        print("Creating Gaussian Mixture Model for the second point cloud.")
-        mixture_level_second = mixture_bind.MixtureLevel.CreateMixtureLevel(
-            self.gaussian_pc_second.get_xyz.detach().cpu().tolist(),
-            self.gaussian_pc_second.get_colors.detach().cpu().tolist(),
-            self.gaussian_pc_second.get_raw_opacity.detach().view(-1).cpu().tolist(),
-            self.gaussian_pc_second.get_covariance(1).detach().cpu().tolist(),
-            self.gaussian_pc_second.get_spherical_harmonics.detach().cpu().tolist())
+            # The pool threads only count their progress, the signal is emitted from the thread of the worker
+            futures = [future_first, future_second]
+            emitted_percent = 0
+            while wait(futures, timeout=0.1).not_done:
+                emitted_percent = self.emit_progress(emitted_percent)
+                QtWidgets.QApplication.processEvents()
+            self.emit_progress(emitted_percent)
 
-        self.update_progress()
-        QtWidgets.QApplication.processEvents()
-        if self.signal_cancel:
-            self.signal_finished.emit()
-            return
+            result_first = future_first.result()
+            result_second = future_second.result()
 
-        mixture_models_second = mixture_bind.MixtureCreator.CreateMixture(self.cluster_level, self.hem_reduction,
-                                                                          self.distance_delta, self.color_delta,
-                                                                          self.decay_rate,
-                                                                          mixture_level_second)
-        self.update_progress()
-        QtWidgets.QApplication.processEvents()
-        if self.signal_cancel:
+        if self.signal_cancel or result_first is None or result_second is None:
             self.signal_finished.emit()
             return
 
-        list_gaussian_first = []
-        list_gaussian_second = []
-        list_open3d_first = []
-        list_open3d_second = []
+        list_gaussian_first, list_open3d_first = result_first
+        list_gaussian_second, list_open3d_second = result_second
 
-        for mixture in mixture_models_first:
-            mixture_model = GaussianMixtureModel(*mixture_bind.MixtureLevel.CreatePythonLists(mixture))
-            gaussian = GaussianModel(device_name="cuda:0")
-            gaussian.from_mixture(mixture_model)
-            gaussian.move_to_device("cpu")
+        self.signal_result.emit(GaussianMixtureWorker.ResultData(list_gaussian_first, list_gaussian_second,
+                                list_open3d_first, list_open3d_second))
+        self.signal_finished.emit()
 
-            result_open3d = convert_gs_to_open3d_pc(gaussian)
-            list_gaussian_first.append(gaussian)
-            list_open3d_first.append(result_open3d)
+    def create_mixture_levels(self, gaussian_pc, name):
+        mixture_arrays = self.get_mixture_arrays(gaussian_pc)
+        cache_key = get_mixture_cache_key(mixture_arrays, self.hem_reduction, self.distance_delta, self.color_delta,
+                                          self.decay_rate, self.cluster_level)
+        mixture_models = load_mixture_levels(cache_key)
+
+        if mixture_models is not None:
+            print(f"Loading the cached Gaussian Mixture Model of the {name} point cloud.")
+            self.update_progress()
+            self.update_progress()
+        else:
+            print(f"Creating Gaussian Mixture Model for the {name} point cloud.")
+            # The extension is only loaded when a hierarchy is not found in the cache
+            import mixture_bind
+
+            mixture_level = mixture_bind.MixtureLevel.CreateMixtureLevelFromArrays(*mixture_arrays)
+
+            self.update_progress()
+            if self.signal_cancel:
+                return None
+
+            mixture_levels = mixture_bind.MixtureCreator.CreateMixture(self.cluster_level, self.hem_reduction,
+                                                                       self.distance_delta, self.color_delta,
+                                                                       self.decay_rate, mixture_level)
+            mixture_models = [GaussianMixtureModel(*mixture_bind.MixtureLevel.CreateArrays(mixture))
+                              for mixture in mixture_levels]
+            save_mixture_levels(cache_key, mixture_models)
+            self.update_progress()
 
-        self.update_progress()
+        if self.signal_cancel:
+            return None
 
-        for mixture in mixture_models_second:
-            mixture_model = GaussianMixtureModel(*mixture_bind.MixtureLevel.CreatePythonLists(mixture))
-            gaussian = GaussianModel(device_name="cuda:0")
+        list_gaussian = []
+        list_open3d = []
+        for mixture_model in mixture_models:
+            gaussian = GaussianModel(device_name=get_render_device())
             gaussian.from_mixture(mixture_model)
             gaussian.move_to_device("cpu")
 
             result_open3d = convert_gs_to_open3d_pc(gaussian)
-            list_gaussian_second.append(gaussian)
-            list_open3d_second.append(result_open3d)
+            list_gaussian.append(gaussian)
+            list_open3d.append(result_open3d)
 
         self.update_progress()
+        return list_gaussian, list_open3d
 
-        self.signal_result.emit(GaussianMixtureWorker.ResultData(list_gaussian_first, list_gaussian_second,
-                                list_open3d_first, list_open3d_second))
-        self.signal_finished.emit()
+    @staticmethod
+    def get_mixture_arrays(gaussian):
+        # Contiguous float32 arrays are copied by the extension in bulk, without converting them to Python floats
+        return (gaussian.get_xyz.detach().cpu().contiguous().numpy(),
+                gaussian.get_colors.detach().cpu().contiguous().numpy(),
+                gaussian.get_raw_opacity.detach().view(-1).cpu().contiguous().numpy(),
+                gaussian.get_covariance(1).detach().cpu().contiguous().numpy(),
+                gaussian.get_spherical_harmonics.detach().cpu().contiguous().numpy())
 
     def update_progress(self):
-        self.current_progress += 1
-        new_percent = int(self.current_progress / self.max_progress * 100)
-        self.signal_progress.emit(new_percent)
+        with self.progress_lock:
+            self.current_progress += 1
+
+    def emit_progress(self, emitted_percent):
+        """
+        Emits the progress if it changed since the emitted percentage, and returns the current percentage.
+        """
+        with self.progress_lock:
+            new_percent = int(self.current_progress / self.max_progress * 100)
+        if new_percent != emitted_percent:
+            self.signal_progress.emit(new_percent)
+        return new_percent
 
     def cancel(self):
         self.signal_cancel = True
@@ -1,8 +1,10 @@
+import os
+
 import torch
 
 from src.gui.workers.qt_base_worker import BaseWorker
 from src.models.gaussian_model import GaussianModel
-from src.utils.file_loader import load_plyfile_pc, is_point_cloud_gaussian
+from src.utils.file_loader import load_gaussian_model, save_gaussian_model, save_merged_gaussian_pc_streamed
 
 
 class GaussianSaverBase(BaseWorker):
@@ -15,9 +17,19 @@ class GaussianSaverBase(BaseWorker):
         merged = GaussianModel.get_merged_gaussian_point_clouds(pc_first, pc_second,
                                                                 self.transformation)
         torch.cuda.empty_cache()
-        merged.save_ply(self.path)
-        del merged
-        torch.cuda.empty_cache()
+        try:
+            save_gaussian_model(merged, self.path)
+        except (OSError, ValueError, RuntimeError) as e:
+            self.finish_with_error(f"Saving the merged point cloud failed: {e}")
+            return
+        finally:
+            del merged
+            torch.cuda.empty_cache()
+        self.signal_progress.emit(100)
+        self.signal_finished.emit()
+
+    def finish_with_error(self, message):
+        self.signal_error.emit([message])
         self.signal_progress.emit(100)
         self.signal_finished.emit()
 
@@ -40,20 +52,31 @@ class GaussianSaverUseCorresponding(GaussianSaverBase):
         self.pc_path_second = pc_path_second
 
     def run(self):
-        pc_first_ply = load_plyfile_pc(self.pc_path_first)
-        pc_second_ply = load_plyfile_pc(self.pc_path_second)
-        if (not pc_first_ply or not pc_second_ply or
-                not is_point_cloud_gaussian(pc_first_ply) or not is_point_cloud_gaussian(pc_second_ply)):
-            self.signal_error.emit(
-                ["Importing one or both of the point clouds failed.\nPlease check that you entered the "
-                 "correct path and the point clouds selected are Gaussian point clouds!"])
+        # Merge the files chunk by chunk if possible, so that neither point cloud has to be held in memory
+        try:
+            merged = save_merged_gaussian_pc_streamed(self.pc_path_first, self.pc_path_second, self.transformation,
+                                                      self.path, progress_callback=self.signal_progress.emit)
+        except (OSError, ValueError, RuntimeError) as e:
+            self.finish_with_error(f"Merging the point clouds failed: {e}")
+            return
+
+        if merged:
             self.signal_progress.emit(100)
             self.signal_finished.emit()
             return
 
-        pc_first = GaussianModel(3)
-        pc_second = GaussianModel(3)
-        pc_first.from_ply(pc_first_ply)
-        pc_second.from_ply(pc_second_ply)
+        # The loaded PLYs are memory-mapped, so they must not be overwritten while the merged model is saved
+        if any(os.path.exists(self.path) and os.path.exists(path) and os.path.samefile(self.path, path)
+               for path in (self.pc_path_first, self.pc_path_second)):
+            self.finish_with_error("The merged point cloud cannot be saved over one of its inputs in this format.\n"
+                                   "Please select a different path!")
+            return
+
+        pc_first = load_gaussian_model(self.pc_path_first)
+        pc_second = load_gaussian_model(self.pc_path_second)
+        if pc_first is None or pc_second is None:
+            self.finish_with_error("Importing one or both of the point clouds failed.\nPlease check that you entered "
+                                   "the correct path and the point clouds selected are Gaussian point clouds!")
+            return
 
         self.merge_and_save(pc_first, pc_second)
@@ -1,12 +1,11 @@
 import copy
 
-import open3d as o3d
 from PySide6 import QtWidgets
 
 from src.gui.workers.qt_base_worker import BaseWorker
 from src.models.registration_data import MultiScaleRegistrationData
 from src.utils.file_loader import load_sparse_pc
-from src.utils.local_registration_util import do_icp_registration
+from src.utils.local_registration_util import do_icp_registration, do_multiscale_voxel_registration
 
 
 class MultiScaleRegistratorBase(BaseWorker):
@@ -117,37 +116,15 @@ class MultiScaleRegistratorVoxel(MultiScaleRegistratorBase):
         return True
 
     def _register_main_point_clouds(self, initial_transformation):
-        current_trans = initial_transformation
-        results = None
-
-        for scale in range(len(self.iter_values)):
-            max_iter = self.iter_values[scale]
-            radius = self.voxel_values[scale]
-
-            source_down = self.pc1.voxel_down_sample(radius)
-            target_down = self.pc2.voxel_down_sample(radius)
-
-            source_down.estimate_normals(
-                o3d.geometry.KDTreeSearchParamHybrid(radius=radius * 2, max_nn=30))
-            target_down.estimate_normals(
-                o3d.geometry.KDTreeSearchParamHybrid(radius=radius * 2, max_nn=30))
-
-            try:
-                results = do_icp_registration(source_down, target_down, current_trans, self.registration_type,
-                                              radius, self.relative_fitness, self.relative_rmse, max_iter,
-                                              self.rejection_type, self.k_value)
-            except RuntimeError as e:
-                error_str = str(e)
-                error_str += f"\nSource: \"{str(source_down)}\"\nTarget: \"{str(target_down)}\""
-                self.signal_error.emit([error_str])
-                self.emit_finished()
-                return None
-
-            self.update_progress()
-
-            current_trans = results.transformation
-
-        return results
+        try:
+            return do_multiscale_voxel_registration(self.pc1, self.pc2, initial_transformation,
+                                                    self.registration_type, self.relative_fitness,
+                                                    self.relative_rmse, self.voxel_values, self.iter_values,
+                                                    self.rejection_type, self.k_value, self.update_progress)
+        except RuntimeError as e:
+            self.signal_error.emit([str(e)])
+            self.emit_finished()
+            return None
 
     def _create_dataclass_object(self, results):
         return MultiScaleRegistrationData(registration_type=self.registration_type.instance_name,
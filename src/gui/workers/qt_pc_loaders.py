@@ -32,15 +32,23 @@ class PointCloudLoaderGaussian(BaseWorker):
             self.gaussian_point_cloud_first = gaussian_point_cloud_first
             self.gaussian_point_cloud_second = gaussian_point_cloud_second
 
-    def __init__(self, point_cloud_path_first, point_cloud_path_second):
+    def __init__(self, point_cloud_path_first, point_cloud_path_second, compact=False, morton_order=False):
         super().__init__()
         self.point_cloud_path_first = point_cloud_path_first
         self.point_cloud_path_second = point_cloud_path_second
+        # Whether the Gaussian point clouds are held in the compact storage mode
+        self.compact = compact
+        # Whether the splats are sorted by their Morton codes before the Open3D point clouds are converted from them
+        self.morton_order = morton_order
 
     def run(self):
-        o3d_pc1, gs_pc1 = load_gaussian_pc(self.point_cloud_path_first)
+        o3d_pc1, gs_pc1 = load_gaussian_pc(self.point_cloud_path_first, self.morton_order)
         self.signal_progress.emit(50)
-        o3d_pc2, gs_pc2 = load_gaussian_pc(self.point_cloud_path_second)
+        o3d_pc2, gs_pc2 = load_gaussian_pc(self.point_cloud_path_second, self.morton_order)
+        if self.compact:
+            for gs_pc in (gs_pc1, gs_pc2):
+                if gs_pc is not None:
+                    gs_pc.compress()
         self.signal_progress.emit(100)
         self.signal_result.emit(PointCloudLoaderGaussian.ResultData(o3d_pc1, o3d_pc2, gs_pc1, gs_pc2))
         self.signal_finished.emit()
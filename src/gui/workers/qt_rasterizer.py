@@ -7,7 +7,7 @@ from src.gui.workers.qt_base_worker import BaseWorker
 from src.models.camera import Camera
 from src.models.gaussian_model import GaussianModel
 from src.utils.graphics_utils import focal2fov, get_focal_from_intrinsics
-from src.utils.rasterization_util import rasterize_image, get_pixmap_from_tensor
+from src.utils.rasterization_util import rasterize_image, get_pixmap_from_tensor, get_render_device
 
 
 class RasterizerWorker(BaseWorker):
@@ -15,7 +15,7 @@ class RasterizerWorker(BaseWorker):
     def __init__(self, pc1, pc2, transformation, camera, scale, color):
         super().__init__()
 
-        self.device = torch.device("cuda:0")
+        self.device = torch.device(get_render_device())
         self.pc1 = pc1
         self.pc2 = pc2
 
@@ -1,13 +1,27 @@
 import os
 import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from src.utils.startup_profiler import StartupProfiler
+
+# Run with --startup-report to print the time spent importing each package before the window is shown
+startup_profiler = None
+if __name__ == '__main__' and "--startup-report" in sys.argv:
+    startup_profiler = StartupProfiler()
+    startup_profiler.install()
+
 import qdarkstyle
-from PySide6.QtCore import QLocale
+from PySide6.QtCore import QLocale, QTimer
 from PySide6.QtWidgets import QApplication
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
 from src.gui.windows.main_window import RegistrationMainWindow
 
+
+def print_startup_report():
+    startup_profiler.uninstall()
+    print(startup_profiler.create_report())
+
+
 if __name__ == '__main__':
     sys.path.append('src/cpp_ext')
     locale = QLocale(QLocale.Language.C)
@@ -17,4 +31,7 @@ if __name__ == '__main__':
     app.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyside6'))
     form = RegistrationMainWindow()
     form.show()
+    if startup_profiler is not None:
+        # Printed once the event loop has started, so the first paint of the window is included
+        QTimer.singleShot(0, print_startup_report)
     sys.exit(app.exec())
@@ -1,4 +1,8 @@
 class GaussianMixtureModel:
+    """
+    A single level of the HEM hierarchy as float32 NumPy arrays, as returned by mixture_bind.MixtureLevel.CreateArrays.
+    """
+
     def __init__(self, xyz, colors, opacities, covariance, features):
         self.xyz = xyz
         self.covariance = covariance
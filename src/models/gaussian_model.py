@@ -9,13 +9,25 @@
 # For inquiries contact  george.drettakis@inria.fr
 #
 
+import weakref
+
 import numpy as np
 import torch
+from numpy.lib.recfunctions import structured_to_unstructured
 from plyfile import PlyElement, PlyData
 
 from src.models.gaussian_mixture_level import GaussianMixtureModel
+from src.utils.compression_util import compress_features_dc, compress_opacities, compress_quaternions, \
+    decompress_features_dc, decompress_opacities, decompress_quaternions, decompress_raw_opacities
 from src.utils.general_utils import build_scaling_rotation, strip_symmetric, \
-    inverse_sigmoid, build_rotation, matrices_to_quaternions, rebuild_lowerdiag, matrix_to_quaternion
+    inverse_sigmoid, build_rotation, matrices_to_quaternions, rebuild_lowerdiag, matrix_to_quaternion, \
+    compute_morton_codes
+
+# Version and arrays of the compact on-disk format written by GaussianModel.save_compact
+COMPACT_FORMAT_VERSION = 1
+COMPACT_ARRAY_NAMES = ("xyz", "scaling", "features_dc", "features_rest", "opacity", "rotation")
+# PLY header comment that marks the splats of a file as sorted by GaussianModel.sort_by_morton_order
+MORTON_ORDER_COMMENT = "morton_order"
 
 
 class GaussianModel:
@@ -29,7 +41,12 @@ class GaussianModel:
         self._scaling = torch.empty(0)
         self._rotation = torch.empty(0)
         self._opacity = torch.empty(0)
-        self._covariance = torch.empty(0)
+        self._covariance_tensor = torch.empty(0)
+        # In the compact storage mode, the SH rest coefficients are half precision, the DC coefficients and the
+        # activated opacities are 8-bit codes and the rotations are 32-bit quaternion codes
+        self.compact = False
+        # Whether the splats are sorted by the Morton codes of their centers
+        self.morton_ordered = False
 
         def build_covariance_from_scaling_rotation(scaling, scaling_modifier, rotation):
             L = build_scaling_rotation(scaling_modifier * scaling, rotation)
@@ -44,13 +61,94 @@ class GaussianModel:
         self.inverse_opacity_activation = inverse_sigmoid
         self.rotation_activation = torch.nn.functional.normalize
 
+        # Small per splat activations (scales, opacities and rotations), with the references and in-place versions of
+        # the raw tensors they were derived from. The full covariances and the concatenated SH features are several
+        # times larger and are built per call instead, so that a model that is touched once does not keep them.
+        self._activation_cache = {}
+        self._version_counter = 0
+        self._version_state = None
+
+    @property
+    def _covariance(self):
+        # The covariance is derived on first access when the model was built from scales and rotations, so that
+        # memory-mapped models do not read their whole payload when they are opened.
+        if self._covariance_tensor is None:
+            self._covariance_tensor = self.covariance_activation(self.get_scaling, 1.0, self.get_raw_rotation())
+        return self._covariance_tensor
+
+    @_covariance.setter
+    def _covariance(self, covariance):
+        self._covariance_tensor = covariance
+
+    def get_raw_tensors(self):
+        return (self._xyz, self._features_dc, self._features_rest, self._scaling, self._rotation, self._opacity,
+                self._covariance_tensor)
+
+    def update_version(self):
+        """
+        Increases and returns the version counter if a raw tensor of the model was replaced or modified in place since
+        the last call, so that callers can detect whether values they derived from the model are stale.
+        Building the covariance from the scales and rotations on first access does not change the version.
+        """
+        tensors = self.get_raw_tensors()
+        state = [(weakref.ref(tensor), tensor._version) if tensor is not None else None for tensor in tensors]
+        if self._version_state is not None:
+            previous_covariance = self._version_state[-1]
+            if previous_covariance is None and state[-1] is not None:
+                self._version_state[-1] = state[-1]
+            if any(not self.is_tensor_state_current(tensor, tensor_state)
+                   for tensor, tensor_state in zip(tensors, self._version_state)):
+                self._version_counter += 1
+        self._version_state = state
+        return self._version_counter
+
+    @staticmethod
+    def is_tensor_state_current(tensor, tensor_state):
+        if tensor is None or tensor_state is None:
+            return tensor is None and tensor_state is None
+        return tensor_state[0]() is tensor and tensor_state[1] == tensor._version
+
+    def get_cached_activation(self, name, compute, tensors, key=None):
+        """
+        Returns the result of compute, which is derived from the tensors, from the cache. It is only computed again
+        when one of the tensors was replaced or modified in place, when the key changed, or when the result itself was
+        modified in place. Tensors that track gradients are not cached.
+        """
+        if torch.is_grad_enabled() and any(tensor.requires_grad for tensor in tensors):
+            return compute()
+
+        cached = self._activation_cache.get(name)
+        if (cached is not None and cached[1] == key and cached[2]._version == cached[3]
+                and all(self.is_tensor_state_current(tensor, tensor_state)
+                        for tensor, tensor_state in zip(tensors, cached[0]))):
+            return cached[2]
+
+        value = compute()
+        tensor_states = [(weakref.ref(tensor), tensor._version) for tensor in tensors]
+        self._activation_cache[name] = (tensor_states, key, value, value._version)
+        return value
+
+    def clear_activation_cache(self):
+        self._activation_cache.clear()
+
+    def get_activation_cache_size(self):
+        """
+        Returns the number of bytes held by the cached activations.
+        """
+        return sum(cached[2].numel() * cached[2].element_size() for cached in self._activation_cache.values())
+
     @property
     def get_scaling(self):
-        return self.scaling_activation(self._scaling)
+        return self.get_cached_activation("scaling", lambda: self.scaling_activation(self._scaling), (self._scaling,))
 
     @property
     def get_rotation(self):
-        return self.rotation_activation(self._rotation)
+        if self.compact:
+            # The decoded quaternions are already normalized. They are not cached, so that a compact model only holds
+            # the float32 copies while they are used
+            return decompress_quaternions(self._rotation)
+        return self.get_cached_activation("rotation", lambda: self.rotation_activation(self._rotation),
+                                          (self._rotation,))
 
     @property
     def get_xyz(self):
@@ -58,32 +156,104 @@ class GaussianModel:
 
     @property
     def get_features(self):
-        features_dc = self._features_dc
-        features_rest = self._features_rest
-        return torch.cat((features_dc, features_rest), dim=1)
+        return torch.cat((self.get_raw_features_dc(), self.get_raw_features_rest()), dim=1)
 
     @property
     def get_colors(self):
-        return self._features_dc.flatten(start_dim=1)
+        return self.get_raw_features_dc().flatten(start_dim=1)
 
     @property
     def get_spherical_harmonics(self):
-        return self._features_rest.flatten(start_dim=1)
+        return self.get_raw_features_rest().flatten(start_dim=1)
 
     @property
     def get_opacity_with_activation(self):
-        return self.opacity_activation(self._opacity)
+        if self.compact:
+            return decompress_opacities(self._opacity)
+        return self.get_cached_activation("opacity", lambda: self.opacity_activation(self._opacity), (self._opacity,))
 
     @property
     def get_raw_opacity(self):
-        return self._opacity
+        return decompress_raw_opacities(self._opacity) if self.compact else self._opacity
+
+    def get_raw_features_dc(self):
+        return decompress_features_dc(self._features_dc) if self.compact else self._features_dc
+
+    def get_raw_features_rest(self):
+        return self._features_rest.float() if self.compact else self._features_rest
+
+    def get_raw_rotation(self):
+        return decompress_quaternions(self._rotation) if self.compact else self._rotation
+
+    def compress(self):
+        """
+        Switches the model to the compact storage mode, which takes about half of the memory of the float32
+        attributes. The attributes are decoded on the device of the model when they are activated for rasterization.
+        The covariance is kept if it was already built, since it can not always be derived from the scales and
+        rotations, e.g. for mixture levels.
+        """
+        if self.compact:
+            return
+
+        self._features_dc = compress_features_dc(self._features_dc)
+        self._features_rest = self._features_rest.half()
+        self._opacity = compress_opacities(self.opacity_activation(self._opacity))
+        self._rotation = compress_quaternions(self._rotation)
+        self.compact = True
+        self.clear_activation_cache()
+
+    def decompress(self):
+        if not self.compact:
+            return
+
+        self._features_dc = self.get_raw_features_dc()
+        self._features_rest = self.get_raw_features_rest()
+        self._opacity = self.get_raw_opacity
+        self._rotation = self.get_raw_rotation()
+        self.compact = False
+        self.clear_activation_cache()
+
+    def sort_by_morton_order(self):
+        """
+        Permutes the splats by the Morton (Z-order) codes of their centers, so that splats that are close in space are
+        also close in memory and the passes over neighbourhoods, like the KD-tree searches of the registration, the
+        voxel downsampling and the mixture building, walk the memory sequentially. The order is kept when the model is
+        saved. Returns the permutation, which maps the new indices of the splats to the previous ones.
+        """
+        with torch.no_grad():
+            order = torch.argsort(compute_morton_codes(self._xyz.detach()))
+
+        self._xyz = self._xyz[order]
+        self._features_dc = self._features_dc[order]
+        self._features_rest = self._features_rest[order]
+        self._scaling = self._scaling[order]
+        self._rotation = self._rotation[order]
+        self._opacity = self._opacity[order]
+        if self._covariance_tensor is not None:
+            self._covariance = self._covariance_tensor[order]
+        self.morton_ordered = True
+        self.clear_activation_cache()
+        return order
+
+    def get_decompressed(self):
+        """
+        Returns the model itself if it is not compact, otherwise a float32 copy of it.
+        """
+        if not self.compact:
+            return self
+
+        new_model = self.get_subset(slice(None))
+        new_model.decompress()
+        return new_model
 
     def get_full_covariance(self, scaling_modifier=1.0):
-        full_covariance = rebuild_lowerdiag(self._covariance)
+        covariance = self._covariance
+        full_covariance = rebuild_lowerdiag(covariance)
         if scaling_modifier == 1:
             return full_covariance
 
-        transformation_matrix = torch.diag_embed(torch.tensor([scaling_modifier] * 3)).to(self._covariance.device)
+        transformation_matrix = torch.diag_embed(torch.tensor([scaling_modifier] * 3, dtype=covariance.dtype,
+                                                              device=covariance.device))
         return transformation_matrix @ full_covariance @ transformation_matrix.T
 
     def get_covariance(self, scaling_modifier=1):
@@ -96,59 +266,69 @@ class GaussianModel:
         return strip_symmetric(transformed_covariances)
 
     def from_ply(self, plydata):
-        xyz = np.stack((np.asarray(plydata.elements[0]["x"]),
-                        np.asarray(plydata.elements[0]["y"]),
-                        np.asarray(plydata.elements[0]["z"])), axis=1)
-        opacities = np.asarray(plydata.elements[0]["opacity"])[..., np.newaxis]
-
-        features_dc = np.zeros((xyz.shape[0], 3, 1))
-        features_dc[:, 0, 0] = np.asarray(plydata.elements[0]["f_dc_0"])
-        features_dc[:, 1, 0] = np.asarray(plydata.elements[0]["f_dc_1"])
-        features_dc[:, 2, 0] = np.asarray(plydata.elements[0]["f_dc_2"])
-
-        extra_f_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("f_rest_")]
-        extra_f_names = sorted(extra_f_names, key=lambda x: int(x.split('_')[-1]))
+        vertices = plydata.elements[0]
+        # Reinterpret the packed vertex records as a single (N, P) float32 matrix. For float-only PLYs this is a view
+        # of the loaded (or memory-mapped) buffer, so no float64 scratch arrays are created.
+        attributes = structured_to_unstructured(vertices.data, dtype=np.float32)
+        self.from_attribute_matrix(attributes, [p.name for p in vertices.properties])
+
+    def from_attribute_matrix(self, attributes, property_names):
+        """
+        Builds the model from an (N, P) float32 matrix, whose columns are the vertex properties of a Gaussian PLY.
+        Groups of adjacent columns are taken as strided views, so on the CPU the tensors share the matrix's memory and
+        are not contiguous, and the SH rest coefficients are a transposed view. Moving the model to a CUDA device copies
+        them into contiguous tensors. The covariance is only computed when it is first accessed.
+        """
+        column_indices = {name: index for index, name in enumerate(property_names)}
+
+        def get_sorted_names(prefix):
+            names = [name for name in property_names if name.startswith(prefix)]
+            return sorted(names, key=lambda x: int(x.split('_')[-1]))
+
+        def select_columns(names):
+            indices = [column_indices[name] for name in names]
+            if not indices:
+                # E.g. the SH rest coefficients of degree 0
+                return attributes[:, :0]
+            if indices == list(range(indices[0], indices[0] + len(indices))):
+                return attributes[:, indices[0]:indices[-1] + 1]
+            return attributes[:, indices]
+
+        extra_f_names = get_sorted_names("f_rest_")
         assert len(extra_f_names) == 3 * (self.sh_degree + 1) ** 2 - 3
-        features_extra = np.zeros((xyz.shape[0], len(extra_f_names)))
-        for idx, attr_name in enumerate(extra_f_names):
-            features_extra[:, idx] = np.asarray(plydata.elements[0][attr_name])
-        # Reshape (P,F*SH_coefficients) to (P, F, SH_coefficients except DC)
-        features_extra = features_extra.reshape((features_extra.shape[0], 3, (self.sh_degree + 1) ** 2 - 1))
-
-        scale_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("scale_")]
-        scale_names = sorted(scale_names, key=lambda x: int(x.split('_')[-1]))
-        scales = np.zeros((xyz.shape[0], len(scale_names)))
-        for idx, attr_name in enumerate(scale_names):
-            scales[:, idx] = np.asarray(plydata.elements[0][attr_name])
-
-        rot_names = [p.name for p in plydata.elements[0].properties if p.name.startswith("rot")]
-        rot_names = sorted(rot_names, key=lambda x: int(x.split('_')[-1]))
-        rots = np.zeros((xyz.shape[0], len(rot_names)))
-        for idx, attr_name in enumerate(rot_names):
-            rots[:, idx] = np.asarray(plydata.elements[0][attr_name])
-
-        self._xyz = torch.tensor(xyz, dtype=torch.float, device=self.device_name)
-        self._features_dc = (torch.tensor(features_dc, dtype=torch.float, device=self.device_name)
-                             .transpose(1, 2).contiguous())
-        self._features_rest = (torch.tensor(features_extra, dtype=torch.float, device=self.device_name).
-                               transpose(1, 2).contiguous())
-        self._opacity = torch.tensor(opacities, dtype=torch.float, device=self.device_name)
-        self._scaling = torch.tensor(scales, dtype=torch.float, device=self.device_name)
-        self._rotation = torch.tensor(rots, dtype=torch.float, device=self.device_name)
-        self._covariance = self.covariance_activation(self.get_scaling, 1.0, self._rotation)
+
+        point_count = attributes.shape[0]
+        xyz = select_columns(["x", "y", "z"])
+        opacities = select_columns(["opacity"])
+        features_dc = select_columns(["f_dc_0", "f_dc_1", "f_dc_2"]).reshape((point_count, 1, 3))
+        # Reshape (P,F*SH_coefficients) to (P, F, SH_coefficients except DC), then swap to (P, SH_coefficients, F)
+        features_extra = (select_columns(extra_f_names)
+                          .reshape((point_count, 3, (self.sh_degree + 1) ** 2 - 1))
+                          .transpose((0, 2, 1)))
+        scales = select_columns(get_sorted_names("scale_"))
+        rots = select_columns(get_sorted_names("rot"))
+
+        self._xyz = torch.from_numpy(xyz).to(self.device_name)
+        self._features_dc = torch.from_numpy(features_dc).to(self.device_name)
+        self._features_rest = torch.from_numpy(features_extra).to(self.device_name)
+        self._opacity = torch.from_numpy(opacities).to(self.device_name)
+        self._scaling = torch.from_numpy(scales).to(self.device_name)
+        self._rotation = torch.from_numpy(rots).to(self.device_name)
+        self._covariance = None
+        self.compact = False
 
     def from_mixture(self, gaussian_mixture: GaussianMixtureModel):
-        self._xyz = torch.tensor(gaussian_mixture.xyz, dtype=torch.float, device=self.device_name)
-        self._features_dc = (torch.tensor(gaussian_mixture.colors, dtype=torch.float, device=self.device_name)
-                             .view(-1, 1, 3))
-        self._features_rest = (torch.tensor(gaussian_mixture.features, dtype=torch.float, device=self.device_name)
+        self._xyz = torch.from_numpy(gaussian_mixture.xyz).to(self.device_name)
+        self._features_dc = torch.from_numpy(gaussian_mixture.colors).to(self.device_name).view(-1, 1, 3)
+        self._features_rest = (torch.from_numpy(gaussian_mixture.features).to(self.device_name)
                                .view(-1, (self.sh_degree + 1) ** 2 - 1, 3))
-        self._opacity = torch.tensor(gaussian_mixture.opacities, dtype=torch.float, device=self.device_name)
-        self._covariance = torch.tensor(gaussian_mixture.covariance, dtype=torch.float, device=self.device_name)
+        self._opacity = torch.from_numpy(gaussian_mixture.opacities).to(self.device_name)
+        self._covariance = torch.from_numpy(gaussian_mixture.covariance).to(self.device_name)
 
         eigenvalues, eigenvectors = self.decompose_covariance_matrix()
         self._scaling = eigenvalues
         self._rotation = matrices_to_quaternions(eigenvectors)
+        self.compact = False
 
     def construct_list_of_attributes(self):
         attribute_list = ['x', 'y', 'z', 'nx', 'ny', 'nz']
@@ -160,28 +340,71 @@ class GaussianModel:
         attribute_list.append('opacity')
         for i in range(self._scaling.shape[1]):
             attribute_list.append('scale_{}'.format(i))
-        for i in range(self._rotation.shape[1]):
+        for i in range(4):
             attribute_list.append('rot_{}'.format(i))
         return attribute_list
 
-    def save_ply(self, path):
+    def construct_attribute_matrix(self):
+        """
+        Returns the attributes of the model as an (N, P) float32 matrix, whose columns follow
+        construct_list_of_attributes.
+        """
         xyz = self._xyz.detach().cpu().numpy()
         normals = np.zeros_like(xyz)
-        f_dc = self._features_dc.detach().transpose(1, 2).flatten(start_dim=1).contiguous().cpu().numpy()
-        f_rest = self._features_rest.detach().transpose(1, 2).flatten(start_dim=1).contiguous().cpu().numpy()
-        opacities = self._opacity.detach().cpu().numpy()
+        f_dc = self.get_raw_features_dc().detach().transpose(1, 2).flatten(start_dim=1).contiguous().cpu().numpy()
+        f_rest = self.get_raw_features_rest().detach().transpose(1, 2).flatten(start_dim=1).contiguous().cpu().numpy()
+        opacities = self.get_raw_opacity.detach().cpu().numpy()
         scale = self._scaling.detach().cpu().numpy()
-        rotation = self._rotation.detach().cpu().numpy()
+        rotation = self.get_raw_rotation().detach().cpu().numpy()
+
+        return np.concatenate((xyz, normals, f_dc, f_rest, opacities, scale, rotation), axis=1, dtype=np.float32)
 
+    def save_ply(self, path):
+        attributes = self.construct_attribute_matrix()
         dtype_full = [(attribute, 'f4') for attribute in self.construct_list_of_attributes()]
 
-        elements = np.empty(xyz.shape[0], dtype=dtype_full)
-        attributes = np.concatenate((xyz, normals, f_dc, f_rest, opacities, scale, rotation), axis=1)
-        elements[:] = list(map(tuple, attributes))
+        # Every row of the contiguous float32 matrix has the memory layout of one vertex record,
+        # so it can be reinterpreted as the structured array in bulk.
+        elements = attributes.view(dtype_full).reshape(-1)
         el = PlyElement.describe(elements, 'vertex')
-        plydata = PlyData([el])
+        plydata = PlyData([el], comments=[MORTON_ORDER_COMMENT] if self.morton_ordered else [])
         plydata.write(path)
 
+    def get_compact_arrays(self):
+        """
+        Returns the attributes in the compact storage mode as numpy arrays named after COMPACT_ARRAY_NAMES, without
+        modifying the model.
+        """
+        model = self
+        if not self.compact:
+            model = self.get_subset(slice(None))
+            model.compress()
+
+        tensors = (model._xyz, model._scaling, model._features_dc, model._features_rest, model._opacity,
+                   model._rotation)
+        return {name: tensor.detach().cpu().numpy() for name, tensor in zip(COMPACT_ARRAY_NAMES, tensors)}
+
+    def save_compact(self, path):
+        """
+        Saves the model in the compact format, an uncompressed numpy archive of the compact attributes, which takes
+        about half of the size of the PLY.
+        """
+        arrays = self.get_compact_arrays()
+        # Written through a file object, so that numpy does not append the .npz extension
+        with open(path, "wb") as f:
+            np.savez(f, format_version=np.array(COMPACT_FORMAT_VERSION), sh_degree=np.array(self.sh_degree),
+                     morton_ordered=np.array(self.morton_ordered), **arrays)
+
+    def from_compact_arrays(self, arrays):
+        self._xyz = torch.from_numpy(arrays["xyz"]).to(self.device_name)
+        self._scaling = torch.from_numpy(arrays["scaling"]).to(self.device_name)
+        self._features_dc = torch.from_numpy(arrays["features_dc"]).to(self.device_name)
+        self._features_rest = torch.from_numpy(arrays["features_rest"]).to(self.device_name)
+        self._opacity = torch.from_numpy(arrays["opacity"]).to(self.device_name)
+        self._rotation = torch.from_numpy(arrays["rotation"]).to(self.device_name)
+        self._covariance = None
+        self.compact = True
+
     def clone_gaussian(self):
         new_model = GaussianModel(3)
         new_model._covariance = self._covariance.clone().detach()
@@ -191,6 +414,24 @@ class GaussianModel:
         new_model._features_dc = self._features_dc.clone().detach()
         new_model._features_rest = self._features_rest.clone().detach()
         new_model._opacity = self._opacity.clone().detach()
+        new_model.compact = self.compact
+        new_model.morton_ordered = self.morton_ordered
+        return new_model
+
+    def get_subset(self, indices):
+        """
+        Returns a model of the splats at the indices. The covariance of the subset is only derived from its scales and
+        rotations when the covariance of this model was not built yet.
+        """
+        new_model = GaussianModel(self.sh_degree, self.device_name)
+        new_model._xyz = self._xyz[indices]
+        new_model._rotation = self._rotation[indices]
+        new_model._scaling = self._scaling[indices]
+        new_model._features_dc = self._features_dc[indices]
+        new_model._features_rest = self._features_rest[indices]
+        new_model._opacity = self._opacity[indices]
+        new_model._covariance = None if self._covariance_tensor is None else self._covariance_tensor[indices]
+        new_model.compact = self.compact
         return new_model
 
     def quat_multiply(self, quaternion0, quaternion1):
@@ -204,32 +445,64 @@ class GaussianModel:
             x1 * y0 - y1 * x0 + z1 * w0 + w1 * z0
         ), dim=-1)
 
-    def transform_gaussian_model(self, transformation_matrix):
+    def get_transformed_attributes(self, transformation_matrix):
+        """
+        Returns the positions, covariances and rotations of the splats transformed by the 4x4 matrix, without
+        modifying the model.
+        """
         rotation_matrix = transformation_matrix[:3, :3]
-        self._xyz = torch.matmul(self._xyz, rotation_matrix.T)
-        self._xyz += transformation_matrix[:3, 3]
+        xyz = torch.matmul(self._xyz, rotation_matrix.T)
+        xyz += transformation_matrix[:3, 3]
 
         transformed_covariances = rotation_matrix @ self.get_full_covariance() @ rotation_matrix.transpose(
             0, 1)
-        self._covariance = strip_symmetric(transformed_covariances)
+        covariance = strip_symmetric(transformed_covariances)
 
         quaternions = matrix_to_quaternion(rotation_matrix).unsqueeze(0).to(self._rotation.device)
-        rotations_from_quats = self.quat_multiply(self._rotation, quaternions)
-        self._rotation = rotations_from_quats / torch.norm(rotations_from_quats, p=2, dim=-1, keepdim=True)
-        pass
+        rotations_from_quats = self.quat_multiply(self.get_raw_rotation(), quaternions)
+        rotation = rotations_from_quats / torch.norm(rotations_from_quats, p=2, dim=-1, keepdim=True)
+        return xyz, covariance, rotation
+
+    def transform_gaussian_model(self, transformation_matrix):
+        self._xyz, self._covariance, self._rotation = self.get_transformed_attributes(transformation_matrix)
+        if self.compact:
+            self._rotation = compress_quaternions(self._rotation)
+
+    def update_transformed_slice(self, gaussian, transformation_matrix, start=0):
+        """
+        Overwrites the positions, covariances and rotations of the splats [start, start + len(gaussian)) in place with
+        those of gaussian transformed by the matrix, e.g. the first point cloud of a merged model. The other
+        attributes are not touched, so a new transformation can be applied without rebuilding the merged model.
+        """
+        end = start + gaussian._xyz.shape[0]
+        if transformation_matrix is None or torch.equal(
+                transformation_matrix, torch.eye(4, dtype=transformation_matrix.dtype,
+                                                 device=transformation_matrix.device)):
+            xyz, covariance, rotation = gaussian._xyz, gaussian._covariance, gaussian.get_raw_rotation()
+        else:
+            xyz, covariance, rotation = gaussian.get_transformed_attributes(transformation_matrix)
+        if self.compact:
+            rotation = compress_quaternions(rotation)
+
+        self._xyz[start:end].copy_(xyz)
+        self._covariance[start:end].copy_(covariance)
+        self._rotation[start:end].copy_(rotation)
 
     def move_to_device(self, device_name):
         if self.device_name == device_name:
             return
 
         self.device_name = device_name
+        # The cached activations would keep the tensors on the previous device alive
+        self.clear_activation_cache()
         self._xyz = self._xyz.to(device_name)
         self._features_dc = self._features_dc.to(device_name)
         self._features_rest = self._features_rest.to(device_name)
         self._scaling = self._scaling.to(device_name)
         self._rotation = self._rotation.to(device_name)
         self._opacity = self._opacity.to(device_name)
-        self._covariance = self._covariance.to(device_name)
+        if self._covariance_tensor is not None:
+            self._covariance = self._covariance.to(device_name)
 
     """
     Executes eigendecomposition of the covariance matrix. The function is not used, but left in for completeness.
@@ -264,6 +537,11 @@ class GaussianModel:
     @staticmethod
     def get_merged_gaussian_point_clouds(gaussian1, gaussian2, transformation_matrix):
         merged_pc = GaussianModel(3)
+        # The merged point cloud is only compact if both point clouds are
+        if gaussian1.compact != gaussian2.compact:
+            gaussian1 = gaussian1.get_decompressed()
+            gaussian2 = gaussian2.get_decompressed()
+        merged_pc.compact = gaussian1.compact
         gaussian1_copy = gaussian1
 
         # If the transformation matrix is not an identity matrix
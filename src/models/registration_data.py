@@ -58,3 +58,23 @@ class MultiScaleRegistrationData(BaseLocalRegistrationData):
         self.iteration_values = iteration_values
         self.used_sparse_clouds = used_sparse_clouds
         self.used_gaussian_mixtures = used_gaussian_mixtures
+
+
+class GlobalRegistrationData(object):
+    registration_type: str
+    initial_transformation: np.ndarray
+    voxel_size: float
+
+    result_fitness: float
+    result_inlier_rmse: float
+    result_transformation: np.ndarray
+
+    def __init__(self, registration_type, initial_transformation, voxel_size, result_fitness, result_inlier_rmse,
+                 result_transformation):
+        super().__init__()
+        self.registration_type = registration_type
+        self.initial_transformation = initial_transformation
+        self.voxel_size = voxel_size
+        self.result_fitness = result_fitness
+        self.result_inlier_rmse = result_inlier_rmse
+        self.result_transformation = result_transformation
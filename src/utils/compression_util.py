@@ -0,0 +1,79 @@
+"""
+Quantization of the Gaussian attributes for the compact storage mode of GaussianModel. The quantization parameters are
+fixed rather than fitted to a model, so the compressed attributes of different models can be concatenated when point
+clouds are merged.
+"""
+
+import math
+
+import torch
+
+from src.utils.general_utils import inverse_sigmoid
+
+SH_C0 = 0.28209479177387814
+# The DC coefficients are quantized to 8 bits over the range of the colors from -0.5 to 1.5
+DC_LIMIT = 1.0 / SH_C0
+# Bits per stored component of the smallest three quaternion encoding, the remaining 2 bits of the 32 bit code hold the
+# index of the largest component
+ROTATION_BITS = 10
+
+
+def compress_features_dc(features_dc):
+    codes = (features_dc.float().clamp(-DC_LIMIT, DC_LIMIT) + DC_LIMIT) * (255 / (2 * DC_LIMIT))
+    return torch.round(codes).to(torch.uint8)
+
+
+def decompress_features_dc(codes):
+    return codes.float() * (2 * DC_LIMIT / 255) - DC_LIMIT
+
+
+def compress_opacities(opacities):
+    """
+    Quantizes the activated opacities to 8 bits.
+    """
+    return torch.round(opacities.float().clamp(0, 1) * 255).to(torch.uint8)
+
+
+def decompress_opacities(codes):
+    return codes.float() / 255
+
+
+def decompress_raw_opacities(codes):
+    # The outermost levels are moved half a step inwards, so that their logits are finite
+    return inverse_sigmoid(decompress_opacities(codes).clamp(0.5 / 255, 254.5 / 255))
+
+
+def compress_quaternions(quaternions):
+    """
+    Encodes the (N, 4) quaternions as (N,) int32 codes with the smallest three method. The largest component is
+    left out and restored from the unit length, the other three lie within +-1/sqrt(2) and are quantized to
+    ROTATION_BITS bits each.
+    """
+    quaternions = torch.nn.functional.normalize(quaternions.float(), dim=1)
+    largest = quaternions.abs().argmax(dim=1)
+    # q and -q are the same rotation, so the largest component can be made positive
+    signs = torch.where(quaternions.gather(1, largest[:, None]) < 0, -1.0, 1.0)
+    quaternions = quaternions * signs
+
+    others = quaternions[torch.arange(4, device=quaternions.device) != largest[:, None]].view(-1, 3)
+    levels = (1 << ROTATION_BITS) - 1
+    codes = torch.round((others * math.sqrt(2) + 1) * (levels / 2)).clamp(0, levels).to(torch.int32)
+    return ((largest.to(torch.int32) << (3 * ROTATION_BITS)) | (codes[:, 0] << (2 * ROTATION_BITS))
+            | (codes[:, 1] << ROTATION_BITS) | codes[:, 2])
+
+
+def decompress_quaternions(codes):
+    """
+    Decodes the int32 codes of compress_quaternions into (N, 4) unit quaternions.
+    """
+    levels = (1 << ROTATION_BITS) - 1
+    largest = (codes >> (3 * ROTATION_BITS)) & 3
+    others = torch.stack(((codes >> (2 * ROTATION_BITS)) & levels, (codes >> ROTATION_BITS) & levels,
+                          codes & levels), dim=1)
+    others = (others.float() * (2 / levels) - 1) / math.sqrt(2)
+
+    quaternions = torch.empty((codes.shape[0], 4), dtype=torch.float32, device=codes.device)
+    quaternions[torch.arange(4, device=codes.device) != largest[:, None]] = others.view(-1)
+    quaternions[torch.arange(codes.shape[0], device=codes.device), largest] = (
+        (1 - (others * others).sum(dim=1)).clamp_min(0).sqrt())
+    return quaternions
@@ -0,0 +1,284 @@
+"""
+Tile based splatting on the CPU, for machines without a CUDA device. The stages follow gsplat's rasterization: the
+splats are projected with the EWA approximation, binned into 16x16 pixel tiles, sorted by depth within every tile and
+alpha composited front to back with the same thresholds, so the images match the ones rendered by gsplat.
+The tiles are composited on a thread pool, the per tile work is vectorized over splats and pixels.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+# Constants of the real spherical harmonics, in the order of the coefficients of the 3DGS models
+SH_C0 = 0.28209479177387814
+SH_C1 = 0.4886025119029199
+SH_C2 = (1.0925484305920792, -1.0925484305920792, 0.31539156525252005, -1.0925484305920792, 0.5462742152960396)
+SH_C3 = (-0.5900435899266435, 2.890611442640554, -0.4570457994644658, 0.3731763325901154, -0.4570457994644658,
+         1.445305721320277, -0.5900435899266435)
+
+# Thresholds of gsplat's compositing
+MIN_ALPHA = 1.0 / 255.0
+MAX_ALPHA = 0.999
+MIN_TRANSMITTANCE = 1e-4
+MAX_EXPONENT = 80.0
+
+
+def evaluate_spherical_harmonics(degree, coefficients, directions):
+    """
+    Evaluates the (N, K, 3) spherical harmonics coefficients in the (N, 3) unit directions up to the degree (at most
+    3). Returns the (N, 3) colors.
+    """
+    result = SH_C0 * coefficients[:, 0]
+    if degree < 1:
+        return result
+
+    x, y, z = (directions[:, i:i + 1] for i in range(3))
+    result = result - SH_C1 * y * coefficients[:, 1] + SH_C1 * z * coefficients[:, 2] - SH_C1 * x * coefficients[:, 3]
+    if degree < 2:
+        return result
+
+    xx, yy, zz = x * x, y * y, z * z
+    xy, yz, xz = x * y, y * z, x * z
+    result = (result
+              + SH_C2[0] * xy * coefficients[:, 4]
+              + SH_C2[1] * yz * coefficients[:, 5]
+              + SH_C2[2] * (2.0 * zz - xx - yy) * coefficients[:, 6]
+              + SH_C2[3] * xz * coefficients[:, 7]
+              + SH_C2[4] * (xx - yy) * coefficients[:, 8])
+    if degree < 3:
+        return result
+
+    return (result
+            + SH_C3[0] * y * (3 * xx - yy) * coefficients[:, 9]
+            + SH_C3[1] * xy * z * coefficients[:, 10]
+            + SH_C3[2] * y * (4 * zz - xx - yy) * coefficients[:, 11]
+            + SH_C3[3] * z * (2 * zz - 3 * xx - 3 * yy) * coefficients[:, 12]
+            + SH_C3[4] * x * (4 * zz - xx - yy) * coefficients[:, 13]
+            + SH_C3[5] * z * (xx - yy) * coefficients[:, 14]
+            + SH_C3[6] * x * (xx - 3 * yy) * coefficients[:, 15])
+
+
+def project_gaussians(means, covariances, viewmat, intrinsics, width, height, eps2d=0.3, near_plane=0.01,
+                      far_plane=1e10, radius_clip=0.0):
+    """
+    Projects the splats into the image. Returns the (N, 2) pixel positions, the depths, the (N, 3) upper triangles of
+    the inverse 2D covariances and the pixel radii, which are 0 for splats that are not rendered.
+    """
+    rotation = viewmat[:3, :3]
+    means_camera = means @ rotation.T + viewmat[:3, 3]
+
+    fx, fy = intrinsics[0, 0], intrinsics[1, 1]
+    cx, cy = intrinsics[0, 2], intrinsics[1, 2]
+    tx, ty, tz = means_camera.unbind(dim=1)
+
+    # The Jacobian is evaluated at most 30% of the field of view outside of the image, like in gsplat
+    tan_fov_x = 0.5 * width / fx
+    tan_fov_y = 0.5 * height / fy
+    clamped_x = tz * torch.clamp(tx / tz, min=-(cx / fx + 0.3 * tan_fov_x), max=(width - cx) / fx + 0.3 * tan_fov_x)
+    clamped_y = tz * torch.clamp(ty / tz, min=-(cy / fy + 0.3 * tan_fov_y), max=(height - cy) / fy + 0.3 * tan_fov_y)
+
+    zeros = torch.zeros_like(tz)
+    jacobian = torch.stack((fx / tz, zeros, -fx * clamped_x / (tz * tz),
+                            zeros, fy / tz, -fy * clamped_y / (tz * tz)), dim=1).view(-1, 2, 3)
+    # J R Sigma R^T J^T, with the 2x3 J R computed first and only the upper triangle of the result
+    transform = jacobian @ rotation
+    transformed = transform @ covariances
+    means_2d = torch.stack((fx * tx / tz + cx, fy * ty / tz + cy), dim=1)
+
+    # Low pass filter, so that every splat covers at least a pixel
+    a = (transformed[:, 0] * transform[:, 0]).sum(dim=1) + eps2d
+    b = (transformed[:, 0] * transform[:, 1]).sum(dim=1)
+    c = (transformed[:, 1] * transform[:, 1]).sum(dim=1) + eps2d
+    determinant = a * c - b * b
+    safe_determinant = determinant.clamp_min(1e-10)
+    conics = torch.stack((c / safe_determinant, -b / safe_determinant, a / safe_determinant), dim=1)
+
+    mid = 0.5 * (a + c)
+    radii = torch.ceil(3.0 * torch.sqrt(mid + torch.sqrt((mid * mid - safe_determinant).clamp_min(0.01))))
+
+    valid = (determinant > 0) & (tz > near_plane) & (tz < far_plane) & (radii > radius_clip)
+    valid &= ((means_2d[:, 0] + radii > 0) & (means_2d[:, 0] - radii < width)
+              & (means_2d[:, 1] + radii > 0) & (means_2d[:, 1] - radii < height))
+    radii = torch.where(valid, radii, torch.zeros_like(radii))
+    return means_2d, tz, conics, radii
+
+
+def bin_gaussians(means_2d, depths, radii, tile_size, tile_columns, tile_rows):
+    """
+    Assigns the splats to the tiles their bounding squares overlap. Returns the splat indices sorted by tile and by
+    depth within every tile, and the (tile_count + 1) offsets of the tiles in them.
+    """
+    # The splats are sorted by depth before they are repeated for their tiles, a stable sort by tile keeps the order
+    visible = torch.nonzero(radii > 0).view(-1)
+    visible = visible[torch.sort(depths[visible], stable=True).indices]
+    tile_means = means_2d[visible] / tile_size
+    tile_radii = (radii[visible] / tile_size)[:, None]
+    tile_min = torch.floor(tile_means - tile_radii).long()
+    tile_max = torch.ceil(tile_means + tile_radii).long()
+    tile_min[:, 0].clamp_(0, tile_columns)
+    tile_min[:, 1].clamp_(0, tile_rows)
+    tile_max[:, 0].clamp_(0, tile_columns)
+    tile_max[:, 1].clamp_(0, tile_rows)
+
+    tile_extents = tile_max - tile_min
+    tiles_per_gaussian = tile_extents[:, 0] * tile_extents[:, 1]
+    nonempty = tiles_per_gaussian > 0
+    visible, tile_min, tile_extents, tiles_per_gaussian = (visible[nonempty], tile_min[nonempty],
+                                                           tile_extents[nonempty], tiles_per_gaussian[nonempty])
+
+    # One entry per overlapped tile of every splat, enumerating the tiles of its rectangle row by row
+    intersection_count = int(tiles_per_gaussian.sum().item())
+    gaussian_ids = torch.repeat_interleave(visible, tiles_per_gaussian)
+    first_intersection = torch.repeat_interleave(torch.cumsum(tiles_per_gaussian, 0) - tiles_per_gaussian,
+                                                 tiles_per_gaussian)
+    local_index = torch.arange(intersection_count) - first_intersection
+    repeated_extent_x = torch.repeat_interleave(tile_extents[:, 0], tiles_per_gaussian)
+    repeated_min = torch.repeat_interleave(tile_min, tiles_per_gaussian, dim=0)
+    tile_x = repeated_min[:, 0] + local_index % repeated_extent_x
+    tile_y = repeated_min[:, 1] + local_index // repeated_extent_x
+    tile_ids = tile_y * tile_columns + tile_x
+
+    tile_order = torch.sort(tile_ids, stable=True).indices
+    tile_ids, gaussian_ids = tile_ids[tile_order], gaussian_ids[tile_order]
+
+    tile_counts = torch.bincount(tile_ids, minlength=tile_columns * tile_rows)
+    offsets = torch.zeros(tile_columns * tile_rows + 1, dtype=torch.long)
+    offsets[1:] = torch.cumsum(tile_counts, 0)
+    return gaussian_ids, offsets
+
+
+def composite_tiles(tile_ids, offsets, means_2d, conics, opacities, colors, tile_size, tile_columns,
+                    chunk_size=64):
+    """
+    Alpha composites the depth sorted splats of a batch of tiles front to back over their pixels. The splats of the
+    tiles are padded to the largest count in the batch, and processed in chunks of chunk_size splats.
+    Returns the (B, tile_size * tile_size, 3) colors and the transmittances of the pixels.
+    """
+    starts = offsets[tile_ids]
+    counts = offsets[tile_ids + 1] - starts
+    tile_count = tile_ids.shape[0]
+    max_count = int(counts.max().item())
+
+    # The offsets of a splat to the pixels of a tile only depend on the column or the row of the pixel, so the
+    # exponent is combined from tile_size x and y terms
+    local = torch.arange(tile_size, dtype=torch.float32) + 0.5
+    pixel_x = (tile_ids % tile_columns * tile_size)[:, None, None] + local
+    pixel_y = (tile_ids // tile_columns * tile_size)[:, None, None] + local
+
+    pixel_count = tile_size * tile_size
+    transmittance = torch.ones(tile_count, 1, pixel_count)
+    active = torch.ones(tile_count, 1, pixel_count, dtype=torch.bool)
+    color = torch.zeros(tile_count, pixel_count, 3)
+
+    for chunk_start in range(0, max_count, chunk_size):
+        slots = torch.arange(chunk_start, min(chunk_start + chunk_size, max_count))
+        in_tile = slots[None, :] < counts[:, None]
+        indices = torch.where(in_tile, starts[:, None] + slots[None, :], torch.zeros_like(slots[None, :]))
+
+        dx = means_2d[indices, 0, None] - pixel_x
+        dy = means_2d[indices, 1, None] - pixel_y
+        conic = conics[indices]
+        # Pixels are ordered by row, sigma = a dx^2 / 2 + c dy^2 / 2 + b dx dy
+        sigma_x = 0.5 * conic[..., 0, None] * dx * dx
+        sigma_y = 0.5 * conic[..., 2, None] * dy * dy
+        sigma = (sigma_y[..., :, None] + sigma_x[..., None, :]
+                 + dy[..., :, None] * (conic[..., 1, None] * dx)[..., None, :]).view(*indices.shape, pixel_count)
+        # Larger exponents give alphas far below MIN_ALPHA, and denormal results, which are slow to compute
+        alpha = torch.clamp_max(opacities[indices, None] * torch.exp(-sigma.clamp_max(MAX_EXPONENT)), MAX_ALPHA)
+        alpha = torch.where((sigma >= 0) & (alpha >= MIN_ALPHA) & in_tile[..., None] & active, alpha,
+                            torch.zeros_like(alpha))
+
+        # Transmittance after every splat. A pixel is finished before the first splat that would make it opaque
+        remaining = transmittance * torch.cumprod(1 - alpha, dim=1)
+        included = remaining > MIN_TRANSMITTANCE
+        previous = torch.cat((transmittance, remaining[:, :-1]), dim=1)
+        weights = alpha * previous * included
+        color += weights.transpose(1, 2) @ colors[indices]
+
+        transmittance = torch.minimum(transmittance, torch.where(included, remaining, torch.ones_like(remaining))
+                                      .amin(dim=1, keepdim=True))
+        active &= included[:, -1:]
+        if not active.any():
+            break
+
+    return color, transmittance.view(tile_count, pixel_count)
+
+
+def get_tile_batches(tile_counts, max_splats):
+    """
+    Groups the non-empty tiles into batches of tiles with similar splat counts, so that little work is wasted on the
+    padding. A batch holds at most max_splats splats including the padding, unless a single tile has more.
+    """
+    tile_ids = torch.nonzero(tile_counts).view(-1)
+    tile_ids = tile_ids[torch.sort(tile_counts[tile_ids], stable=True).indices]
+    sorted_counts = tile_counts[tile_ids].tolist()
+
+    batches = []
+    batch_start = 0
+    for index, count in enumerate(sorted_counts):
+        # The counts are ascending, so the current tile has the largest count of the batch
+        if (index - batch_start + 1) * count > max_splats and index > batch_start:
+            batches.append(tile_ids[batch_start:index])
+            batch_start = index
+    if batch_start < len(sorted_counts):
+        batches.append(tile_ids[batch_start:])
+    return batches
+
+
+@torch.no_grad()
+def rasterize_cpu(means, covariances, opacities, sh_coefficients, viewmat, intrinsics, width, height, sh_degree=3,
+                  background=None, radius_clip=0.0, tile_size=16, thread_count=None, max_batch_splats=4096):
+    """
+    Renders the splats into a (H, W, 3) float image on the CPU. The inputs are the (N, 3) means, (N, 3, 3)
+    covariances, activated (N,) opacities and (N, K, 3) spherical harmonics coefficients in world space, the (4, 4)
+    world to camera matrix and the (3, 3) intrinsics. The coefficients can also be given as a sequence of tensors that
+    are concatenated along the coefficients, which avoids copying the coefficients of the splats out of view.
+    """
+    means = means.float().cpu()
+    viewmat = viewmat.float().cpu()
+    intrinsics = intrinsics.float().cpu()
+    background = torch.zeros(3) if background is None else background.float().cpu().view(3)
+
+    means_2d, depths, conics, radii = project_gaussians(means, covariances.float().cpu(), viewmat, intrinsics,
+                                                        width, height, radius_clip=radius_clip)
+
+    tile_columns = (width + tile_size - 1) // tile_size
+    tile_rows = (height + tile_size - 1) // tile_size
+    gaussian_ids, offsets = bin_gaussians(means_2d, depths, radii, tile_size, tile_columns, tile_rows)
+
+    # Only the colors of the splats in view are evaluated
+    used_ids, inverse = torch.unique(gaussian_ids, return_inverse=True)
+    camera_position = -viewmat[:3, :3].T @ viewmat[:3, 3]
+    directions = torch.nn.functional.normalize(means[used_ids] - camera_position, dim=1)
+    if isinstance(sh_coefficients, torch.Tensor):
+        used_coefficients = sh_coefficients[used_ids]
+    else:
+        used_coefficients = torch.cat([coefficients[used_ids] for coefficients in sh_coefficients], dim=1)
+    degree = min(sh_degree, int(math.isqrt(used_coefficients.shape[1])) - 1)
+    colors = evaluate_spherical_harmonics(degree, used_coefficients.float().cpu(), directions)
+    colors = torch.clamp_min(colors + 0.5, 0.0)
+
+    # The attributes of the splats in the order of the tiles, so that every tile reads a contiguous range
+    tile_means = means_2d[gaussian_ids]
+    tile_conics = conics[gaussian_ids]
+    tile_opacities = opacities.float().cpu().view(-1)[gaussian_ids]
+    tile_colors = colors[inverse]
+
+    # The image is rendered tile by tile into a buffer padded to whole tiles
+    pixel_count = tile_size * tile_size
+    tiles = background.expand(tile_columns * tile_rows, pixel_count, 3).clone()
+
+    def render_batch(tile_ids):
+        color, transmittance = composite_tiles(tile_ids, offsets, tile_means, tile_conics, tile_opacities,
+                                               tile_colors, tile_size, tile_columns)
+        tiles[tile_ids] = color + transmittance[..., None] * background
+
+    batches = get_tile_batches(offsets[1:] - offsets[:-1], max_batch_splats)
+    with ThreadPoolExecutor(max_workers=thread_count or os.cpu_count()) as executor:
+        # Consume the results, so that errors of the batches are raised
+        list(executor.map(render_batch, batches))
+
+    image = tiles.view(tile_rows, tile_columns, tile_size, tile_size, 3).permute(0, 2, 1, 3, 4)
+    return image.reshape(tile_rows * tile_size, tile_columns * tile_size, 3)[:height, :width].contiguous()
@@ -0,0 +1,212 @@
+import time
+import weakref
+
+import torch
+
+from src.models.gaussian_model import GaussianModel
+
+# Splats with a lower activated opacity can not change a pixel, since gsplat skips alphas below 1/255
+MIN_OPACITY = 1.0 / 255.0
+
+
+def get_splat_radii(point_cloud: GaussianModel, indices=None):
+    """
+    Returns radii that bound three standard deviations of the splats at the indices, or of every splat.
+    """
+    indices = slice(None) if indices is None else indices
+    if point_cloud._covariance_tensor is None:
+        # The scales bound the standard deviation, the covariance does not have to be built
+        radii = point_cloud.get_scaling[indices].amax(dim=1)
+    else:
+        # The root of the trace bounds the largest standard deviation
+        covariance = point_cloud._covariance[indices]
+        radii = (covariance[:, 0] + covariance[:, 3] + covariance[:, 5]).clamp_min(0).sqrt()
+    return 3 * radii.float()
+
+
+class SplatGrid:
+    """
+    Uniform grid over the centers of the splats of a point cloud. The splats are sorted by their cell, so the splats of
+    a cell are a contiguous range. Every cell stores a bounding sphere of its splats, so that whole cells can be tested
+    against the view frustum before the splats in the visible cells are tested one by one.
+    The bounding radius of a splat is given by get_splat_radii. Splats that are transparent are left out of the grid.
+    """
+
+    def __init__(self, point_cloud: GaussianModel, min_opacity=MIN_OPACITY, splats_per_cell=256, max_resolution=128):
+        with torch.no_grad():
+            opacities = point_cloud.get_opacity_with_activation.view(-1)
+            opaque_indices = torch.nonzero(opacities >= min_opacity).view(-1)
+            self.splat_count = opacities.shape[0]
+            self.opacity_culled_count = self.splat_count - opaque_indices.shape[0]
+
+            centers = point_cloud.get_xyz[opaque_indices].float()
+            radii = get_splat_radii(point_cloud, opaque_indices)
+
+            self.build(opaque_indices, centers, radii, splats_per_cell, max_resolution)
+
+    def build(self, splat_indices, centers, radii, splats_per_cell, max_resolution):
+        device = centers.device
+        if centers.shape[0] == 0:
+            self.splat_indices = splat_indices
+            self.centers = centers
+            self.radii = radii
+            self.cell_centers = torch.empty((0, 3), device=device)
+            self.cell_half_diagonal = 0.0
+            self.cell_max_radii = torch.empty(0, device=device)
+            self.cell_starts = torch.empty(0, dtype=torch.long, device=device)
+            self.cell_counts = torch.empty(0, dtype=torch.long, device=device)
+            return
+
+        min_bound = centers.min(dim=0).values
+        extent = (centers.max(dim=0).values - min_bound).clamp_min(1e-6)
+
+        # Cubic cells, sized so that a cell holds splats_per_cell splats on average if the splats filled the volume
+        cell_count = max(1.0, centers.shape[0] / splats_per_cell)
+        cell_size = (extent.prod() / cell_count).pow(1 / 3).item()
+        cell_size = max(cell_size, extent.max().item() / max_resolution)
+        resolution = (extent / cell_size).ceil().long().clamp(1, max_resolution)
+
+        cell_coordinates = ((centers - min_bound) / cell_size).long()
+        cell_coordinates = torch.minimum(cell_coordinates, resolution - 1)
+        cell_ids = ((cell_coordinates[:, 0] * resolution[1] + cell_coordinates[:, 1]) * resolution[2]
+                    + cell_coordinates[:, 2])
+
+        cell_ids, order = torch.sort(cell_ids)
+        unique_ids, counts = torch.unique_consecutive(cell_ids, return_counts=True)
+
+        self.splat_indices = splat_indices[order]
+        self.centers = centers[order]
+        self.radii = radii[order]
+
+        self.cell_counts = counts
+        self.cell_starts = torch.cumsum(counts, dim=0) - counts
+        unique_coordinates = torch.stack((unique_ids // (resolution[1] * resolution[2]),
+                                          (unique_ids // resolution[2]) % resolution[1],
+                                          unique_ids % resolution[2]), dim=1)
+        self.cell_centers = min_bound + (unique_coordinates.float() + 0.5) * cell_size
+        self.cell_half_diagonal = cell_size * 3 ** 0.5 / 2
+        cell_indices = torch.repeat_interleave(torch.arange(counts.shape[0], device=device), counts)
+        self.cell_max_radii = torch.zeros(counts.shape[0], device=device).scatter_reduce(
+            0, cell_indices, self.radii, reduce="amax", include_self=False)
+
+    @property
+    def cell_count(self):
+        return self.cell_counts.shape[0]
+
+    def get_visible_indices(self, normals, offsets, scale=1.0):
+        """
+        Returns the indices of the splats whose bounding spheres are on the inner side of every plane, where a plane
+        is given by its world space unit normal and offset. Also returns the number of visible cells.
+        """
+        cell_distances = self.cell_centers @ normals.T + offsets
+        cell_radii = self.cell_half_diagonal + scale * self.cell_max_radii
+        visible_cells = (cell_distances >= -cell_radii[:, None]).all(dim=1)
+
+        counts = self.cell_counts[visible_cells]
+        starts = self.cell_starts[visible_cells]
+        candidate_count = int(counts.sum().item())
+        # Positions of the splats of the visible cells in the sorted arrays
+        candidates = (torch.repeat_interleave(starts - (torch.cumsum(counts, dim=0) - counts), counts)
+                      + torch.arange(candidate_count, device=counts.device))
+
+        distances = self.centers[candidates] @ normals.T + offsets
+        visible = (distances >= -scale * self.radii[candidates, None]).all(dim=1)
+        return self.splat_indices[candidates[visible]], int(visible_cells.sum().item())
+
+
+class SplatCuller:
+    """
+    Selects the splats that are potentially visible from a camera, so that only those are activated and rasterized.
+    The grids of the point clouds are cached and rebuilt when a tensor of the point cloud is replaced or modified in
+    place, e.g. when a transformation is applied to the first point cloud of a merged point cloud.
+    """
+
+    def __init__(self, min_opacity=MIN_OPACITY, near_plane=0.01, margin=2.0, min_culled_share=0.2,
+                 max_cached_grids=4):
+        self.min_opacity = min_opacity
+        self.near_plane = near_plane
+        self.margin = margin  # Pixels added around the image, e.g. for sub-pixel jitter
+        # Gathering the visible splats costs more than rasterizing a few invisible ones, so the whole point cloud is
+        # rendered if less than this share of the splats would be culled
+        self.min_culled_share = min_culled_share
+        self.max_cached_grids = max_cached_grids
+
+        self.grids = {}
+        self.last_stats = {}
+        self.total_time = 0.0  # Time spent in get_visible_indices over all calls
+
+    def get_grid(self, point_cloud: GaussianModel):
+        # The version of the point cloud changes when one of its tensors is replaced or modified in place
+        version = point_cloud.update_version()
+        cached = self.grids.pop(id(point_cloud), None)
+        if cached is not None and cached[0]() is point_cloud and cached[1] == version:
+            grid = cached[2]
+        else:
+            grid = SplatGrid(point_cloud, self.min_opacity)
+
+        # Most recently used grids are kept at the end
+        self.grids[id(point_cloud)] = (weakref.ref(point_cloud), version, grid)
+        while len(self.grids) > self.max_cached_grids:
+            del self.grids[next(iter(self.grids))]
+        return grid
+
+    def get_frustum_planes(self, camera, device):
+        """
+        Returns the unit normals and offsets of the left, right, top, bottom and near planes of the camera in world
+        space, with the normals pointing inwards.
+        """
+        viewmat = camera.viewmat[0].to(device=device, dtype=torch.float32)
+        intrinsics = camera.intrinsics[0]
+        fx, fy = intrinsics[0, 0].item(), intrinsics[1, 1].item()
+        cx, cy = intrinsics[0, 2].item(), intrinsics[1, 2].item()
+
+        left = (cx + self.margin) / fx
+        right = (camera.width - cx + self.margin) / fx
+        top = (cy + self.margin) / fy
+        bottom = (camera.height - cy + self.margin) / fy
+
+        # Planes in camera space, where the camera looks along +z
+        normals = torch.tensor([
+            [1, 0, left],
+            [-1, 0, right],
+            [0, 1, top],
+            [0, -1, bottom],
+            [0, 0, 1],
+        ], dtype=torch.float32, device=device)
+        offsets = torch.tensor([0, 0, 0, 0, -self.near_plane], dtype=torch.float32, device=device)
+        lengths = normals.norm(dim=1)
+        normals = normals / lengths[:, None]
+        offsets = offsets / lengths
+
+        # n . (R p + t) + d = (R^T n) . p + (n . t + d)
+        rotation = viewmat[:3, :3]
+        translation = viewmat[:3, 3]
+        return normals @ rotation, normals @ translation + offsets
+
+    def get_visible_indices(self, point_cloud: GaussianModel, camera, scale=1.0):
+        """
+        Returns the indices of the potentially visible splats, or None if the whole point cloud should be rendered.
+        """
+        start = time.perf_counter()
+        with torch.no_grad():
+            grid = self.get_grid(point_cloud)
+            normals, offsets = self.get_frustum_planes(camera, grid.centers.device)
+            indices, visible_cell_count = grid.get_visible_indices(normals, offsets, scale)
+
+        visible_count = indices.shape[0]
+        self.last_stats = {
+            "splat_count": grid.splat_count,
+            "visible": visible_count,
+            "opacity_culled": grid.opacity_culled_count,
+            "frustum_culled": grid.splat_count - grid.opacity_culled_count - visible_count,
+            "cell_count": grid.cell_count,
+            "visible_cells": visible_cell_count,
+            "time": time.perf_counter() - start,
+        }
+        self.total_time += self.last_stats["time"]
+        if visible_count > (1 - self.min_culled_share) * grid.splat_count:
+            return None
+        return indices
+
+    def get_stats(self):
+        return self.last_stats
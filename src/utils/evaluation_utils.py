@@ -1,6 +1,12 @@
+import hashlib
+import json
+import os.path
+
+import numpy as np
 import torch
 import torch.nn.functional as F
 from torch.autograd import Variable
+from functools import lru_cache
 from math import exp
 
 
@@ -57,3 +63,140 @@ def mse(img1, img2):
 def psnr(img1, img2):
     mse_current = mse(img1, img2)
     return 20 * torch.log10(1.0 / torch.sqrt(mse_current))
+
+
+@lru_cache(maxsize=None)
+def get_lpips_model(net="alex", device="cpu"):
+    """
+    Returns the LPIPS network of the given type on the given device. The network is only created once per process.
+    """
+    import lpips
+
+    return lpips.LPIPS(net=net, verbose=False).to(device).eval()
+
+
+class ImageEvaluator:
+    """
+    Computes the image quality metrics of batches of rendered and ground truth images.
+    The SSIM window and the LPIPS network are created once, and reused for every batch.
+    """
+
+    def __init__(self, device, window_size=11, channel=3, lpips_net="alex"):
+        self.device = device
+        self.window_size = window_size
+        self.channel = channel
+        self.window = create_window(window_size, channel).to(device)
+        self.lpips_model = get_lpips_model(lpips_net, device)
+
+    @torch.no_grad()
+    def evaluate(self, images, gt_images):
+        """
+        Evaluates a batch of images of the shape (B, C, H, W) with values in [0, 1].
+        Returns a dictionary of the per image metrics, each of them a tensor of the shape (B).
+        """
+        images = images.to(self.device)
+        gt_images = gt_images.to(self.device)
+
+        current_mse = mse(images, gt_images).view(-1)
+        return {
+            "mse": current_mse,
+            "rmse": torch.sqrt(current_mse),
+            "ssim": _ssim(images, gt_images, self.window.type_as(images), self.window_size, self.channel, False),
+            "psnr": (20 * torch.log10(1.0 / torch.sqrt(current_mse))),
+            "lpips": self.lpips_model(images, gt_images, normalize=True).view(-1),
+        }
+
+
+METRIC_NAMES = ("mse", "rmse", "ssim", "psnr", "lpips")
+
+
+def get_file_identity(path):
+    """
+    Identifies a file by its absolute path, size and modification time, or returns None if it does not exist.
+    """
+    if not path or not os.path.isfile(path):
+        return None
+
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def get_evaluation_inputs(pc_paths, mixture_level, splat_counts, images_path, cameras_path):
+    """
+    Identifies the inputs of an evaluation: the files of the point clouds, the mixture level that is evaluated and the
+    splat counts of its point clouds, and the images and cameras the renders are compared with.
+    """
+    return {
+        "point_clouds": [get_file_identity(path) for path in pc_paths],
+        "mixture_level": mixture_level,
+        "splat_counts": list(splat_counts),
+        "images": os.path.abspath(images_path),
+        "cameras": get_file_identity(cameras_path),
+    }
+
+
+def get_evaluation_hash(transformation, color, inputs):
+    """
+    Identifies the renders of an evaluation: the same inputs, transformation and background color produce the same
+    images.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(json.dumps(inputs, sort_keys=True).encode("utf-8"))
+    hasher.update(np.ascontiguousarray(transformation, dtype=np.float64).tobytes())
+    hasher.update(np.ascontiguousarray(color, dtype=np.float64).tobytes())
+    return hasher.hexdigest()
+
+
+def get_camera_log_path(log_path):
+    """
+    Returns the path of the JSONL file the per camera metrics are written to, next to the evaluation log.
+    """
+    return os.path.splitext(log_path)[0] + "_cameras.jsonl"
+
+
+def load_camera_metrics(camera_log_path, evaluation_hash):
+    """
+    Returns the rows of the per camera log that belong to the evaluation hash, keyed by the image name.
+    Incomplete lines, e.g. of a crashed evaluation, are skipped.
+    """
+    rows = {}
+    if not os.path.isfile(camera_log_path):
+        return rows
+
+    with open(camera_log_path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            if row.get("evaluation_hash") == evaluation_hash and all(name in row for name in METRIC_NAMES):
+                rows[row["image_name"]] = row
+
+    return rows
+
+
+def open_camera_log(camera_log_path):
+    """
+    Opens the per camera log for appending. If the last row was cut off, it is terminated so the new rows stay valid.
+    """
+    f = open(camera_log_path, "a+b")
+    if f.tell() > 0:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+    f.close()
+
+    return open(camera_log_path, "a")
+
+
+def write_camera_metrics(f, evaluation_hash, image_names, metrics):
+    """
+    Appends one row per image to the open per camera log, and flushes it so that the rows survive a crash.
+    """
+    values = {name: metrics[name].tolist() for name in METRIC_NAMES}
+    for idx, image_name in enumerate(image_names):
+        row = {"evaluation_hash": evaluation_hash, "image_name": image_name}
+        row.update({name: values[name][idx] for name in METRIC_NAMES})
+        f.write(json.dumps(row) + "\n")
+    f.flush()
@@ -1,16 +1,28 @@
+import zipfile
 from datetime import datetime
 from enum import IntEnum, auto
 
 import plyfile
 import os.path
+import uuid
 
+import numpy as np
 import torch
 
-from src.models.gaussian_model import GaussianModel
+from src.models.gaussian_model import GaussianModel, COMPACT_ARRAY_NAMES, COMPACT_FORMAT_VERSION, MORTON_ORDER_COMMENT
 from src.utils.point_cloud_converter import convert_input_pc_to_open3d_pc, convert_gs_to_open3d_pc
+from src.utils.splat_container import DEFAULT_CHUNK_SIZE, SplatContainerReader, write_splat_container
 import open3d as o3d
 
 
+# Number of splats processed at once when merging point clouds on the disk
+STREAMING_CHUNK_SIZE = 1 << 19
+# Extension of the compact Gaussian point clouds written by GaussianModel.save_compact
+COMPACT_GAUSSIAN_EXTENSION = ".cgs"
+# Extension of the chunked Gaussian point clouds written by splat_container.write_splat_container
+SPLAT_CONTAINER_EXTENSION = ".gsc"
+
+
 class PointCloudType(IntEnum):
     GAUSSIAN = auto()
     INPUT = auto()
@@ -50,19 +62,297 @@ def load_plyfile_pc(pc_path):
     return point_cloud_plyfile
 
 
-def load_gaussian_pc(pc_path):
-    torch.cuda.empty_cache()
-    plyfile_point_cloud = load_plyfile_pc(pc_path)
+def read_ply_header(pc_path):
+    """
+    Parses only the header of a PLY file.
+    Returns the format, the list of elements as (name, count, [(type, name)]) tuples, the size of the header in bytes
+    and the comments, or None if the header is malformed or contains list properties.
+    """
+    file_format = None
+    elements = []
+    comments = []
+    with open(pc_path, "rb") as f:
+        if f.readline().strip() != b"ply":
+            return None
+
+        for line in f:
+            tokens = line.decode("ascii", errors="replace").split()
+            if not tokens or tokens[0] == "obj_info":
+                continue
+
+            if tokens[0] == "comment":
+                comments.append(" ".join(tokens[1:]))
+                continue
+
+            match tokens[0]:
+                case "format" if len(tokens) == 3:
+                    file_format = tokens[1]
+                case "element" if len(tokens) == 3:
+                    elements.append((tokens[1], int(tokens[2]), []))
+                case "property" if len(tokens) == 3 and elements:
+                    elements[-1][2].append((tokens[1], tokens[2]))
+                case "end_header":
+                    return file_format, elements, f.tell(), comments
+                case _:
+                    return None
+
+    return None
+
+
+def get_gaussian_ply_layout(pc_path):
+    """
+    Returns the vertex count, the property names and the header size of a binary little endian Gaussian PLY, whose
+    vertex element only consists of float properties, or None if the file has a different layout.
+    """
+    header = read_ply_header(pc_path)
+    if header is None:
+        return None
+
+    file_format, elements, header_size, _ = header
+    if file_format != "binary_little_endian" or not elements or elements[0][0] != "vertex":
+        return None
+
+    _, vertex_count, properties = elements[0]
+    property_names = [name for _, name in properties]
+    if vertex_count == 0 or "f_dc_0" not in property_names:
+        return None
+
+    if any(property_type not in ("float", "float32") for property_type, _ in properties):
+        return None
+
+    if os.path.getsize(pc_path) < header_size + vertex_count * len(properties) * 4:
+        return None
+
+    return vertex_count, property_names, header_size
+
+
+def map_gaussian_ply(pc_path):
+    """
+    Memory-maps the vertex block of a binary little endian Gaussian PLY as an (N, P) float32 matrix, which has the same
+    layout as the packed vertex records. Only the header is read; the mapping is copy-on-write, so the data is paged
+    in from the disk when it is first touched and the file is never modified.
+    Returns the matrix and the property names, or None if the file cannot be mapped and must be read with plyfile.
+    """
+    layout = get_gaussian_ply_layout(pc_path)
+    if layout is None:
+        return None
+
+    vertex_count, property_names, header_size = layout
+    attributes = np.memmap(pc_path, dtype="<f4", mode="c", offset=header_size,
+                           shape=(vertex_count, len(property_names)))
+    return attributes, property_names
+
+
+def iterate_gaussian_ply_chunks(pc_path, layout, chunk_size):
+    """
+    Reads the vertex block of a Gaussian PLY with the given layout as (chunk_size, P) float32 matrices.
+    """
+    vertex_count, property_names, header_size = layout
+    with open(pc_path, "rb") as f:
+        f.seek(header_size)
+        for start in range(0, vertex_count, chunk_size):
+            row_count = min(chunk_size, vertex_count - start)
+            chunk = np.fromfile(f, dtype="<f4", count=row_count * len(property_names))
+            yield chunk.reshape((row_count, len(property_names)))
+
+
+def write_gaussian_ply_header(f, vertex_count, property_names, comments=()):
+    header = ["ply", "format binary_little_endian 1.0"]
+    header.extend(f"comment {comment}" for comment in comments)
+    header.append(f"element vertex {vertex_count}")
+    header.extend(f"property float {name}" for name in property_names)
+    header.append("end_header")
+    f.write(("\n".join(header) + "\n").encode("ascii"))
+
+
+def save_merged_gaussian_pc_streamed(pc_path_first, pc_path_second, transformation, merge_path,
+                                     chunk_size=STREAMING_CHUNK_SIZE, progress_callback=None):
+    """
+    Merges two Gaussian PLYs on the disk, while holding at most one chunk of either point cloud in memory.
+    The first point cloud is transformed chunk by chunk and the vertex count of the header is known in advance,
+    so every chunk is appended to the output as soon as it is processed. The output has the layout written by
+    GaussianModel.save_ply. It is written to a temporary file next to the merge path and moved in place at the end,
+    so the merge path can be one of the inputs.
+    Returns False if either of the inputs does not have a layout that can be streamed.
+    """
+    if is_compact_gaussian_path(merge_path) or is_splat_container_path(merge_path):
+        return False
+
+    layout_first = get_gaussian_ply_layout(pc_path_first)
+    layout_second = get_gaussian_ply_layout(pc_path_second)
+    if layout_first is None or layout_second is None:
+        return False
+
+    transformation_tensor = None
+    if transformation is not None and not np.array_equal(transformation, np.eye(transformation.shape[0])):
+        transformation_tensor = torch.from_numpy(transformation.astype(np.float32))
+
+    vertex_count = layout_first[0] + layout_second[0]
+    processed_count = 0
+    header_written = False
+    temporary_path = f"{merge_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            for layout, path, chunk_transformation in ((layout_first, pc_path_first, transformation_tensor),
+                                                       (layout_second, pc_path_second, None)):
+                for chunk in iterate_gaussian_ply_chunks(path, layout, chunk_size):
+                    gaussian_chunk = GaussianModel(3)
+                    gaussian_chunk.from_attribute_matrix(chunk, layout[1])
+                    if chunk_transformation is not None:
+                        gaussian_chunk.transform_gaussian_model(chunk_transformation)
+
+                    if not header_written:
+                        write_gaussian_ply_header(f, vertex_count, gaussian_chunk.construct_list_of_attributes())
+                        header_written = True
+
+                    f.write(gaussian_chunk.construct_attribute_matrix().astype("<f4", copy=False).tobytes())
+
+                    processed_count += chunk.shape[0]
+                    if progress_callback is not None:
+                        progress_callback(int(processed_count / vertex_count * 100))
+        os.replace(temporary_path, merge_path)
+    finally:
+        # Only left behind if the merge failed
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    return True
+
+
+def is_compact_gaussian_path(path):
+    return os.path.splitext(path)[1].lower() == COMPACT_GAUSSIAN_EXTENSION
+
+
+def load_compact_gaussian_model(pc_path):
+    """
+    Loads a Gaussian point cloud saved by GaussianModel.save_compact. The model stays in the compact storage mode.
+    Returns None if the file is not a compact point cloud of a supported version.
+    """
+    try:
+        with np.load(pc_path) as data:
+            if int(data["format_version"]) != COMPACT_FORMAT_VERSION:
+                return None
+            sh_degree = int(data["sh_degree"])
+            morton_ordered = "morton_ordered" in data.files and bool(data["morton_ordered"])
+            arrays = {name: data[name] for name in COMPACT_ARRAY_NAMES}
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # A truncated or corrupt archive fails when it is opened or when one of its arrays is read
+        return None
+
+    gaussian_point_cloud = GaussianModel(sh_degree)
+    gaussian_point_cloud.from_compact_arrays(arrays)
+    gaussian_point_cloud.morton_ordered = morton_ordered
+    return gaussian_point_cloud
 
+
+def is_splat_container_path(path):
+    return os.path.splitext(path)[1].lower() == SPLAT_CONTAINER_EXTENSION
+
+
+def load_splat_container(pc_path, aabb=None, planes=None):
+    """
+    Loads the splats of a chunked container, or only those of the chunks that intersect the AABB and the frustum planes.
+    Returns None if the file is not a container of a supported version.
+    """
+    try:
+        with SplatContainerReader(pc_path) as reader:
+            return reader.load_gaussian_model(aabb, planes)
+    except (OSError, ValueError):
+        return None
+
+
+def convert_ply_to_container(ply_path, container_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Converts a Gaussian PLY to a chunked container. Returns False if the PLY is not a Gaussian point cloud.
+    """
+    gaussian_point_cloud = load_gaussian_model(ply_path)
+    if gaussian_point_cloud is None:
+        return False
+
+    write_splat_container(gaussian_point_cloud, container_path, chunk_size)
+    return True
+
+
+def convert_container_to_ply(container_path, ply_path):
+    """
+    Converts a chunked container to a Gaussian PLY with the layout written by GaussianModel.save_ply, one chunk at a
+    time. The splats are written in the Morton order of the container, and the PLY is marked as Morton ordered.
+    Returns False if the file is not a container of a supported version.
+    """
+    try:
+        with SplatContainerReader(container_path) as reader, open(ply_path, "wb") as f:
+            write_gaussian_ply_header(f, reader.splat_count, reader.property_names, [MORTON_ORDER_COMMENT])
+            for chunk_index in range(reader.chunk_count):
+                f.write(reader.read_chunk(chunk_index).astype("<f4", copy=False).tobytes())
+    except ValueError:
+        return False
+    return True
+
+
+def load_gaussian_model(pc_path, morton_order=False):
+    """
+    Loads a Gaussian point cloud. Binary little endian float PLYs are memory-mapped, and the tensors of the model share
+    the mapping, compact point clouds are loaded in the compact storage mode, chunked containers are loaded entirely,
+    other files are read with plyfile.
+    If morton_order is set, the splats are sorted by GaussianModel.sort_by_morton_order, unless the file was saved in
+    that order. Sorting copies the attributes of a memory-mapped PLY into memory.
+    """
+    gaussian_point_cloud = read_gaussian_model(pc_path)
+    if morton_order and gaussian_point_cloud is not None and not gaussian_point_cloud.morton_ordered:
+        gaussian_point_cloud.sort_by_morton_order()
+    return gaussian_point_cloud
+
+
+def read_gaussian_model(pc_path):
+    if not os.path.isfile(pc_path):
+        return None
+
+    if is_compact_gaussian_path(pc_path):
+        return load_compact_gaussian_model(pc_path)
+
+    if is_splat_container_path(pc_path):
+        return load_splat_container(pc_path)
+
+    gaussian_point_cloud = GaussianModel(3)
+    mapped_point_cloud = map_gaussian_ply(pc_path)
+    if mapped_point_cloud is not None:
+        gaussian_point_cloud.from_attribute_matrix(*mapped_point_cloud)
+        gaussian_point_cloud.morton_ordered = MORTON_ORDER_COMMENT in read_ply_header(pc_path)[3]
+        return gaussian_point_cloud
+
+    plyfile_point_cloud = load_plyfile_pc(pc_path)
     if not is_point_cloud_gaussian(plyfile_point_cloud):
-        return None, None
+        return None
 
-    gaussian_point_cloud = GaussianModel(device_name="cuda:0")
     gaussian_point_cloud.from_ply(plyfile_point_cloud)
-    gaussian_point_cloud.move_to_device("cpu")
+    gaussian_point_cloud.morton_ordered = MORTON_ORDER_COMMENT in plyfile_point_cloud.comments
+    return gaussian_point_cloud
+
+
+def save_gaussian_model(gaussian_point_cloud, pc_path):
+    """
+    Saves a Gaussian point cloud in the compact format or as a chunked container if the path has their extension,
+    otherwise as a PLY.
+    """
+    if is_compact_gaussian_path(pc_path):
+        gaussian_point_cloud.save_compact(pc_path)
+    elif is_splat_container_path(pc_path):
+        write_splat_container(gaussian_point_cloud, pc_path)
+    else:
+        gaussian_point_cloud.save_ply(pc_path)
+
+
+def load_gaussian_pc(pc_path, morton_order=False):
+    """
+    Loads a Gaussian point cloud and converts it to the Open3D point cloud that is displayed and registered.
+    The conversion reads the position, color and covariance of every splat, so unlike load_gaussian_model, opening
+    a memory-mapped PLY this way still touches most of the file.
+    """
+    gaussian_point_cloud = load_gaussian_model(pc_path, morton_order)
+    if gaussian_point_cloud is None:
+        return None, None
 
     o3d_point_cloud = convert_gs_to_open3d_pc(gaussian_point_cloud)
-    torch.cuda.empty_cache()
     return o3d_point_cloud, gaussian_point_cloud
 
 
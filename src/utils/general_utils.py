@@ -107,3 +107,30 @@ def matrix_to_quaternion(rotation_matrices):
     y = (rotation_matrices[0, 2] - rotation_matrices[2, 0]) / (4 * w)
     z = (rotation_matrices[1, 0] - rotation_matrices[0, 1]) / (4 * w)
     return torch.stack((w, x, y, z), dim=-1)
+
+
+def spread_bits(values):
+    # Inserts two zero bits after each of the lowest 21 bits, so that three spread values can be interleaved
+    values = (values | (values << 32)) & 0x1f00000000ffff
+    values = (values | (values << 16)) & 0x1f0000ff0000ff
+    values = (values | (values << 8)) & 0x100f00f00f00f00f
+    values = (values | (values << 4)) & 0x10c30c30c30c30c3
+    values = (values | (values << 2)) & 0x1249249249249249
+    return values
+
+
+def compute_morton_codes(points, bits=21, min_bound=None, max_bound=None):
+    """
+    Returns the int64 Morton (Z-order) codes of the (N, 3) points, quantized to 2^bits cells per axis (at most 21)
+    over the bounding box of the points, or the given bounds. Sorting by the codes places nearby points close to each
+    other.
+    """
+    points = points.float()
+    if points.shape[0] == 0:
+        return torch.empty(0, dtype=torch.int64, device=points.device)
+
+    min_bound = points.min(dim=0).values if min_bound is None else torch.as_tensor(min_bound).to(points)
+    max_bound = points.max(dim=0).values if max_bound is None else torch.as_tensor(max_bound).to(points)
+    resolution = (1 << bits) - 1
+    cells = ((points - min_bound) / (max_bound - min_bound).clamp_min(1e-12) * resolution).clamp(0, resolution).long()
+    return (spread_bits(cells[:, 0]) << 2) | (spread_bits(cells[:, 1]) << 1) | spread_bits(cells[:, 2])
@@ -15,10 +15,17 @@ import numpy as np
 import torch
 
 
-def get_normals_from_covariance(covariance_mat):
-    eigen_values, eigen_vectors = torch.linalg.eig(covariance_mat)
-    min_eigenvalue_index = eigen_values.argsort()[:, 0]
-    return eigen_vectors[torch.arange(eigen_values.shape[0]), :, min_eigenvalue_index]
+def get_normals_from_covariance(covariance_mat, points=None):
+    # The eigenvalues of eigh are in ascending order, so the first eigenvector is the axis of the smallest extent
+    _, eigen_vectors = torch.linalg.eigh(covariance_mat)
+    normals = eigen_vectors[:, :, 0]
+    if points is None:
+        return normals
+
+    # The sign of an eigenvector is arbitrary. Orient every normal away from the center of the point cloud.
+    outward = points - points.mean(dim=0)
+    flip = (normals * outward).sum(dim=1) < 0
+    return torch.where(flip[:, None], -normals, normals)
 
 
 def getWorld2View2(R, t, translate=np.array([.0, .0, .0]), scale=1.0):
@@ -0,0 +1,104 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+
+
+def load_image_tensor(image_path):
+    """
+    Loads an image as an RGB float tensor of the shape (3, H, W) with values in [0, 1].
+    Returns the tensor and the time spent decoding it.
+    """
+    start = time.perf_counter()
+    with Image.open(image_path) as pil_image:
+        image = np.array(pil_image.convert('RGB'))
+
+    image_tensor = torch.from_numpy(image).permute(2, 0, 1).float().div_(255.0)
+    return image_tensor, time.perf_counter() - start
+
+
+class ImagePrefetcher:
+    """
+    Loads images on a thread pool ahead of their use. At most queue_depth images are decoded or waiting to be
+    consumed at any time, so the memory use is bounded.
+    Iterating over the prefetcher yields the (image_path, image_tensor, error) tuples in the order of the paths,
+    where either the tensor or the error is None.
+    """
+
+    def __init__(self, image_paths, queue_depth=4, worker_count=2, device="cpu"):
+        self.image_paths = list(image_paths)
+        self.queue_depth = max(1, queue_depth)
+        self.worker_count = max(1, worker_count)
+        self.device = device
+
+        # Time the consumer spent waiting for an image that was not decoded yet
+        self.stall_time = 0.0
+        # Total time spent decoding the images over all worker threads
+        self.decode_time = 0.0
+        self.image_count = 0
+
+        self._executor = None
+        self._futures = deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.worker_count, thread_name_prefix="image_prefetcher")
+        path_iterator = iter(self.image_paths)
+        try:
+            for image_path in path_iterator:
+                self._futures.append((image_path, self._executor.submit(load_image_tensor, image_path)))
+                if len(self._futures) == self.queue_depth:
+                    break
+
+            while self._futures:
+                image_path, future = self._futures.popleft()
+                yield self._get_result(image_path, future)
+
+                next_path = next(path_iterator, None)
+                if next_path is not None:
+                    self._futures.append((next_path, self._executor.submit(load_image_tensor, next_path)))
+        finally:
+            self.close()
+
+    def _get_result(self, image_path, future):
+        start = time.perf_counter()
+        try:
+            image_tensor, decode_time = future.result()
+        except (OSError, IOError) as e:
+            return image_path, None, e
+        finally:
+            self.stall_time += time.perf_counter() - start
+
+        self.decode_time += decode_time
+        self.image_count += 1
+        return image_path, image_tensor.to(self.device), None
+
+    def close(self):
+        """
+        Cancels the pending loads, e.g. when the evaluation is cancelled.
+        """
+        if self._executor is None:
+            return
+
+        for _, future in self._futures:
+            future.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def get_stats(self):
+        return {
+            "image_count": self.image_count,
+            "queue_depth": self.queue_depth,
+            "worker_count": self.worker_count,
+            "decode": self.decode_time,
+            "decode_stall": self.stall_time,
+        }
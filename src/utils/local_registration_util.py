@@ -94,3 +94,33 @@ def do_icp_registration(point_cloud_first, point_cloud_second, init_transform, r
                                                                            estimation_method, convergence_criteria)
         case _:
             return None
+
+
+def do_multiscale_voxel_registration(point_cloud_first, point_cloud_second, init_transform, registration_type,
+                                     relative_fitness, relative_rmse, voxel_values, iter_values, rejection_type,
+                                     k_value, scale_callback=None):
+    current_trans = init_transform
+    results = None
+
+    for radius, max_iter in zip(voxel_values, iter_values):
+        source_down = point_cloud_first.voxel_down_sample(radius)
+        target_down = point_cloud_second.voxel_down_sample(radius)
+
+        source_down.estimate_normals(
+            o3d.geometry.KDTreeSearchParamHybrid(radius=radius * 2, max_nn=30))
+        target_down.estimate_normals(
+            o3d.geometry.KDTreeSearchParamHybrid(radius=radius * 2, max_nn=30))
+
+        try:
+            results = do_icp_registration(source_down, target_down, current_trans, registration_type,
+                                          radius, relative_fitness, relative_rmse, max_iter,
+                                          rejection_type, k_value)
+        except RuntimeError as e:
+            raise RuntimeError(f"{str(e)}\nSource: \"{str(source_down)}\"\nTarget: \"{str(target_down)}\"") from e
+
+        if scale_callback is not None:
+            scale_callback()
+
+        current_trans = results.transformation
+
+    return results
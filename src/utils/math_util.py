@@ -1,5 +1,4 @@
 import numpy as np
-from e3nn import o3
 import torch
 
 
@@ -43,6 +42,9 @@ def rotate_sh(pc, points, transformation_matrix):
 
 
 def get_wigner_from_rotation(order, rotation_matrix):
+    # e3nn takes seconds to import, only load it when the spherical harmonics are actually rotated
+    from e3nn import o3
+
     # Convert the rotation_matrix to a tensor
     rotation_matrix_tensor = torch.tensor(rotation_matrix, dtype=torch.float64)
 
@@ -102,3 +104,16 @@ def axis_angle_rotation(axis, angle):
          axis[2] * axis[1] * one_minus_cos + axis[0] * sin_angle,
          cos_angle + axis[2] ** 2 * one_minus_cos]
     ], dtype=torch.float32)
+
+
+def halton(index, base):
+    """ Returns the element of the Halton low-discrepancy sequence with the given index and base, in [0, 1). """
+    result = 0.0
+    fraction = 1.0
+    index += 1
+    while index > 0:
+        fraction /= base
+        result += fraction * (index % base)
+        index //= base
+
+    return result
@@ -0,0 +1,112 @@
+"""
+Persistent cache of HEM mixture hierarchies.
+The entries are addressed by a hash of the input attributes and the HEM parameters, and stored as uncompressed .npz
+files in the cache directory. When the total size of the entries exceeds the limit, the least recently used ones are
+evicted.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+import zipfile
+
+import numpy as np
+
+from src.models.gaussian_mixture_level import GaussianMixtureModel
+
+MIXTURE_CACHE_PREFIX = "mixture_"
+MIXTURE_CACHE_MAX_SIZE = 4 * 1024 ** 3
+MIXTURE_ARRAY_NAMES = ("xyz", "colors", "opacities", "covariance", "features")
+
+
+def get_mixture_cache_dir():
+    return os.path.join(os.getcwd(), "cache")
+
+
+def get_mixture_cache_key(mixture_arrays, hem_reduction, distance_delta, color_delta, decay_rate, cluster_level):
+    hasher = hashlib.blake2b(digest_size=20)
+    parameters = [hem_reduction, distance_delta, color_delta, decay_rate, cluster_level]
+    hasher.update(json.dumps(parameters).encode("ascii"))
+    for array in mixture_arrays:
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        hasher.update(str(array.shape).encode("ascii"))
+        hasher.update(memoryview(array).cast("B"))
+
+    return hasher.hexdigest()
+
+
+def get_mixture_cache_path(cache_key, cache_dir=None):
+    return os.path.join(cache_dir or get_mixture_cache_dir(), f"{MIXTURE_CACHE_PREFIX}{cache_key}.npz")
+
+
+def load_mixture_levels(cache_key, cache_dir=None):
+    """
+    Returns the list of GaussianMixtureModels stored under the key, or None on a cache miss.
+    A damaged entry counts as a miss and is deleted, so that it is rebuilt and saved again.
+    """
+    path = get_mixture_cache_path(cache_key, cache_dir)
+    try:
+        with np.load(path) as data:
+            level_count = int(data["level_count"])
+            mixture_models = [GaussianMixtureModel(*(data[f"level{level}_{name}"] for name in MIXTURE_ARRAY_NAMES))
+                              for level in range(level_count)]
+    except FileNotFoundError:
+        return None
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    # The modification time marks the last use of the entry for the eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return mixture_models
+
+
+def save_mixture_levels(cache_key, mixture_models, cache_dir=None, max_size=MIXTURE_CACHE_MAX_SIZE):
+    cache_dir = cache_dir or get_mixture_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    arrays = {"level_count": np.array(len(mixture_models))}
+    for level, mixture_model in enumerate(mixture_models):
+        for name in MIXTURE_ARRAY_NAMES:
+            arrays[f"level{level}_{name}"] = getattr(mixture_model, name)
+
+    # Write to a temporary file first, so that concurrent readers never see a partial entry
+    temporary_path = os.path.join(cache_dir, f"{MIXTURE_CACHE_PREFIX}{uuid.uuid4().hex}.tmp.npz")
+    np.savez(temporary_path, **arrays)
+    os.replace(temporary_path, get_mixture_cache_path(cache_key, cache_dir))
+
+    evict_mixture_cache(cache_dir, max_size)
+
+
+def evict_mixture_cache(cache_dir=None, max_size=MIXTURE_CACHE_MAX_SIZE):
+    """
+    Deletes the least recently used entries until their total size is below max_size.
+    """
+    cache_dir = cache_dir or get_mixture_cache_dir()
+    entries = []
+    for file_name in os.listdir(cache_dir):
+        if not file_name.startswith(MIXTURE_CACHE_PREFIX) or file_name.endswith(".tmp.npz"):
+            continue
+        try:
+            stat = os.stat(os.path.join(cache_dir, file_name))
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, file_name))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, file_name in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, file_name))
+        except OSError:
+            continue
+        total_size -= size
@@ -2,10 +2,19 @@
 Converts PLYFILE Point Clouds to the Open3D format
 """
 
+from enum import IntEnum, auto
+
 import numpy as np
 import open3d as o3d
 
-from src.utils.graphics_utils import sh2rgb
+from src.utils.graphics_utils import sh2rgb, get_normals_from_covariance
+
+
+class NormalEstimationType(IntEnum):
+    # Open3D's estimate_normals, which fits planes to the nearest neighbours found via a KD-tree
+    KD_TREE = auto()
+    # The axis of the smallest extent of every splat, derived from its covariance
+    COVARIANCE = auto()
 
 
 def convert_input_pc_to_open3d_pc(pc):
@@ -28,22 +37,28 @@ def convert_input_pc_to_open3d_pc(pc):
     return o3d_pc
 
 
-def convert_gs_to_open3d_pc(gaussian):
+def convert_gs_to_open3d_pc(gaussian, normal_estimation=NormalEstimationType.COVARIANCE):
+    """
+    Converts a Gaussian point cloud to an Open3D point cloud with colors, covariances and normals. The normals are
+    derived from the covariances by default, which avoids the neighbour search of Open3D's estimate_normals.
+    """
     o3d_pc = o3d.geometry.PointCloud()
-    points = gaussian.get_xyz.double().detach().cpu().numpy()
+    points_tensor = gaussian.get_xyz.double().detach().cpu()
+    points = points_tensor.numpy()
 
     o3d_pc.points = o3d.utility.Vector3dVector(points)
 
     colors = sh2rgb(np.ascontiguousarray(gaussian.get_colors.double().detach().cpu().numpy()))
     o3d_pc.colors = o3d.utility.Vector3dVector(colors)
 
-    covariances_tensor = gaussian.get_full_covariance()
-    o3d_pc.covariances = o3d.utility.Matrix3dVector(covariances_tensor.double().detach().cpu().numpy())
+    covariances_tensor = gaussian.get_full_covariance().double().detach().cpu()
+    o3d_pc.covariances = o3d.utility.Matrix3dVector(covariances_tensor.numpy())
 
-    o3d_pc.estimate_normals()
-    # TODO: Find better way to approx normals
-    # normal_matrices = get_normals_from_covariance(covariances_tensor)
-    # o3d_pc.normals = o3d.utility.Vector3dVector(normal_matrices.double().detach().cpu().numpy())
-    # o3d_pc.orient_normals_consistent_tangent_plane(30)
+    match normal_estimation:
+        case NormalEstimationType.KD_TREE:
+            o3d_pc.estimate_normals()
+        case NormalEstimationType.COVARIANCE:
+            normals = get_normals_from_covariance(covariances_tensor, points_tensor)
+            o3d_pc.normals = o3d.utility.Vector3dVector(normals.numpy())
 
     return o3d_pc
@@ -1,38 +1,197 @@
 import torch
-from PIL.ImageQt import ImageQt
 from PySide6 import QtGui
-from gsplat.rendering import rasterization
-import torchvision.transforms.functional as F
 
 from src.models.gaussian_model import GaussianModel
+from src.utils.cpu_rasterization_util import rasterize_cpu
 
 
-def rasterize_image(point_cloud: GaussianModel, camera, scale, color, device, leave_on_gpu=True, ):
+def get_render_device():
+    """
+    Returns the CUDA device if there is one, otherwise the CPU, where rasterize_image falls back to the CPU rasterizer.
+    """
+    return "cuda:0" if torch.cuda.is_available() else "cpu"
+
+
+def rasterize_image(point_cloud: GaussianModel, camera, scale, color, device, leave_on_gpu=True, pixel_offset=None,
+                    culler=None):
+    if culler is not None:
+        # Only the potentially visible splats are activated and rasterized
+        visible_indices = culler.get_visible_indices(point_cloud, camera, scale)
+        if visible_indices is not None:
+            point_cloud = point_cloud.get_subset(visible_indices)
+
     color_tensor = torch.tensor(color, dtype=torch.float32, device=device).view(1, -1)
-    covars = point_cloud.get_full_covariance(scale)
+    intrinsics = camera.intrinsics
+    if pixel_offset is not None:
+        # Sub-pixel shift of the principal point, e.g. for the jittered frames of temporal anti-aliasing
+        intrinsics = intrinsics.clone()
+        intrinsics[:, 0, 2] += pixel_offset[0]
+        intrinsics[:, 1, 2] += pixel_offset[1]
+
+    if point_cloud.get_xyz.shape[0] == 0:
+        # Nothing is in view, e.g. when every splat was culled
+        render_colors = color_tensor.view(1, 1, 1, -1).expand(1, camera.height, camera.width, -1).clone()
+        return render_colors if leave_on_gpu else render_colors.cpu()
+
+    render_colors = rasterize_splats(point_cloud.get_xyz, point_cloud.get_full_covariance(scale),
+                                     point_cloud.get_opacity_with_activation.view(-1), point_cloud.get_features,
+                                     camera.viewmat, intrinsics, camera.width, camera.height, color_tensor, device)
+    return render_colors.detach() if leave_on_gpu else render_colors.cpu()
+
+
+def rasterize_splats(means, covariances, opacities, features, viewmats, intrinsics, width, height, backgrounds,
+                     device):
+    """
+    Renders the activated splats for a batch of cameras of the same resolution into (C, H, W, 3) images on the
+    device.
+    """
+    camera_count = viewmats.shape[0]
+    backgrounds = backgrounds.expand(camera_count, -1)
+    if torch.device(device).type != "cuda":
+        # gsplat only runs on CUDA devices
+        images = [rasterize_cpu(means, covariances, opacities, features, viewmats[i], intrinsics[i], width, height,
+                                sh_degree=3, background=backgrounds[i], radius_clip=3)
+                  for i in range(camera_count)]
+        return torch.stack(images).to(device)
+
+    # gsplat compiles/loads its CUDA kernels on import, only do so when the first image is rendered
+    from gsplat.rendering import rasterization
+
+    # The rotations and scales are not used when the covariances are given. The attributes of a model built on the
+    # CPU from a memory-mapped PLY can be strided views, the kernels expect contiguous tensors
     render_colors, _, _ = rasterization(
-        point_cloud.get_xyz,
-        point_cloud.get_rotation,
-        point_cloud.get_scaling,
-        point_cloud.get_opacity_with_activation.view(-1),
-        point_cloud.get_features,
-        camera.viewmat.cuda(),
-        camera.intrinsics.cuda(),
-        camera.width,
-        camera.height,
+        means.contiguous(),
+        None,
+        None,
+        opacities.contiguous(),
+        features.contiguous(),
+        viewmats.to(device),
+        intrinsics.to(device),
+        width,
+        height,
         render_mode="RGB",
         sh_degree=3,
-        backgrounds=color_tensor,
-        covars=covars,
+        backgrounds=backgrounds,
+        covars=covariances.contiguous(),
         packed=True,
         radius_clip=3
     )
+    return render_colors.detach()
 
-    return render_colors.detach() if leave_on_gpu else render_colors.cpu()
+
+class MultiViewRasterizer:
+    """
+    Renders a point cloud from many cameras. The activations and covariances of the splats are computed once, and the
+    cameras are grouped by their resolution and rendered in batches, whose estimated rasterizer memory stays within
+    memory_budget bytes.
+    If a culler is given, every batch only renders the splats that are potentially visible from one of its cameras.
+    """
+
+    # Rough size of the per camera buffers of a splat in view (projection, colors and tile intersections) and of a
+    # pixel (colors, alphas and the background blend) in bytes
+    BYTES_PER_SPLAT = 160
+    BYTES_PER_PIXEL = 40
+
+    def __init__(self, point_cloud: GaussianModel, scale, color, device, culler=None, memory_budget=2 ** 31):
+        self.point_cloud = point_cloud
+        self.scale = scale
+        self.device = device
+        self.culler = culler
+        self.memory_budget = memory_budget
+        self.background = torch.tensor(color, dtype=torch.float32, device=device).view(1, -1)
+
+        with torch.no_grad():
+            self.means = point_cloud.get_xyz
+            self.covariances = point_cloud.get_full_covariance(scale)
+            self.opacities = point_cloud.get_opacity_with_activation.view(-1)
+            self.features = point_cloud.get_features
+
+    @property
+    def splat_count(self):
+        return self.means.shape[0]
+
+    def get_batch_size(self, width, height):
+        camera_memory = self.splat_count * self.BYTES_PER_SPLAT + width * height * self.BYTES_PER_PIXEL
+        return max(1, int(self.memory_budget // camera_memory))
+
+    def get_batches(self, cameras):
+        """
+        Returns the indices of the cameras grouped into batches of the same resolution. The resolutions are ordered
+        by their first camera, and the cameras of a resolution keep their order.
+        """
+        groups = {}
+        for index, camera in enumerate(cameras):
+            groups.setdefault((camera.width, camera.height), []).append(index)
+
+        batches = []
+        for (width, height), indices in groups.items():
+            batch_size = self.get_batch_size(width, height)
+            batches.extend(indices[i:i + batch_size] for i in range(0, len(indices), batch_size))
+        return batches
+
+    def get_visible_indices(self, cameras):
+        """
+        Returns the indices of the splats that are potentially visible from any of the cameras, or None if the whole
+        point cloud should be rendered.
+        """
+        if self.culler is None:
+            return None
+
+        visible = torch.zeros(self.splat_count, dtype=torch.bool, device=self.means.device)
+        for camera in cameras:
+            indices = self.culler.get_visible_indices(self.point_cloud, camera, self.scale)
+            if indices is None:
+                return None
+            visible[indices] = True
+
+        if visible.sum().item() > (1 - self.culler.min_culled_share) * self.splat_count:
+            return None
+        return torch.nonzero(visible).view(-1)
+
+    def rasterize(self, cameras, leave_on_gpu=True):
+        """
+        Renders the cameras, which must have the same resolution, into (C, H, W, 3) images.
+        """
+        width, height = cameras[0].width, cameras[0].height
+        if any(camera.width != width or camera.height != height for camera in cameras):
+            raise ValueError("The cameras of a batch must have the same resolution.")
+
+        with torch.no_grad():
+            means, covariances, opacities, features = self.means, self.covariances, self.opacities, self.features
+            visible_indices = self.get_visible_indices(cameras)
+            if visible_indices is not None:
+                means, covariances, opacities = (means[visible_indices], covariances[visible_indices],
+                                                 opacities[visible_indices])
+                features = features[visible_indices]
+
+            if means.shape[0] == 0:
+                images = self.background.view(1, 1, 1, -1).expand(len(cameras), height, width, -1).clone()
+            else:
+                viewmats = torch.cat([camera.viewmat for camera in cameras])
+                intrinsics = torch.cat([camera.intrinsics for camera in cameras])
+                images = rasterize_splats(means, covariances, opacities, features, viewmats, intrinsics, width,
+                                          height, self.background, self.device)
+
+        return images if leave_on_gpu else images.cpu()
+
+
+def rasterize_images(point_cloud: GaussianModel, cameras, scale, color, device, leave_on_gpu=True, culler=None,
+                     memory_budget=2 ** 31):
+    """
+    Renders the point cloud from every camera. Yields the indices of the cameras of a batch and their (C, H, W, 3)
+    images.
+    """
+    rasterizer = MultiViewRasterizer(point_cloud, scale, color, device, culler, memory_budget)
+    for indices in rasterizer.get_batches(cameras):
+        yield indices, rasterizer.rasterize([cameras[i] for i in indices], leave_on_gpu)
 
 
 def get_pixmap_from_tensor(image_tensor):
-    img_save = F.to_pil_image(image_tensor[0].permute(2, 0, 1).clamp(0, 1).detach().cpu())
-    qim = ImageQt(img_save)
+    # Quantized on the device of the tensor, so only 8-bit values are copied to the host
+    image = (image_tensor[0].detach().clamp(0, 1) * 255).to(torch.uint8).cpu().numpy()
+    height, width, channels = image.shape
+    image_format = QtGui.QImage.Format.Format_RGB888 if channels == 3 else QtGui.QImage.Format.Format_RGBA8888
+    qim = QtGui.QImage(image.data, width, height, width * channels, image_format)
+    # fromImage copies the pixels, the array can be released afterward
     pix = QtGui.QPixmap.fromImage(qim)
     return pix
@@ -0,0 +1,241 @@
+"""
+Chunked container format for Gaussian point clouds, which allows reading only the splats of a region of a scene.
+The splats are sorted by the Morton codes of their centers and split into the cells of the implied octree, so that every
+chunk covers a compact region of the scene. Every chunk is compressed on its own, and an index at the end of the file
+stores the byte range, the splat count and the bounding box of every chunk, so the chunks that intersect an AABB or a
+view frustum are read without touching the rest of the file.
+
+Layout: magic, chunk payloads, JSON index, index offset and size (little endian uint64), magic.
+A chunk payload is the float32 attribute matrix of its splats in the PLY property order, stored column by column with
+the bytes of the floats grouped by their significance, and compressed with zlib. The grouped sign and exponent bytes
+compress much better than the interleaved rows.
+"""
+
+import json
+import struct
+import zlib
+
+import numpy as np
+import torch
+
+from src.models.gaussian_model import GaussianModel
+from src.utils.culling_util import get_splat_radii
+from src.utils.general_utils import compute_morton_codes
+
+CONTAINER_MAGIC = b"GSCHUNKS"
+CONTAINER_VERSION = 1
+CONTAINER_FOOTER = struct.Struct("<QQ")
+MORTON_BITS = 21
+DEFAULT_CHUNK_SIZE = 1 << 16
+# The shuffled columns compress almost as well with the fastest level as with the higher ones
+DEFAULT_COMPRESSION_LEVEL = 1
+
+
+def encode_chunk(attributes, compression_level=DEFAULT_COMPRESSION_LEVEL):
+    columns = np.ascontiguousarray(attributes.T, dtype="<f4")
+    shuffled = np.ascontiguousarray(columns.view(np.uint8).reshape(-1, 4).T)
+    return zlib.compress(shuffled, compression_level)
+
+
+def decode_chunk(payload, splat_count, property_count):
+    shuffled = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(4, -1)
+    # Copying the byte planes one by one is several times faster than transposing them at once
+    interleaved = np.empty((shuffled.shape[1], 4), dtype=np.uint8)
+    for byte_index in range(4):
+        interleaved[:, byte_index] = shuffled[byte_index]
+    columns = interleaved.view("<f4").reshape(property_count, splat_count)
+    return np.ascontiguousarray(columns.T)
+
+
+def split_morton_cells(codes, chunk_size, bits=MORTON_BITS):
+    """
+    Splits the sorted Morton codes into (start, end) ranges of at most chunk_size splats, each of which lies in a single
+    octree cell. Consecutive ranges of the Z-order curve can jump across the scene at the boundaries of large cells, so
+    a cell with too many splats is split into its eight children, and neighbouring small children are merged again.
+    """
+    ranges = []
+    stack = [(0, len(codes), 0, 0)]
+    while stack:
+        start, end, level, prefix = stack.pop()
+        if end - start <= chunk_size:
+            if end > start:
+                ranges.append((start, end))
+            continue
+        if level == bits:
+            # Every splat of the cell has the same code
+            ranges.extend((i, min(i + chunk_size, end)) for i in range(start, end, chunk_size))
+            continue
+
+        shift = 3 * (bits - level - 1)
+        child_starts = [(prefix << 3 | child) << shift for child in range(1, 8)]
+        bounds = [start, *(start + np.searchsorted(codes[start:end], child_starts)), end]
+        children = []
+        merged_start = start
+        for child in range(8):
+            child_start, child_end = bounds[child], bounds[child + 1]
+            if child_end - merged_start <= chunk_size:
+                continue
+            if child_start > merged_start:
+                ranges.append((merged_start, child_start))
+            if child_end - child_start > chunk_size:
+                children.append((child_start, child_end, level + 1, prefix << 3 | child))
+                merged_start = child_end
+            else:
+                merged_start = child_start
+        if end > merged_start:
+            ranges.append((merged_start, end))
+        # The children are processed in Z-order, so the chunks of the file follow the curve
+        stack.extend(reversed(children))
+    return sorted(ranges)
+
+
+def write_splat_container(gaussian: GaussianModel, path, chunk_size=DEFAULT_CHUNK_SIZE,
+                          compression_level=DEFAULT_COMPRESSION_LEVEL):
+    """
+    Writes the model as a chunked container. The bounding box of a chunk contains three standard deviations of its
+    splats, so a chunk whose box is outside of a region has no visible contribution to it.
+    """
+    with torch.no_grad():
+        codes, order = torch.sort(compute_morton_codes(gaussian.get_xyz.detach().cpu(), MORTON_BITS))
+        radii = get_splat_radii(gaussian).detach().cpu().numpy()
+    attributes = gaussian.construct_attribute_matrix()
+    order = order.numpy()
+
+    chunks = []
+    with open(path, "wb") as f:
+        f.write(CONTAINER_MAGIC)
+        for start, end in split_morton_cells(codes.numpy(), chunk_size):
+            indices = order[start:end]
+            chunk = attributes[indices]
+            chunk_radii = radii[indices, None]
+            payload = encode_chunk(chunk, compression_level)
+            chunks.append({
+                "offset": f.tell(),
+                "size": len(payload),
+                "count": len(indices),
+                "min": (chunk[:, :3] - chunk_radii).min(axis=0).tolist(),
+                "max": (chunk[:, :3] + chunk_radii).max(axis=0).tolist(),
+            })
+            f.write(payload)
+
+        index = {
+            "version": CONTAINER_VERSION,
+            "compression": "zlib",
+            "sh_degree": gaussian.sh_degree,
+            "splat_count": attributes.shape[0],
+            "property_names": gaussian.construct_list_of_attributes(),
+            "chunks": chunks,
+        }
+        index_bytes = json.dumps(index).encode("utf-8")
+        index_offset = f.tell()
+        f.write(index_bytes)
+        f.write(CONTAINER_FOOTER.pack(index_offset, len(index_bytes)))
+        f.write(CONTAINER_MAGIC)
+
+
+def is_splat_container(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+    except OSError:
+        return False
+
+
+class SplatContainerReader:
+    """
+    Reads the index of a chunked container when it is opened, and the chunks on demand.
+    Raises ValueError if the file is not a container of a supported version.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.index = self.read_index()
+        except (OSError, ValueError, struct.error):
+            self._file.close()
+            raise
+
+        chunks = self.index["chunks"]
+        self.property_names = self.index["property_names"]
+        self.chunk_min = np.array([chunk["min"] for chunk in chunks], dtype=np.float32).reshape(-1, 3)
+        self.chunk_max = np.array([chunk["max"] for chunk in chunks], dtype=np.float32).reshape(-1, 3)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def read_index(self):
+        footer_size = CONTAINER_FOOTER.size + len(CONTAINER_MAGIC)
+        if self._file.read(len(CONTAINER_MAGIC)) != CONTAINER_MAGIC:
+            raise ValueError(f"\"{self.path}\" is not a splat container.")
+
+        self._file.seek(-footer_size, 2)
+        footer = self._file.read(footer_size)
+        if footer[CONTAINER_FOOTER.size:] != CONTAINER_MAGIC:
+            raise ValueError(f"The splat container \"{self.path}\" is truncated.")
+
+        index_offset, index_size = CONTAINER_FOOTER.unpack(footer[:CONTAINER_FOOTER.size])
+        self._file.seek(index_offset)
+        index = json.loads(self._file.read(index_size).decode("utf-8"))
+        if index.get("version") != CONTAINER_VERSION or index.get("compression") != "zlib":
+            raise ValueError(f"The splat container \"{self.path}\" has an unsupported version.")
+        return index
+
+    @property
+    def splat_count(self):
+        return self.index["splat_count"]
+
+    @property
+    def chunk_count(self):
+        return len(self.index["chunks"])
+
+    def find_chunks(self, aabb=None, planes=None):
+        """
+        Returns the indices of the chunks whose bounding boxes intersect the (min, max) AABB and are not entirely
+        outside of any of the planes, given as (K, 3) unit normals pointing inwards and (K,) offsets, e.g. the frustum
+        planes of SplatCuller.get_frustum_planes.
+        """
+        selected = np.ones(self.chunk_count, dtype=bool)
+        if aabb is not None:
+            aabb_min, aabb_max = (np.asarray(bound, dtype=np.float32) for bound in aabb)
+            selected &= np.all((self.chunk_min <= aabb_max) & (self.chunk_max >= aabb_min), axis=1)
+
+        if planes is not None:
+            normals, offsets = (np.asarray(torch.as_tensor(value).cpu(), dtype=np.float32) for value in planes)
+            # The corner of a box that is the furthest along the normal of a plane is the last one to leave it
+            corners = np.where(normals[None] >= 0, self.chunk_max[:, None], self.chunk_min[:, None])
+            distances = (corners * normals[None]).sum(axis=2) + offsets[None]
+            selected &= np.all(distances >= 0, axis=1)
+
+        return np.nonzero(selected)[0].tolist()
+
+    def read_chunk(self, chunk_index):
+        """
+        Returns the (n, P) float32 attribute matrix of the splats of a chunk.
+        """
+        chunk = self.index["chunks"][chunk_index]
+        self._file.seek(chunk["offset"])
+        return decode_chunk(self._file.read(chunk["size"]), chunk["count"], len(self.property_names))
+
+    def read_chunks(self, chunk_indices):
+        matrices = [self.read_chunk(chunk_index) for chunk_index in chunk_indices]
+        if not matrices:
+            return np.empty((0, len(self.property_names)), dtype=np.float32)
+        return np.concatenate(matrices)
+
+    def load_gaussian_model(self, aabb=None, planes=None, device_name="cpu"):
+        """
+        Loads the splats of the chunks that intersect the AABB and the planes, or every splat.
+        """
+        attributes = self.read_chunks(self.find_chunks(aabb, planes))
+        gaussian = GaussianModel(self.index["sh_degree"], device_name)
+        gaussian.from_attribute_matrix(attributes, self.property_names)
+        # The chunks are stored along the Z-order curve, so any selection of them is in Morton order as well
+        gaussian.morton_ordered = True
+        return gaussian
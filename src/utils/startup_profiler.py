@@ -0,0 +1,132 @@
+"""
+Measures the time spent importing modules during the startup of the application, similar to `python -X importtime`.
+
+Usage:
+    profiler = StartupProfiler()
+    profiler.install()
+    ...  # imports
+    profiler.uninstall()
+    print(profiler.create_report())
+"""
+
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+
+class _TimedLoader:
+    """
+    Wraps the loader of a module and measures the creation and execution of the module.
+    Every other attribute is forwarded to the original loader, so resource readers etc. keep working.
+    """
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        with self._profiler.measure(spec.name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        try:
+            with self._profiler.measure(module.__name__):
+                self._loader.exec_module(module)
+        finally:
+            # Restore the original loader, so that the module looks as if it was imported without the profiler.
+            # Some modules (e.g. config modules of torch) do not allow setting their attributes.
+            try:
+                module.__loader__ = self._loader
+            except AttributeError:
+                pass
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+
+class _Measurement:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.profiler.stack.append(0.0)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        cumulative = time.perf_counter() - self.start
+        nested = self.profiler.stack.pop()
+        if self.profiler.stack:
+            self.profiler.stack[-1] += cumulative
+
+        self_time, total_time, depth = self.profiler.timings.get(self.name, (0.0, 0.0, len(self.profiler.stack)))
+        self.profiler.timings[self.name] = (self_time + cumulative - nested, total_time + cumulative, depth)
+
+
+class StartupProfiler(MetaPathFinder):
+    """
+    Meta path finder that does not find anything itself, but wraps the loaders found by the other finders.
+    The self and cumulative import time of every module imported while the profiler is installed is recorded.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.stack = []
+        self.start_time = None
+        self.end_time = None
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        self.start_time = time.perf_counter()
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        self.end_time = time.perf_counter()
+
+    def measure(self, name):
+        return _Measurement(self, name)
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+
+            if spec.loader is not None and not isinstance(spec.loader, _TimedLoader):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+
+        return None
+
+    def create_report(self, top_count=25):
+        """
+        Returns the slowest top level packages and modules as a table, sorted by the cumulative import time.
+        """
+        elapsed = (self.end_time or time.perf_counter()) - (self.start_time or time.perf_counter())
+        packages = {}
+        for name, (self_time, total_time, depth) in self.timings.items():
+            package = name.split(".")[0]
+            package_self, package_total = packages.get(package, (0.0, 0.0))
+            # Only the outermost import of the package counts towards the cumulative time
+            if name == package or depth == 0:
+                package_total += total_time
+            packages[package] = (package_self + self_time, package_total)
+
+        total_import_time = sum(self_time for self_time, _, _ in self.timings.values())
+        lines = [f"Startup: {elapsed:.3f} s, of which importing {len(self.timings)} modules took "
+                 f"{total_import_time:.3f} s",
+                 f"{'self [s]':>10} | {'cumulative [s]':>14} | package"]
+
+        sorted_packages = sorted(packages.items(), key=lambda item: item[1][1], reverse=True)
+        for package, (self_time, total_time) in sorted_packages[:top_count]:
+            lines.append(f"{self_time:>10.3f} | {total_time:>14.3f} | {package}")
+
+        return "\n".join(lines)